@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Background jobs for the validate, convert and compare api.
+
+A request posted with ?async=1 stores its upload row in the queued state,
+answers 202 with a job id and runs the tool on a thread pool. The upload
+row is the job record: the tool function moves it to the finished state
+with the usual result/message/status fields, which the jobs api reports.
+
+The tools report no progress of their own, the state (queued, running,
+finished) is all the jobs api can tell about a job. The threads running
+the jobs live in the web process: a job still queued or running
+settings.API_JOB_MAX_AGE seconds after it was created was lost with a
+restart of that process, it is reported finished with status 500.
+"""
+
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import threading
+from multiprocessing.pool import ThreadPool
+from os.path import isfile, join
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.models import ValidateFileUpload, ConvertFileUpload, CompareFileUpload
+from api.models import JOB_QUEUED, JOB_RUNNING, JOB_FINISHED
+
+logger = logging.getLogger(__name__)
+
+""" Job id prefix -> upload model used as the job record """
+JOB_MODELS = {
+    "validate": ValidateFileUpload,
+    "convert": ConvertFileUpload,
+    "compare": CompareFileUpload,
+}
+""" result (and message) of a job lost with the process running it """
+LOST_JOB_MESSAGE = "The job did not finish."
+
+
+def isAsync(request):
+    return request.query_params.get("async", "").lower() in ("1", "true", "yes")
+
+
+def jobId(query):
+    for kind, model in JOB_MODELS.items():
+        if isinstance(query, model):
+            return "{0}-{1}".format(kind, query.pk)
+    raise ValueError("{0} is not a job record".format(type(query).__name__))
+
+
+def getJob(job_id, user):
+    """ Returns the upload row of the job, raises Http404 if the job does
+    not exist or belongs to another user
+    """
+    if not user.is_authenticated:
+        raise PermissionDenied
+    kind, _, pk = job_id.partition("-")
+    if kind not in JOB_MODELS or not pk.isdigit():
+        raise Http404("No such job.")
+    try:
+        query = JOB_MODELS[kind].objects.get(pk=int(pk), owner=user)
+    except JOB_MODELS[kind].DoesNotExist:
+        raise Http404("No such job.")
+    return expireLost(query)
+
+
+def expireLost(query):
+    """ Finish with status 500 a job queued or running for longer than
+    settings.API_JOB_MAX_AGE seconds
+    """
+    if query.state == JOB_FINISHED:
+        return query
+    if timezone.now() - query.created < datetime.timedelta(seconds=settings.API_JOB_MAX_AGE):
+        return query
+    fields = {"state": JOB_FINISHED, "status": 500, "result": LOST_JOB_MESSAGE}
+    if hasattr(query, "message"):
+        fields["message"] = LOST_JOB_MESSAGE
+    """ Unless the job finished meanwhile """
+    type(query).objects.filter(pk=query.pk, state__in=(JOB_QUEUED, JOB_RUNNING)).update(**fields)
+    query.refresh_from_db()
+    return query
+
+
+def resultPath(query):
+    """ Absolute path of the file produced by a finished job, None for
+    jobs without a result file (validate) or failed jobs
+    """
+    if isinstance(query, ValidateFileUpload) or query.state != JOB_FINISHED:
+        return None
+    """ The result of convert and compare is the path of the file under MEDIA_URL """
+    if not query.result.startswith(settings.MEDIA_URL):
+        return None
+    path = join(settings.MEDIA_ROOT, query.result[len(settings.MEDIA_URL):])
+    if not isfile(path):
+        return None
+    return path
+
+
+def describe(query):
+    """ JSON description of a job for the jobs api """
+    data = {
+        "job": jobId(query),
+        "state": query.state,
+        "created": query.created,
+    }
+    if query.state == JOB_FINISHED:
+        data["status"] = query.status
+        data["result"] = query.result
+        if hasattr(query, "message"):
+            data["message"] = query.message
+        if resultPath(query):
+            data["download"] = reverse("job-download-api", args=[data["job"]])
+    return data
+
+
+def accepted(query):
+    """ 202 response returned by the tool views in async mode """
+    data = describe(query)
+    data["url"] = reverse("job-api", args=[data["job"]])
+    return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+def runJob(model, pk, func, args):
+    """ Run the tool function of a queued job, func stores the result
+    on the row and moves it to the finished state
+    """
+    try:
+        """ A job reported lost while it waited in the queue is not run """
+        if not model.objects.filter(pk=pk, state=JOB_QUEUED).update(state=JOB_RUNNING):
+            return
+        query = model.objects.get(pk=pk)
+        func(query, *args)
+    except Exception:
+        logger.exception("Job %s-%s failed", model.__name__, pk)
+        model.objects.filter(pk=pk).update(state=JOB_FINISHED, status=500)
+
+
+def runPooledJob(model, pk, func, args):
+    try:
+        runJob(model, pk, func, args)
+    finally:
+        """ The pool threads are not request threads, release their connection """
+        connection.close()
+
+
+_pool = None
+_poolLock = threading.Lock()
+
+
+def getPool():
+    """ Returns the thread pool running the jobs, the threads mostly wait
+    on the SPDX tool workers so a few of them are enough
+    """
+    global _pool
+    if _pool is None:
+        with _poolLock:
+            if _pool is None:
+                _pool = ThreadPool(settings.API_JOB_THREADS)
+    return _pool
+
+
+def submit(query, func, *args):
+    """ Queue func(query, *args). With API_JOB_THREADS = 0 the job runs
+    before submit returns.
+    """
+    query.state = JOB_QUEUED
+    type(query).objects.filter(pk=query.pk).update(state=JOB_QUEUED)
+    if settings.API_JOB_THREADS > 0:
+        getPool().apply_async(runPooledJob, (type(query), query.pk, func, args))
+    else:
+        runJob(type(query), query.pk, func, args)
+        query.refresh_from_db()
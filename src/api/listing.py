@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Listing of the api requests (GET on validate, convert, compare,
+check_license, submit_license and the api2 viewsets).
+
+The lists are paged by cursor on created, newest first, so a page costs
+the same at any depth. The query parameters:
+    owner            id or username of the user who made the requests
+    status           http status of the requests
+    created_after    date or datetime, included
+    created_before   date or datetime, excluded
+    fields           comma separated fields of the rows, all by default
+    page_size        rows of a page, up to settings.API_LIST_MAX_PAGE_SIZE
+    export=1         all the rows in one json array, streamed in batches
+                     of settings.API_EXPORT_BATCH_SIZE rows
+"""
+
+from __future__ import unicode_literals
+
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ListPagination(CursorPagination):
+    ordering = "-created"
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return settings.API_LIST_MAX_PAGE_SIZE
+
+
+def parseCreated(value, name):
+    """ Aware datetime of a date or datetime parameter """
+    try:
+        created = parse_datetime(value)
+        if created is None:
+            date = parse_date(value)
+            if date is not None:
+                created = datetime.datetime.combine(date, datetime.time())
+    except ValueError:
+        created = None
+    if created is None:
+        raise ValidationError({name: "Expected a date or a datetime."})
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created, timezone.get_current_timezone())
+    return created
+
+
+def filterQueryset(queryset, params):
+    """ Apply the owner, status and created filters of the query parameters.
+    Raises ValidationError for an invalid value.
+    """
+    owner = params.get("owner", "").strip()
+    if owner:
+        queryset = queryset.filter(owner_id=int(owner)) if owner.isdigit() else queryset.filter(owner__username=owner)
+    status = params.get("status", "").strip()
+    if status:
+        if not status.isdigit():
+            raise ValidationError({"status": "Expected an http status."})
+        queryset = queryset.filter(status=int(status))
+    if params.get("created_after"):
+        queryset = queryset.filter(created__gte=parseCreated(params["created_after"], "created_after"))
+    if params.get("created_before"):
+        queryset = queryset.filter(created__lt=parseCreated(params["created_before"], "created_before"))
+    return queryset
+
+
+def sparseFields(params, serializerClass):
+    """ Fields of the ?fields= parameter, None without it.
+    Raises ValidationError for a field the serializer does not have.
+    """
+    if not params.get("fields"):
+        return None
+    fields = [name.strip() for name in params["fields"].split(",") if name.strip()]
+    unknown = [name for name in fields if name not in serializerClass.Meta.fields]
+    if unknown:
+        raise ValidationError({"fields": "Unknown fields: {0}.".format(", ".join(unknown))})
+    return fields
+
+
+def loadedFields(queryset, serializerClass, fields):
+    """ Read only the columns of the serialized fields, and created for the
+    cursor. The users serialized by a slug (owner) are read in the same query.
+    """
+    columns = set(field.name for field in queryset.model._meta.concrete_fields)
+    names = [name for name in (fields or serializerClass.Meta.fields) if name in columns]
+    for name in list(names):
+        slug = getattr(serializerClass._declared_fields.get(name), "slug_field", None)
+        if slug is not None:
+            queryset = queryset.select_related(name)
+            names.append("{0}__{1}".format(name, slug))
+    return queryset.only("created", *names)
+
+
+def isExport(request):
+    return request.query_params.get("export", "").lower() in ("1", "true", "yes")
+
+
+def streamRows(queryset, serializerClass, context):
+    """ Yields a json array of the rows of queryset, newest first like the
+    pages, reading them in batches by (created, primary key)
+    """
+    batchSize = settings.API_EXPORT_BATCH_SIZE
+    encoder = JSONEncoder()
+    separator = ""
+    yield "["
+    last = None
+    while True:
+        batch = queryset.order_by("-created", "-pk")
+        if last is not None:
+            created, pk = last
+            batch = batch.filter(Q(created__lt=created) | Q(created=created, pk__lt=pk))
+        rows = list(batch[:batchSize])
+        for row in rows:
+            yield separator + encoder.encode(serializerClass(row, context=context).data)
+            separator = ","
+        if len(rows) < batchSize:
+            break
+        last = (rows[-1].created, rows[-1].pk)
+    yield "]"
+
+
+def exportResponse(queryset, serializerClass, context):
+    return StreamingHttpResponse(streamRows(queryset, serializerClass, context), content_type="application/json")
+
+
+def listResponse(request, queryset, serializerClass):
+    """ Response of a GET on a listing api: a page of the filtered rows, or
+    all of them streamed with export=1
+    """
+    queryset = filterQueryset(queryset, request.query_params)
+    fields = sparseFields(request.query_params, serializerClass)
+    queryset = loadedFields(queryset, serializerClass, fields)
+    context = {"fields": fields}
+    if isExport(request):
+        return exportResponse(queryset, serializerClass, context)
+    paginator = ListPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serializerClass(page, many=True, context=context).data)
+
+
+class ListingViewSetMixin(object):
+    """ Filters, ?fields= and export=1 for the list of a ModelViewSet """
+    pagination_class = ListPagination
+
+    def filter_queryset(self, queryset):
+        queryset = super(ListingViewSetMixin, self).filter_queryset(queryset)
+        if self.action != "list":
+            return queryset
+        fields = sparseFields(self.request.query_params, self.get_serializer_class())
+        return loadedFields(filterQueryset(queryset, self.request.query_params), self.get_serializer_class(), fields)
+
+    def get_serializer_context(self):
+        context = super(ListingViewSetMixin, self).get_serializer_context()
+        if self.action == "list":
+            context["fields"] = sparseFields(self.request.query_params, self.get_serializer_class())
+        return context
+
+    def list(self, request, *args, **kwargs):
+        if isExport(request):
+            return exportResponse(self.filter_queryset(self.get_queryset()), self.get_serializer_class(),
+                self.get_serializer_context())
+        return super(ListingViewSetMixin, self).list(request, *args, **kwargs)
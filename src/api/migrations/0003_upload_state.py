@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 12:37
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_submitlicensemodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comparefileupload',
+            name='state',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished')], default='finished', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='convertfileupload',
+            name='state',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished')], default='finished', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='validatefileupload',
+            name='state',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished')], default='finished', max_length=16),
+        ),
+    ]
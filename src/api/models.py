@@ -25,21 +25,34 @@ OSI_CHOICES = (
     ("Rejected", "Rejected")
 )
 
+""" State of a request run by the api, requests made with ?async=1 are
+queued and run in the background, the other ones are finished when created
+"""
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_FINISHED = "finished"
+JOB_STATE_CHOICES = (
+    (JOB_QUEUED, "Queued"),
+    (JOB_RUNNING, "Running"),
+    (JOB_FINISHED, "Finished"),
+)
+
 def user_directory_path(instance, filename):
     # file will be uploaded to MEDIA_ROOT/<username>/<filename>
     return 'apifiles/{0}/{1}/{2}'.format(instance.owner.username, int(time()), filename)
 
 class ValidateFileUpload(models.Model):
 
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     owner = models.ForeignKey(User, to_field='id')
     file = models.FileField(upload_to=user_directory_path)
     result = models.CharField(max_length=128,null=False,blank=False)
     status = models.IntegerField(default=200,blank=False)
+    state = models.CharField(max_length=16, choices=JOB_STATE_CHOICES, default=JOB_FINISHED)
 
 class ConvertFileUpload(models.Model):
 
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     owner = models.ForeignKey(User, to_field='id')
     from_format = models.CharField(max_length=16,null=False,blank=False)
     to_format = models.CharField(max_length=16,null=False,blank=False)
@@ -49,10 +62,11 @@ class ConvertFileUpload(models.Model):
     message = models.CharField(max_length=64,null=False,blank=False)
     file = models.FileField(upload_to=user_directory_path)
     status = models.IntegerField(default=200,blank=False)
+    state = models.CharField(max_length=16, choices=JOB_STATE_CHOICES, default=JOB_FINISHED)
 
 class CompareFileUpload(models.Model):
     
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     owner = models.ForeignKey(User, to_field='id')
     result = models.CharField(max_length=32,null=False,blank=False)
     message = models.CharField(max_length=64,null=False,blank=False)
@@ -60,10 +74,11 @@ class CompareFileUpload(models.Model):
     file2 = models.FileField(upload_to=user_directory_path)
     rfilename = models.CharField(max_length=32,null=False,blank=False)
     status = models.IntegerField(default=200,blank=False)
+    state = models.CharField(max_length=16, choices=JOB_STATE_CHOICES, default=JOB_FINISHED)
 
 class CheckLicenseFileUpload(models.Model):
 
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     owner = models.ForeignKey(User, to_field='id')
     file = models.FileField(upload_to=user_directory_path)
     result = models.CharField(max_length=128,null=False,blank=False)
@@ -71,7 +86,7 @@ class CheckLicenseFileUpload(models.Model):
 
 class SubmitLicenseModel(models.Model):
 
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     owner = models.ForeignKey(User, to_field='id')
     licenseAuthorName = models.CharField(max_length=100, default="", blank=True, null=True)
     fullname = models.CharField(max_length=70)
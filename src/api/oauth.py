@@ -6,6 +6,8 @@ from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
 from oauth2_provider.models import AccessToken
 
+from app import githubclient
+
 
 def generate_github_access_token(github_client_id, github_client_secret, github_code):
     """
@@ -15,7 +17,7 @@ def generate_github_access_token(github_client_id, github_client_secret, github_
     :param github_code: authentication code generated by client from http://github.com/login/oauth/authorize/
     :return: json content containing access token
     """
-    auth_response = requests.post(
+    auth_response = githubclient.post(
         'https://github.com/login/oauth/access_token/',
         data=json.dumps({
             'client_id': github_client_id,
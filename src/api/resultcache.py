@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" On disk cache of the validate, convert and compare results.
+
+Entries are keyed by the SHA-256 of the uploaded documents, the tool and
+its options, and a fingerprint of tool.jar, so a new jar never serves an
+old result. Each entry is a directory holding meta.json (the result
+fields stored on the upload row) and, for convert and compare, the
+produced file. The least recently used entries are evicted once the cache
+grows over settings.RESULT_CACHE_MAX_BYTES, 0 disables the cache.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+CacheEntry = namedtuple("CacheEntry", ["meta", "outputPath"])
+
+META_FILE = "meta.json"
+OUTPUT_FILE = "output"
+JAR_FILE = "JAR"
+
+_lock = threading.Lock()
+""" (path, size, mtime) of tool.jar -> its sha256, hashing the jar is only
+redone when the file changes
+"""
+_jarStat = None
+_jarDigest = None
+
+
+def enabled():
+    return settings.RESULT_CACHE_MAX_BYTES > 0
+
+
+def fileDigest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def jarFingerprint():
+    """ SHA-256 of tool.jar, recomputed when its size or mtime change """
+    global _jarStat, _jarDigest
+    path = settings.JAR_ABSOLUTE_PATH
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    jarStat = (path, st.st_size, st.st_mtime)
+    if jarStat != _jarStat:
+        _jarDigest = fileDigest(path)
+        _jarStat = jarStat
+    return _jarDigest
+
+
+def makeKey(tool, paths, **options):
+    """ Cache key of running tool with options on the files in paths """
+    payload = json.dumps([jarFingerprint(), tool, [fileDigest(path) for path in paths], sorted(options.items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def entryDir(key):
+    return os.path.join(settings.RESULT_CACHE_DIR, key[:2], key)
+
+
+def checkJar():
+    """ Empty the cache when tool.jar is not the one the entries were made with """
+    fingerprint = jarFingerprint()
+    marker = os.path.join(settings.RESULT_CACHE_DIR, JAR_FILE)
+    try:
+        with open(marker) as f:
+            if f.read() == fingerprint:
+                return
+    except IOError:
+        pass
+    with _lock:
+        purge()
+        with open(marker, "w") as f:
+            f.write(fingerprint)
+
+
+def purge():
+    if os.path.isdir(settings.RESULT_CACHE_DIR):
+        shutil.rmtree(settings.RESULT_CACHE_DIR, ignore_errors=True)
+    os.makedirs(settings.RESULT_CACHE_DIR)
+
+
+def get(key):
+    """ Returns the CacheEntry stored under key, or None """
+    if not enabled():
+        return None
+    checkJar()
+    path = entryDir(key)
+    try:
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+    except (IOError, ValueError):
+        return None
+    """ Mark the entry as recently used for the eviction """
+    try:
+        os.utime(path, None)
+    except OSError:
+        return None
+    outputPath = os.path.join(path, OUTPUT_FILE)
+    if not os.path.isfile(outputPath):
+        outputPath = None
+    return CacheEntry(meta, outputPath)
+
+
+def put(key, meta, outputPath=None):
+    """ Store meta, and a copy of the file at outputPath, under key """
+    if not enabled():
+        return
+    checkJar()
+    path = entryDir(key)
+    if os.path.isdir(path):
+        return
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        try:
+            os.makedirs(parent)
+        except OSError:
+            pass
+    """ Build the entry aside and rename it, readers never see half an entry """
+    tmp = tempfile.mkdtemp(dir=settings.RESULT_CACHE_DIR)
+    try:
+        with open(os.path.join(tmp, META_FILE), "w") as f:
+            json.dump(meta, f)
+        if outputPath is not None:
+            shutil.copyfile(outputPath, os.path.join(tmp, OUTPUT_FILE))
+        os.rename(tmp, path)
+    except OSError:
+        """ Another request stored the same entry first """
+        shutil.rmtree(tmp, ignore_errors=True)
+    evict()
+
+
+def entrySize(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def evict():
+    """ Remove the least recently used entries until the cache fits in
+    RESULT_CACHE_MAX_BYTES
+    """
+    with _lock:
+        entries = []
+        total = 0
+        for prefix in os.listdir(settings.RESULT_CACHE_DIR):
+            prefixDir = os.path.join(settings.RESULT_CACHE_DIR, prefix)
+            if len(prefix) != 2 or not os.path.isdir(prefixDir):
+                continue
+            for key in os.listdir(prefixDir):
+                path = os.path.join(prefixDir, key)
+                try:
+                    size = entrySize(path)
+                    entries.append((os.path.getmtime(path), size, path))
+                except OSError:
+                    continue
+                total += size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= settings.RESULT_CACHE_MAX_BYTES:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -18,9 +18,20 @@ from django.contrib.auth.models import User, Group
 from rest_framework import serializers
 
 from api.models import ValidateFileUpload,ConvertFileUpload,CompareFileUpload,CheckLicenseFileUpload,SubmitLicenseModel
- 
 
-class ValidateSerializer(serializers.HyperlinkedModelSerializer):
+
+class SparseFieldsMixin(object):
+    """ Keeps only the fields listed in the serializer context under
+    "fields" (the ?fields= parameter of the listing api), all without it
+    """
+    def __init__(self, *args, **kwargs):
+        super(SparseFieldsMixin, self).__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class ValidateSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     """POST validate API request fields"""
     owner = serializers.SlugRelatedField(
         read_only=True,
@@ -30,13 +41,13 @@ class ValidateSerializer(serializers.HyperlinkedModelSerializer):
         model = ValidateFileUpload
         fields = ('created', 'file', 'owner')
 
-class ValidateSerializerReturn(serializers.ModelSerializer):
+class ValidateSerializerReturn(SparseFieldsMixin, serializers.ModelSerializer):
     """Response Fields to be returned to the user"""
     class Meta:
         model = ValidateFileUpload
         fields = ('created', 'file', 'owner','result','status')
 
-class ConvertSerializer(serializers.HyperlinkedModelSerializer):
+class ConvertSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     """POST convert API request fields"""
     owner = serializers.SlugRelatedField(
         read_only=True,
@@ -46,7 +57,7 @@ class ConvertSerializer(serializers.HyperlinkedModelSerializer):
         model = ConvertFileUpload
         fields = ('created', 'file', 'owner','cfilename','from_format','to_format','tagToRdfFormat')
 
-class ConvertSerializerReturn(serializers.ModelSerializer):
+class ConvertSerializerReturn(SparseFieldsMixin, serializers.ModelSerializer):
     """Response Fields to be returned to the user"""
     class Meta:
         model = ConvertFileUpload
@@ -62,13 +73,13 @@ class CompareSerializer(serializers.HyperlinkedModelSerializer):
         model = CompareFileUpload
         fields = ('created', 'file1','file2', 'owner','rfilename')
 
-class CompareSerializerReturn(serializers.ModelSerializer):
+class CompareSerializerReturn(SparseFieldsMixin, serializers.ModelSerializer):
     """Response Fields to be returned to the user"""
     class Meta:
         model = CompareFileUpload
         fields = ('created', 'file1','file2', 'owner','result','rfilename','message','status')
 
-class CheckLicenseSerializer(serializers.HyperlinkedModelSerializer):
+class CheckLicenseSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     """POST validate API request fields"""
     owner = serializers.SlugRelatedField(
         read_only=True,
@@ -84,7 +95,7 @@ class CheckLicenseSerializerReturn(serializers.ModelSerializer):
         model = CheckLicenseFileUpload
         fields = ('created', 'file', 'owner','result','status')
 
-class SubmitLicenseSerializer(serializers.HyperlinkedModelSerializer):
+class SubmitLicenseSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     """POST license submit API request fields"""
     owner = serializers.SlugRelatedField(
         read_only=True,
@@ -14,7 +14,7 @@
 
 from __future__ import unicode_literals
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from unittest import skipIf
 from src.secret import getAuthCode,getGithubKey,getGithubSecret
 from django.core.exceptions import ObjectDoesNotExist,PermissionDenied
@@ -22,6 +22,8 @@ from django.contrib.auth.models import User
 from django.conf import settings
 from django.urls import reverse
 from django.utils.timezone import now, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework.test import APITestCase,APIClient
 from oauth2_provider.models import AccessToken,Application
@@ -29,10 +31,18 @@ from oauth2_provider.settings import oauth2_settings
 from oauthlib.common import generate_token
 from rest_framework.authtoken.models import Token
 
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from os.path import join
 from requests import get
-from json import dumps
+from json import dumps, loads
 from api.oauth import generate_github_access_token,get_user_from_token
 from api.views import generateLicenseXml
+from api import resultcache
+from app import licensebatch
 
 from api.models import ValidateFileUpload,ConvertFileUpload,CompareFileUpload,CheckLicenseFileUpload,SubmitLicenseModel
 
@@ -269,6 +279,125 @@ class CompareFileUploadTests(APITestCase):
         self.client.logout()
         self.tearDown()
 
+@override_settings(API_JOB_THREADS=0)
+class AsyncJobTests(APITestCase):
+    """ Test for the ?async=1 mode of the tool api
+    and the jobs api, the jobs run inline.
+    """
+    def setUp(self):
+        self.username = "jobsapitestuser"
+        self.password = "jobsapitestpass"
+        self.tearDown()
+        self.credentials = {'username':self.username,'password':self.password }
+        User.objects.create_user(**self.credentials)
+        User.objects.create_user(username="jobsapiotheruser",password=self.password)
+        self.tv_file = open("examples/SPDXTagExample-v2.0.spdx")
+
+    def tearDown(self):
+        User.objects.filter(username__in=[getattr(self,"username",""),"jobsapiotheruser"]).delete()
+        ValidateFileUpload.objects.all().delete()
+        ConvertFileUpload.objects.all().delete()
+
+    def test_async_validate(self):
+        self.client.login(username=self.username,password=self.password)
+        resp = self.client.post(reverse("validate-api")+"?async=1",{"file":self.tv_file},format="multipart")
+        self.assertEqual(resp.status_code,202)
+        self.assertTrue(resp.data["job"].startswith("validate-"))
+        job = self.client.get(resp.data["url"])
+        self.assertEqual(job.status_code,200)
+        self.assertEqual(job.data["state"],"finished")
+        self.assertEqual(job.data["status"],201)
+        self.assertEqual(job.data["result"],"This SPDX Document is valid.")
+        self.assertNotIn("download",job.data)
+        """ Jobs of other users are not visible"""
+        self.client.login(username="jobsapiotheruser",password=self.password)
+        self.assertEqual(self.client.get(resp.data["url"]).status_code,404)
+        self.assertEqual(self.client.get(reverse("job-api",args=["validate-0"])).status_code,404)
+        self.assertEqual(self.client.get(reverse("job-api",args=["nosuchtool-1"])).status_code,404)
+        self.client.logout()
+
+    def test_async_convert_download(self):
+        self.client.login(username=self.username,password=self.password)
+        resp = self.client.post(reverse("convert-api")+"?async=1",{"file":self.tv_file,"from_format":"Tag","to_format":"RDF","cfilename":"tagtordf-jobtest"},format="multipart")
+        self.assertEqual(resp.status_code,202)
+        job = self.client.get(resp.data["url"])
+        self.assertEqual(job.data["state"],"finished")
+        self.assertTrue(job.data["result"].startswith(settings.MEDIA_URL))
+        download = self.client.get(job.data["download"])
+        self.assertEqual(download.status_code,200)
+        self.assertTrue(len(b"".join(download.streaming_content)) > 0)
+        self.client.logout()
+
+    def test_lost_job(self):
+        """ A job left running by a restarted process is reported failed after API_JOB_MAX_AGE """
+        owner = User.objects.get(username=self.username)
+        lost = ValidateFileUpload.objects.create(owner=owner, file="lost.spdx", state="running")
+        recent = ValidateFileUpload.objects.create(owner=owner, file="recent.spdx", state="queued")
+        ValidateFileUpload.objects.filter(pk=lost.pk).update(created=now() - timedelta(seconds=settings.API_JOB_MAX_AGE + 1))
+        self.client.login(username=self.username,password=self.password)
+        job = self.client.get(reverse("job-api",args=["validate-{0}".format(lost.pk)]))
+        self.assertEqual(job.data["state"],"finished")
+        self.assertEqual(job.data["status"],500)
+        job = self.client.get(reverse("job-api",args=["validate-{0}".format(recent.pk)]))
+        self.assertEqual(job.data["state"],"queued")
+        self.client.logout()
+
+class ResultCacheTests(TestCase):
+    """ Test for the on disk result cache of the tool api """
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.jar = join(self.cachedir, "tool.jar")
+        with open(self.jar, "w") as f:
+            f.write("jar v1")
+        self.settings = override_settings(
+            RESULT_CACHE_DIR=join(self.cachedir, "cache"),
+            RESULT_CACHE_MAX_BYTES=1024*1024,
+            JAR_ABSOLUTE_PATH=self.jar,
+            )
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.cachedir)
+
+    def test_get_put(self):
+        key = resultcache.makeKey("validate", ["examples/SPDXTagExample-v2.0.spdx"])
+        self.assertIsNone(resultcache.get(key))
+        resultcache.put(key, {"result": "This SPDX Document is valid.", "status": 201})
+        entry = resultcache.get(key)
+        self.assertEqual(entry.meta["status"], 201)
+        self.assertIsNone(entry.outputPath)
+        """ The options and the document are part of the key"""
+        self.assertNotEqual(key, resultcache.makeKey("validate", ["examples/SPDXRdfExample-v2.0.rdf"]))
+        self.assertNotEqual(key, resultcache.makeKey("convert", ["examples/SPDXTagExample-v2.0.spdx"], to_format="RDF"))
+
+    def test_output_file(self):
+        key = resultcache.makeKey("convert", ["examples/SPDXTagExample-v2.0.spdx"], to_format="RDF")
+        resultcache.put(key, {"status": 201}, "examples/SPDXRdfExample-v2.0.rdf")
+        with open(resultcache.get(key).outputPath) as cached, open("examples/SPDXRdfExample-v2.0.rdf") as original:
+            self.assertEqual(cached.read(), original.read())
+
+    def test_new_jar(self):
+        key = resultcache.makeKey("validate", ["examples/SPDXTagExample-v2.0.spdx"])
+        resultcache.put(key, {"status": 201})
+        with open(self.jar, "w") as f:
+            f.write("jar v2, with a different size")
+        self.assertIsNone(resultcache.get(key))
+        self.assertNotEqual(key, resultcache.makeKey("validate", ["examples/SPDXTagExample-v2.0.spdx"]))
+
+    def test_eviction(self):
+        with override_settings(RESULT_CACHE_MAX_BYTES=os.path.getsize("examples/SPDXRdfExample-v2.0.rdf")*2 + 200):
+            keys = [resultcache.makeKey("convert", ["examples/SPDXTagExample-v2.0.spdx"], n=n) for n in range(3)]
+            for n, key in enumerate(keys):
+                resultcache.put(key, {"status": 201}, "examples/SPDXRdfExample-v2.0.rdf")
+                os.utime(resultcache.entryDir(key), (n, n))
+                if n == 1:
+                    """ Use the first entry, the second one becomes the least recently used"""
+                    resultcache.get(keys[0])
+            self.assertIsNotNone(resultcache.get(keys[0]))
+            self.assertIsNone(resultcache.get(keys[1]))
+            self.assertIsNotNone(resultcache.get(keys[2]))
+
 class CheckLicenseFileUploadTests(APITestCase):
 
     def setUp(self):
@@ -318,6 +447,130 @@ class CheckLicenseFileUploadTests(APITestCase):
         self.client.logout()
         self.tearDown()
 
+class CheckLicenseBatchTests(APITestCase):
+
+    def setUp(self):
+        self.username = "checklicensebatchtestuser"
+        self.password = "checklicensebatchtestpass"
+        User.objects.create_user(username=self.username,password=self.password)
+        with open("examples/AFL-1.1.txt") as f:
+            self.license_text = f.read()
+        with open("examples/Other.txt") as f:
+            self.other_text = f.read()
+
+    def tearDown(self):
+        User.objects.filter(username=self.username).delete()
+
+    def test_read_json(self):
+        items = licensebatch.readJson(["text", {"name": "LICENSE", "text": "other"}])
+        self.assertEqual(items, [("0", "text"), ("LICENSE", "other")])
+        with self.assertRaises(licensebatch.BatchError):
+            licensebatch.readJson({"text": "not an array"})
+        with self.assertRaises(licensebatch.BatchError):
+            licensebatch.readJson([{"name": "no text"}])
+
+    def test_read_archive(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as z:
+            z.writestr("a/LICENSE", self.license_text)
+            z.writestr("b/COPYING", self.other_text)
+        self.assertEqual(licensebatch.readArchive(archive), [("a/LICENSE", self.license_text), ("b/COPYING", self.other_text)])
+        with self.assertRaises(licensebatch.BatchError):
+            licensebatch.readArchive(io.BytesIO(b"neither tar nor zip"))
+
+    def test_batch_api(self):
+        resp1 = self.client.post(reverse("check_license_batch-api"),[self.license_text],format="json")
+        self.assertIn(resp1.status_code,(401,403))
+        self.client.login(username=self.username,password=self.password)
+        resp2 = self.client.post(reverse("check_license_batch-api"),[{"name":"AFL","text":self.license_text},self.other_text],format="json")
+        self.assertEqual(resp2.status_code,200)
+        self.assertEqual(resp2.data["count"],2)
+        self.assertEqual(resp2.data["results"][0]["name"],"AFL")
+        self.assertEqual(resp2.data["results"][0]["matchIds"],["AFL-1.1"])
+        self.assertEqual(resp2.data["results"][1]["matchType"],"No match")
+        """ Nothing is stored"""
+        self.assertEqual(CheckLicenseFileUpload.objects.count(),0)
+        self.client.logout()
+
+class ListingTests(APITestCase):
+    """ Cursor pages, filters, sparse fields and export of the api lists """
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username="listingalice",password="listingpass")
+        self.bob = User.objects.create_user(username="listingbob",password="listingpass")
+        for number in range(5):
+            ValidateFileUpload.objects.create(owner=self.alice if number % 2 else self.bob,
+                file="apifiles/listing/{0}.spdx".format(number), result="Result {0}".format(number),
+                status=201 if number < 3 else 400)
+
+    def tearDown(self):
+        ValidateFileUpload.objects.all().delete()
+        User.objects.filter(username__in=["listingalice","listingbob"]).delete()
+
+    def test_pages(self):
+        resp = self.client.get(reverse("validate-api"),{"page_size":2})
+        self.assertEqual(resp.status_code,200)
+        files = [row["file"] for row in resp.data["results"]]
+        while resp.data["next"]:
+            resp = self.client.get(resp.data["next"])
+            files.extend(row["file"] for row in resp.data["results"])
+        self.assertEqual(len(files),5)
+        self.assertEqual(len(set(files)),5)
+
+    def test_filters(self):
+        resp = self.client.get(reverse("validate-api"),{"owner":"listingalice"})
+        self.assertEqual(len(resp.data["results"]),2)
+        resp = self.client.get(reverse("validate-api"),{"owner":self.bob.id,"status":201})
+        self.assertEqual(len(resp.data["results"]),2)
+        tomorrow = (now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        resp = self.client.get(reverse("validate-api"),{"created_after":tomorrow})
+        self.assertEqual(len(resp.data["results"]),0)
+        resp = self.client.get(reverse("validate-api"),{"created_before":tomorrow})
+        self.assertEqual(len(resp.data["results"]),5)
+        self.assertEqual(self.client.get(reverse("validate-api"),{"created_after":"yesterday"}).status_code,400)
+        self.assertEqual(self.client.get(reverse("validate-api"),{"status":"ok"}).status_code,400)
+
+    def test_fields(self):
+        resp = self.client.get(reverse("validate-api"),{"fields":"owner,created"})
+        self.assertEqual(set(resp.data["results"][0]),set(["owner","created"]))
+        self.assertEqual(self.client.get(reverse("validate-api"),{"fields":"owner,password"}).status_code,400)
+
+    @override_settings(API_EXPORT_BATCH_SIZE=2)
+    def test_export(self):
+        resp = self.client.get(reverse("validate-api"),{"export":1,"status":201,"fields":"file"})
+        self.assertEqual(resp.status_code,200)
+        rows = loads(b"".join(resp.streaming_content).decode("utf-8"))
+        self.assertEqual(rows,[{"file":"/media/apifiles/listing/{0}.spdx".format(number)} for number in (2,1,0)])
+
+    @override_settings(API_EXPORT_BATCH_SIZE=2)
+    def test_export_order(self):
+        """ The export lists the rows in the order of the pages, by created """
+        ValidateFileUpload.objects.filter(file="apifiles/listing/0.spdx").update(created=now() + timedelta(hours=1))
+        page = self.client.get(reverse("validate-api"),{"fields":"file"})
+        resp = self.client.get(reverse("validate-api"),{"export":1,"fields":"file"})
+        rows = loads(b"".join(resp.streaming_content).decode("utf-8"))
+        self.assertEqual(rows,[dict(row) for row in page.data["results"]])
+        self.assertEqual(rows[0],{"file":"/media/apifiles/listing/0.spdx"})
+
+    def test_queries(self):
+        """ A page and an export batch are read in one query, owners included """
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse("validate-api"))
+        self.assertEqual(len(resp.data["results"]),5)
+        self.assertEqual(len(queries),1,[query["sql"] for query in queries])
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse("validate-api"),{"export":1})
+            rows = loads(b"".join(resp.streaming_content).decode("utf-8"))
+        self.assertEqual(len(rows),5)
+        self.assertEqual(len(queries),1,[query["sql"] for query in queries])
+        self.assertEqual(rows[0]["owner"],self.bob.id)
+
+    def test_viewset(self):
+        resp = self.client.get("/api2/validate/",{"page_size":2,"owner":"listingbob","fields":"result"})
+        self.assertEqual(resp.status_code,200)
+        self.assertEqual(resp.data["results"],[{"result":"Result 4"},{"result":"Result 2"}])
+        self.assertIsNotNone(resp.data["next"])
+
 class SubmitLicenseModelsTests(APITestCase):
 
     def setUp(self):
@@ -22,5 +22,8 @@ urlpatterns = [
     url(r'^convert/$', views.convert, name='convert-api'),
     url(r'^compare/$', views.compare, name='compare-api'),
     url(r'^check_license/$', views.check_license, name='check_license-api'),
+    url(r'^check_license/batch/$', views.check_license_batch, name='check_license_batch-api'),
     url(r'^submit_license/$', views.submit_license, name='submit_license-api'),
+    url(r'^jobs/(?P<job_id>[\w-]+)/$', views.job, name='job-api'),
+    url(r'^jobs/(?P<job_id>[\w-]+)/download/$', views.job_download, name='job-download-api'),
 ]
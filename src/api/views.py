@@ -13,16 +13,19 @@
 
 from __future__ import unicode_literals
 
-from rest_framework.parsers import FileUploadParser,FormParser, MultiPartParser
+from rest_framework.parsers import FileUploadParser,FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from api.models import ValidateFileUpload,ConvertFileUpload,CompareFileUpload,CheckLicenseFileUpload,SubmitLicenseModel
 from api.serializers import ValidateSerializer,ConvertSerializer,CompareSerializer,CheckLicenseSerializer,SubmitLicenseSerializer,ValidateSerializerReturn,ConvertSerializerReturn,CompareSerializerReturn,CheckLicenseSerializerReturn,SubmitLicenseSerializerReturn
+from api.models import JOB_FINISHED
 from api.oauth import generate_github_access_token,convert_to_auth_token,get_user_from_token
+from api import jobs, listing, resultcache
 from app.models import LicenseRequest
+from app import githubclient, licensebatch, toolpool
 from rest_framework import status
-from rest_framework.decorators import api_view,renderer_classes,permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import api_view,renderer_classes,parser_classes,permission_classes
+from rest_framework.permissions import AllowAny,IsAuthenticated
 from rest_framework.renderers import BrowsableAPIRenderer,JSONRenderer
 
 from django.core.files.storage import FileSystemStorage
@@ -30,16 +33,16 @@ from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.http import FileResponse, Http404
 
-import jpype
 import re
 import datetime
 import xml.etree.cElementTree as ET
 
 from traceback import format_exc
-from os.path import abspath, join
+from os.path import abspath, basename, isfile, join, splitext
+from shutil import copyfile
 from time import time
-from requests import post
 from json import dumps, loads
 
 NORMAL = "normal"
@@ -51,19 +54,19 @@ TESTS: settings.DEV_REPO_URL,
 }
 
 
-class ValidateViewSet(ModelViewSet):
+class ValidateViewSet(listing.ListingViewSetMixin, ModelViewSet):
     """ Returns all validate api request """
     queryset = ValidateFileUpload.objects.all()
     serializer_class = ValidateSerializerReturn
     parser_classes = (MultiPartParser, FormParser,)
 
-class ConvertViewSet(ModelViewSet):
+class ConvertViewSet(listing.ListingViewSetMixin, ModelViewSet):
     """ Returns all convert api request """
     queryset = ConvertFileUpload.objects.all()
     serializer_class = ConvertSerializerReturn
     parser_classes = (MultiPartParser, FormParser,)
 
-class CompareViewSet(ModelViewSet):
+class CompareViewSet(listing.ListingViewSetMixin, ModelViewSet):
     """ Returns all compare api request """
     queryset = CompareFileUpload.objects.all()
     serializer_class = CompareSerializerReturn
@@ -74,63 +77,22 @@ class CompareViewSet(ModelViewSet):
 def validate(request):
     """ Handle Validate api request """
     if request.method == 'GET':
-        """ Return all validate api request """
-        query = ValidateFileUpload.objects.all()
-        serializer = ValidateSerializer(query, many=True)
-        return Response(serializer.data)
+        """ Return a page of the validate api requests, all of them with export=1 """
+        return listing.listResponse(request, ValidateFileUpload.objects.all(), ValidateSerializer)
 
     elif request.method == 'POST':
         """ Return validate tool result on the post file"""
         serializer = ValidateSerializer(data=request.data)
         if serializer.is_valid():
-            if (jpype.isJVMStarted()==0):
-                """ If JVM not already started, start it, attach a Thread and start processing the request """
-                classpath =settings.JAR_ABSOLUTE_PATH
-                jpype.startJVM(jpype.getDefaultJVMPath(),"-ea","-Djava.class.path=%s"%classpath)
-            """Attach a Thread and start processing the request """
-            jpype.attachThreadToJVM()
-            package = jpype.JPackage("org.spdx.tools")
-            verifyclass = package.Verify
             query = ValidateFileUpload.objects.create(
                 owner=request.user,
                 file=request.data.get('file')
             )
-            uploaded_file = str(query.file)
-            uploaded_file_path = str(query.file.path)
-            try :
-                if request.FILES["file"]:
-                    """ Call the java function with parameter"""
-                    retval = verifyclass.verify(uploaded_file_path)
-                    if (len(retval) > 0):
-                        result = "The following error(s)/warning(s) were raised: " + str(retval)
-                        returnstatus = status.HTTP_400_BAD_REQUEST
-                        httpstatus = 400
-                        jpype.detachThreadFromJVM()
-                    else :
-                        result = "This SPDX Document is valid."
-                        returnstatus = status.HTTP_201_CREATED
-                        httpstatus = 201
-                        jpype.detachThreadFromJVM()
-                else :
-                    result = "File Not Uploaded"
-                    returnstatus = status.HTTP_400_BAD_REQUEST
-                    httpstatus = 400
-                    jpype.detachThreadFromJVM()
-            except jpype.JavaException as ex :
-                """ Error raised by verifyclass.verify without exiting the application"""
-                result = jpype.JavaException.message(ex) #+ "This SPDX Document is not a valid RDF/XML or tag/value format"
-                returnstatus = status.HTTP_400_BAD_REQUEST
-                httpstatus = 400
-                jpype.detachThreadFromJVM()
-            except :
-                """ Other errors raised"""
-                result = format_exc()
-                returnstatus = status.HTTP_400_BAD_REQUEST
-                httpstatus = 400
-                jpype.detachThreadFromJVM()
-            query.result=result
-            query.status=httpstatus
-            ValidateFileUpload.objects.filter(file=uploaded_file).update(result=result,status=httpstatus)
+            if jobs.isAsync(request):
+                """ Run the tool in the background, the result is polled from the jobs api"""
+                jobs.submit(query, validateFile)
+                return jobs.accepted(query)
+            returnstatus = validateFile(query)
             serial = ValidateSerializerReturn(instance=query)
             return Response(
                 serial.data, status=returnstatus
@@ -140,6 +102,66 @@ def validate(request):
                 serializer.errors, status=status.HTTP_400_BAD_REQUEST
                 )
 
+def validateFile(query):
+    """ Run the validate tool on the file of a ValidateFileUpload
+    and store the result on it
+    """
+    """ Get the tool classes, the calls run in the tool workers """
+    tools = toolpool.getTools()
+    verifyclass = tools.Verify
+    uploaded_file = str(query.file)
+    uploaded_file_path = str(query.file.path)
+    cachekey = None
+    cached = None
+    if query.file and resultcache.enabled():
+        """ Documents submitted again are answered from the result cache """
+        cachekey = resultcache.makeKey("validate", [uploaded_file_path])
+        cached = resultcache.get(cachekey)
+    if cached is not None:
+        result = cached.meta["result"]
+        returnstatus = httpstatus = cached.meta["status"]
+    else:
+        try :
+            if query.file:
+                """ Call the java function with parameter"""
+                retval = verifyclass.verify(uploaded_file_path)
+                if (len(retval) > 0):
+                    result = "The following error(s)/warning(s) were raised: " + str(retval)
+                    returnstatus = status.HTTP_400_BAD_REQUEST
+                    httpstatus = 400
+                else :
+                    result = "This SPDX Document is valid."
+                    returnstatus = status.HTTP_201_CREATED
+                    httpstatus = 201
+            else :
+                result = "File Not Uploaded"
+                returnstatus = status.HTTP_400_BAD_REQUEST
+                httpstatus = 400
+        except (toolpool.ToolTimeout, toolpool.ToolFailure) as ex :
+            """ Says nothing about the document, must not be cached"""
+            cachekey = None
+            result = ex.message
+            returnstatus = status.HTTP_400_BAD_REQUEST
+            httpstatus = 400
+        except toolpool.ToolError as ex :
+            """ Error raised by verifyclass.verify without exiting the application"""
+            result = ex.message #+ "This SPDX Document is not a valid RDF/XML or tag/value format"
+            returnstatus = status.HTTP_400_BAD_REQUEST
+            httpstatus = 400
+        except :
+            """ Other errors raised"""
+            cachekey = None
+            result = format_exc()
+            returnstatus = status.HTTP_400_BAD_REQUEST
+            httpstatus = 400
+        if cachekey is not None:
+            resultcache.put(cachekey, {"result": result, "status": httpstatus})
+    query.result=result
+    query.status=httpstatus
+    query.state=JOB_FINISHED
+    ValidateFileUpload.objects.filter(file=uploaded_file).update(result=result,status=httpstatus,state=JOB_FINISHED)
+    return returnstatus
+
 def extensionGiven(filename):
     if (filename.find(".")!=-1):
         return True
@@ -163,24 +185,12 @@ def getFileFormat(to_format):
 def convert(request):
     """ Handle Convert api request """
     if request.method == 'GET':
-        """ Return all convert api request """
-        query = ConvertFileUpload.objects.all()
-        serializer = ConvertSerializer(query, many=True)
-        return Response(serializer.data)
+        """ Return a page of the convert api requests, all of them with export=1 """
+        return listing.listResponse(request, ConvertFileUpload.objects.all(), ConvertSerializer)
     elif request.method == 'POST':
         """ Return convert tool result on the post file"""
         serializer = ConvertSerializer(data=request.data)
         if serializer.is_valid():
-            if (jpype.isJVMStarted()==0):
-                """ If JVM not already started, start it, attach a Thread and start processing the request """
-                classpath =settings.JAR_ABSOLUTE_PATH
-                jpype.startJVM(jpype.getDefaultJVMPath(),"-ea","-Djava.class.path=%s"%classpath)
-            """ Attach a Thread and start processing the request """
-            jpype.attachThreadToJVM()
-            package = jpype.JPackage("org.spdx.tools")
-            result = ""
-            tagToRdfFormat = None
-            message = "Success"
             query = ConvertFileUpload.objects.create(
                 owner=request.user,
                 file=request.data.get('file'),
@@ -188,126 +198,12 @@ def convert(request):
                 to_format=request.POST["to_format"],
                 cfilename=request.POST["cfilename"],
             )
-            uploaded_file = str(query.file)
-            uploaded_file_path = str(query.file.path)
-            try :
-                if request.FILES["file"]:
-                    folder = "/".join(uploaded_file_path.split('/')[:-1])
-                    option1 = request.POST["from_format"]
-                    option2 = request.POST["to_format"]
-                    convertfile =  request.POST["cfilename"]
-                    warningoccurred = False
-                    if (extensionGiven(convertfile)==False):
-                        extension = getFileFormat(option2)
-                        convertfile = convertfile + extension
-                    """ Call the java function with parameters as list"""
-                    if (option1=="Tag"):
-                        print ("Verifing for Tag/Value Document")
-                        if (option2=="RDF"):
-                            try:
-                                tagToRdfFormat = request.POST["tagToRdfFormat"]
-                            except:
-                                tagToRdfFormat = 'RDF/XML-ABBREV'
-                            option3 = tagToRdfFormat
-                            if option3 not in ['RDF/XML-ABBREV','RDF/XML','N-TRIPLET','TURTLE']:
-                                message, returnstatus, httpstatus = convertError('400')
-                            tagtordfclass = package.TagToRDF
-                            retval = tagtordfclass.onlineFunction([
-                                uploaded_file_path,
-                                folder+"/"+convertfile,
-                                option3
-                            ])
-                            if (len(retval) > 0):
-                                warningoccurred = True
-                        elif (option2=="Spreadsheet"):
-                            tagtosprdclass = package.TagToSpreadsheet
-                            retval = tagtosprdclass.onlineFunction([
-                                uploaded_file_path,
-                                folder+"/"+convertfile
-                                ])
-                            if (len(retval) > 0):
-                                warningoccurred = True
-                        else :
-                            message, returnstatus, httpstatus = convertError('400')
-                    elif (option1=="RDF"):
-                        print ("Verifing for RDF Document")
-                        if (option2=="Tag"):
-                            rdftotagclass = package.RdfToTag
-                            retval = rdftotagclass.onlineFunction([
-                                uploaded_file_path,
-                                folder+"/"+convertfile
-                                ])
-                            if (len(retval) > 0):
-                                warningoccurred = True
-                        elif (option2=="Spreadsheet"):
-                            rdftosprdclass = package.RdfToSpreadsheet
-                            retval = rdftosprdclass.onlineFunction([
-                                uploaded_file_path,
-                                folder+"/"+convertfile
-                                ])
-                            if (len(retval) > 0):
-                                warningoccurred = True
-                        elif (option2=="HTML"):
-                            rdftohtmlclass = package.RdfToHtml
-                            retval = rdftohtmlclass.onlineFunction([
-                                uploaded_file_path,
-                                folder+"/"+convertfile
-                                ])
-                            if (len(retval) > 0):
-                                warningoccurred = True
-                        else :
-                            message, returnstatus, httpstatus = convertError('400')
-                    elif (option1=="Spreadsheet"):
-                        print ("Verifing for Spreadsheet Document")
-                        if (option2=="Tag"):
-                            sprdtotagclass = package.SpreadsheetToTag
-                            retval = sprdtotagclass.onlineFunction([
-                                uploaded_file_path,
-                                folder+"/"+convertfile
-                                ])
-                            if (len(retval) > 0):
-                                warningoccurred = True
-                        elif (option2=="RDF"):
-                            sprdtordfclass = package.SpreadsheetToRDF
-                            retval = sprdtordfclass.onlineFunction([
-                                uploaded_file_path,
-                                folder+"/"+convertfile
-                                ])
-                            if (len(retval) > 0):
-                                warningoccurred = True
-                        else :
-                            message, returnstatus, httpstatus = convertError('400')
-                    if (warningoccurred == True ):
-                        message = "The following error(s)/warning(s) were raised: " + str(retval)
-                        index = folder.split("/").index('media')
-                        result = "/"+"/".join(folder.split("/")[index:])+'/'+convertfile
-                        returnstatus = status.HTTP_406_NOT_ACCEPTABLE
-                        httpstatus = 406
-                        jpype.detachThreadFromJVM()
-                    else :
-                        """return only the path starting with MEDIA_URL"""
-                        index = folder.split("/").index('media')
-                        result = "/"+("/".join(folder.split("/")[index:]))+'/'+convertfile
-                        returnstatus = status.HTTP_201_CREATED
-                        httpstatus = 201
-                        jpype.detachThreadFromJVM()
-                else :
-                    message, returnstatus, httpstatus = convertError('404')
-            except jpype.JavaException as ex :
-                message = jpype.JavaException.message(ex)
-                returnstatus = status.HTTP_400_BAD_REQUEST
-                httpstatus = 400
-                jpype.detachThreadFromJVM() 
-            except :
-                message = format_exc()
-                returnstatus = status.HTTP_400_BAD_REQUEST
-                httpstatus = 400
-                jpype.detachThreadFromJVM() 
-            query.tagToRdfFormat=tagToRdfFormat
-            query.message=message
-            query.status = httpstatus
-            query.result = result
-            ConvertFileUpload.objects.filter(file=uploaded_file).update(tagToRdfFormat=tagToRdfFormat,message=message, status=httpstatus, result=result)
+            tagToRdfFormat = request.POST.get("tagToRdfFormat")
+            if jobs.isAsync(request):
+                """ Run the tool in the background, the result is polled from the jobs api"""
+                jobs.submit(query, convertFile, tagToRdfFormat)
+                return jobs.accepted(query)
+            returnstatus = convertFile(query, tagToRdfFormat)
             serial = ConvertSerializerReturn(instance=query)
             return Response(
                 serial.data,status=returnstatus
@@ -317,6 +213,170 @@ def convert(request):
                 serializer.errors,status=status.HTTP_400_BAD_REQUEST
                 )
 
+def convertFile(query, tagToRdfFormat=None):
+    """ Run the convert tool on the file of a ConvertFileUpload
+    and store the result on it. tagToRdfFormat is only used for
+    Tag to RDF conversions.
+    Documents converted before are answered from the result cache.
+    """
+    if not (query.file and resultcache.enabled()):
+        return runConvert(query, tagToRdfFormat)
+    uploaded_file = str(query.file)
+    uploaded_file_path = str(query.file.path)
+    folder = "/".join(uploaded_file_path.split('/')[:-1])
+    convertfile = query.cfilename
+    if (extensionGiven(convertfile)==False):
+        convertfile = convertfile + getFileFormat(query.to_format)
+    cachekey = resultcache.makeKey("convert", [uploaded_file_path],
+        from_format=query.from_format,
+        to_format=query.to_format,
+        tagToRdfFormat=tagToRdfFormat,
+        extension=splitext(convertfile)[1],
+        )
+    cached = resultcache.get(cachekey)
+    if cached is not None and cached.outputPath is not None:
+        copyfile(cached.outputPath, folder+"/"+convertfile)
+        """return only the path starting with MEDIA_URL"""
+        index = folder.split("/").index('media')
+        query.result = "/"+("/".join(folder.split("/")[index:]))+'/'+convertfile
+        query.tagToRdfFormat = cached.meta["tagToRdfFormat"]
+        query.message = cached.meta["message"]
+        query.status = cached.meta["status"]
+        query.state = JOB_FINISHED
+        ConvertFileUpload.objects.filter(file=uploaded_file).update(tagToRdfFormat=query.tagToRdfFormat,message=query.message, status=query.status, result=query.result, state=JOB_FINISHED)
+        return query.status
+    returnstatus = runConvert(query, tagToRdfFormat)
+    if query.status in (201, 406) and isfile(folder+"/"+convertfile):
+        resultcache.put(cachekey, {
+            "tagToRdfFormat": query.tagToRdfFormat,
+            "message": query.message,
+            "status": query.status,
+            }, folder+"/"+convertfile)
+    return returnstatus
+
+def runConvert(query, tagToRdfFormat=None):
+    """ Convert without looking at the result cache """
+    """ Get the tool classes, the calls run in the tool workers """
+    tools = toolpool.getTools()
+    result = ""
+    message = "Success"
+    uploaded_file = str(query.file)
+    uploaded_file_path = str(query.file.path)
+    try :
+        if query.file:
+            folder = "/".join(uploaded_file_path.split('/')[:-1])
+            option1 = query.from_format
+            option2 = query.to_format
+            convertfile = query.cfilename
+            warningoccurred = False
+            if (extensionGiven(convertfile)==False):
+                extension = getFileFormat(option2)
+                convertfile = convertfile + extension
+            """ Call the java function with parameters as list"""
+            if (option1=="Tag"):
+                print ("Verifing for Tag/Value Document")
+                if (option2=="RDF"):
+                    if tagToRdfFormat is None:
+                        tagToRdfFormat = 'RDF/XML-ABBREV'
+                    option3 = tagToRdfFormat
+                    if option3 not in ['RDF/XML-ABBREV','RDF/XML','N-TRIPLET','TURTLE']:
+                        message, returnstatus, httpstatus = convertError('400')
+                    tagtordfclass = tools.TagToRDF
+                    retval = tagtordfclass.onlineFunction([
+                        uploaded_file_path,
+                        folder+"/"+convertfile,
+                        option3
+                    ])
+                    if (len(retval) > 0):
+                        warningoccurred = True
+                elif (option2=="Spreadsheet"):
+                    tagtosprdclass = tools.TagToSpreadsheet
+                    retval = tagtosprdclass.onlineFunction([
+                        uploaded_file_path,
+                        folder+"/"+convertfile
+                        ])
+                    if (len(retval) > 0):
+                        warningoccurred = True
+                else :
+                    message, returnstatus, httpstatus = convertError('400')
+            elif (option1=="RDF"):
+                print ("Verifing for RDF Document")
+                if (option2=="Tag"):
+                    rdftotagclass = tools.RdfToTag
+                    retval = rdftotagclass.onlineFunction([
+                        uploaded_file_path,
+                        folder+"/"+convertfile
+                        ])
+                    if (len(retval) > 0):
+                        warningoccurred = True
+                elif (option2=="Spreadsheet"):
+                    rdftosprdclass = tools.RdfToSpreadsheet
+                    retval = rdftosprdclass.onlineFunction([
+                        uploaded_file_path,
+                        folder+"/"+convertfile
+                        ])
+                    if (len(retval) > 0):
+                        warningoccurred = True
+                elif (option2=="HTML"):
+                    rdftohtmlclass = tools.RdfToHtml
+                    retval = rdftohtmlclass.onlineFunction([
+                        uploaded_file_path,
+                        folder+"/"+convertfile
+                        ])
+                    if (len(retval) > 0):
+                        warningoccurred = True
+                else :
+                    message, returnstatus, httpstatus = convertError('400')
+            elif (option1=="Spreadsheet"):
+                print ("Verifing for Spreadsheet Document")
+                if (option2=="Tag"):
+                    sprdtotagclass = tools.SpreadsheetToTag
+                    retval = sprdtotagclass.onlineFunction([
+                        uploaded_file_path,
+                        folder+"/"+convertfile
+                        ])
+                    if (len(retval) > 0):
+                        warningoccurred = True
+                elif (option2=="RDF"):
+                    sprdtordfclass = tools.SpreadsheetToRDF
+                    retval = sprdtordfclass.onlineFunction([
+                        uploaded_file_path,
+                        folder+"/"+convertfile
+                        ])
+                    if (len(retval) > 0):
+                        warningoccurred = True
+                else :
+                    message, returnstatus, httpstatus = convertError('400')
+            if (warningoccurred == True ):
+                message = "The following error(s)/warning(s) were raised: " + str(retval)
+                index = folder.split("/").index('media')
+                result = "/"+"/".join(folder.split("/")[index:])+'/'+convertfile
+                returnstatus = status.HTTP_406_NOT_ACCEPTABLE
+                httpstatus = 406
+            else :
+                """return only the path starting with MEDIA_URL"""
+                index = folder.split("/").index('media')
+                result = "/"+("/".join(folder.split("/")[index:]))+'/'+convertfile
+                returnstatus = status.HTTP_201_CREATED
+                httpstatus = 201
+        else :
+            message, returnstatus, httpstatus = convertError('404')
+    except toolpool.ToolError as ex :
+        message = ex.message
+        returnstatus = status.HTTP_400_BAD_REQUEST
+        httpstatus = 400
+    except :
+        message = format_exc()
+        returnstatus = status.HTTP_400_BAD_REQUEST
+        httpstatus = 400
+    query.tagToRdfFormat=tagToRdfFormat
+    query.message=message
+    query.status = httpstatus
+    query.result = result
+    query.state = JOB_FINISHED
+    ConvertFileUpload.objects.filter(file=uploaded_file).update(tagToRdfFormat=tagToRdfFormat,message=message, status=httpstatus, result=result, state=JOB_FINISHED)
+    return returnstatus
+
 
 def convertError(status):
     print("Error while converting file")
@@ -328,7 +388,6 @@ def convertError(status):
         message = "File Not Found"
         returnstatus = status.HTTP_400_BAD_REQUEST
         httpstatus = 400
-    jpype.detachThreadFromJVM()
     return (message, returnstatus, httpstatus)
 
 
@@ -337,27 +396,13 @@ def convertError(status):
 def compare(request):
     """ Handle Compare api request """
     if request.method == 'GET':
-        """ Return all compare api request """
-        query = CompareFileUpload.objects.all()
-        serializer = CompareSerializerReturn(query, many=True)
-        return Response(serializer.data)
+        """ Return a page of the compare api requests, all of them with export=1 """
+        return listing.listResponse(request, CompareFileUpload.objects.all(), CompareSerializerReturn)
 
     elif request.method == 'POST':
         """ Return compare tool result on the post file"""
         serializer = CompareSerializer(data=request.data)
         if serializer.is_valid():
-            if (jpype.isJVMStarted()==0):
-                """ If JVM not already started, start it, attach a Thread and start processing the request """
-                classpath =settings.JAR_ABSOLUTE_PATH
-                jpype.startJVM(jpype.getDefaultJVMPath(),"-ea","-Djava.class.path=%s"%classpath)
-            """ Attach a Thread and start processing the request """
-            jpype.attachThreadToJVM()
-            package = jpype.JPackage("org.spdx.tools")
-            verifyclass = package.Verify
-            compareclass = package.CompareMultpleSpdxDocs
-            result=""
-            message="Success"
-            erroroccurred = False
             rfilename = request.POST["rfilename"]
             query = CompareFileUpload.objects.create(
                 owner=request.user,
@@ -365,69 +410,11 @@ def compare(request):
                 file2=request.data.get('file2'),
                 rfilename = rfilename,
             )
-            uploaded_file1 = str(query.file1)
-            uploaded_file2 = str(query.file2)
-            uploaded_file1_path = str(query.file1.path)
-            uploaded_file2_path = str(query.file2.path)
-            try :
-                if (request.FILES["file1"] and request.FILES["file2"]):
-                    """ Saving file to the media directory """
-                    if (extensionGiven(rfilename)==False):
-                        rfilename = rfilename+".xlsx"
-                    file1 = request.FILES["file1"]
-                    file2 = request.FILES["file2"]
-                    folder = "/".join(uploaded_file1_path.split('/')[:-1])
-                    callfunc = [folder+"/"+rfilename]
-                    callfunc.append(uploaded_file1_path)
-                    callfunc.append(uploaded_file2_path)
-                    """ Call the java function with parameters as list"""
-                    retval1 = verifyclass.verifyRDFFile(uploaded_file1_path)
-                    if (len(retval1) > 0):
-                        erroroccurred = True
-                        message = "The following error(s)/warning(s) were raised by " + str(uploaded_file1) + ": " +str(retval1)
-                    retval2 = verifyclass.verifyRDFFile(uploaded_file2_path)
-                    if (len(retval2) > 0):
-                        erroroccurred = True
-                        message += "The following error(s)/warning(s) were raised by " + str(uploaded_file2) + ": " +str(retval2)
-                    try :
-                        compareclass.onlineFunction(callfunc)
-                        """Return only the path starting with MEDIA_URL"""
-                        index = folder.split("/").index('media')
-                        result = "/"+("/".join(folder.split("/")[index:]))+'/'+rfilename
-                        returnstatus = status.HTTP_201_CREATED
-                        httpstatus = 201
-                    except :
-                        message += "While running compare tool " + format_exc()
-                        returnstatus = status.HTTP_400_BAD_REQUEST
-                        httpstatus = 400
-                    if (erroroccurred == False):
-                        returnstatus = status.HTTP_201_CREATED
-                        httpstatus = 201
-                    else :
-                        returnstatus = status.HTTP_406_BAD_REQUEST
-                        httpstatus = 406
-                    jpype.detachThreadFromJVM()
-                else :
-                    message = "File Not Uploaded"
-                    returnstatus = status.HTTP_400_BAD_REQUEST
-                    httpstatus = 400
-                    jpype.detachThreadFromJVM()
-            except jpype.JavaException as ex :
-                """ Error raised by verifyclass.verify without exiting the application"""
-                message = jpype.JavaException.message(ex) #+ "This SPDX Document is not a valid RDF/XML or tag/value format"
-                returnstatus = status.HTTP_400_BAD_REQUEST
-                httpstatus = 400
-                jpype.detachThreadFromJVM()
-            except :
-                message = format_exc()
-                returnstatus = status.HTTP_400_BAD_REQUEST
-                httpstatus = 400
-                jpype.detachThreadFromJVM()
-
-            query.message=message
-            query.result=result
-            query.status=httpstatus
-            CompareFileUpload.objects.filter(file1=uploaded_file1).filter(file2=uploaded_file2).update(message=message, result=result, status=httpstatus)
+            if jobs.isAsync(request):
+                """ Run the tool in the background, the result is polled from the jobs api"""
+                jobs.submit(query, compareFiles)
+                return jobs.accepted(query)
+            returnstatus = compareFiles(query)
             serial = CompareSerializerReturn(instance=query)
             return Response(
                 serial.data,status=returnstatus
@@ -437,28 +424,134 @@ def compare(request):
                 serializer.errors,status=status.HTTP_400_BAD_REQUEST
                 )
 
+def compareFiles(query):
+    """ Run the compare tool on the two files of a CompareFileUpload
+    and store the result on it.
+    Pairs of documents compared before are answered from the result cache.
+    """
+    if not (query.file1 and query.file2 and resultcache.enabled()):
+        return runCompare(query)
+    uploaded_file1 = str(query.file1)
+    uploaded_file2 = str(query.file2)
+    uploaded_file1_path = str(query.file1.path)
+    uploaded_file2_path = str(query.file2.path)
+    folder = "/".join(uploaded_file1_path.split('/')[:-1])
+    rfilename = query.rfilename
+    if (extensionGiven(rfilename)==False):
+        rfilename = rfilename+".xlsx"
+    cachekey = resultcache.makeKey("compare", [uploaded_file1_path, uploaded_file2_path],
+        extension=splitext(rfilename)[1],
+        )
+    cached = resultcache.get(cachekey)
+    if cached is not None and cached.outputPath is not None:
+        copyfile(cached.outputPath, folder+"/"+rfilename)
+        """Return only the path starting with MEDIA_URL"""
+        index = folder.split("/").index('media')
+        query.result = "/"+("/".join(folder.split("/")[index:]))+'/'+rfilename
+        """ The warnings name the uploaded files, use the names of this upload """
+        query.message = cached.meta["message"].replace(cached.meta["file1"], uploaded_file1).replace(cached.meta["file2"], uploaded_file2)
+        query.status = cached.meta["status"]
+        query.state = JOB_FINISHED
+        CompareFileUpload.objects.filter(file1=uploaded_file1).filter(file2=uploaded_file2).update(message=query.message, result=query.result, status=query.status, state=JOB_FINISHED)
+        return query.status
+    returnstatus = runCompare(query)
+    if query.status in (201, 406) and isfile(folder+"/"+rfilename):
+        resultcache.put(cachekey, {
+            "message": query.message,
+            "status": query.status,
+            "file1": uploaded_file1,
+            "file2": uploaded_file2,
+            }, folder+"/"+rfilename)
+    return returnstatus
+
+def runCompare(query):
+    """ Compare without looking at the result cache """
+    """ Get the tool classes, the calls run in the tool workers """
+    tools = toolpool.getTools()
+    verifyclass = tools.Verify
+    compareclass = tools.CompareMultpleSpdxDocs
+    result=""
+    message="Success"
+    erroroccurred = False
+    rfilename = query.rfilename
+    uploaded_file1 = str(query.file1)
+    uploaded_file2 = str(query.file2)
+    uploaded_file1_path = str(query.file1.path)
+    uploaded_file2_path = str(query.file2.path)
+    try :
+        if (query.file1 and query.file2):
+            """ Saving file to the media directory """
+            if (extensionGiven(rfilename)==False):
+                rfilename = rfilename+".xlsx"
+            folder = "/".join(uploaded_file1_path.split('/')[:-1])
+            callfunc = [folder+"/"+rfilename]
+            callfunc.append(uploaded_file1_path)
+            callfunc.append(uploaded_file2_path)
+            """ Call the java function with parameters as list"""
+            retval1 = verifyclass.verifyRDFFile(uploaded_file1_path)
+            if (len(retval1) > 0):
+                erroroccurred = True
+                message = "The following error(s)/warning(s) were raised by " + str(uploaded_file1) + ": " +str(retval1)
+            retval2 = verifyclass.verifyRDFFile(uploaded_file2_path)
+            if (len(retval2) > 0):
+                erroroccurred = True
+                message += "The following error(s)/warning(s) were raised by " + str(uploaded_file2) + ": " +str(retval2)
+            try :
+                compareclass.onlineFunction(callfunc)
+                """Return only the path starting with MEDIA_URL"""
+                index = folder.split("/").index('media')
+                result = "/"+("/".join(folder.split("/")[index:]))+'/'+rfilename
+                returnstatus = status.HTTP_201_CREATED
+                httpstatus = 201
+            except (toolpool.ToolTimeout, toolpool.ToolFailure):
+                """ Not a result of the compare tool, the comparison is not cached"""
+                raise
+            except :
+                message += "While running compare tool " + format_exc()
+                returnstatus = status.HTTP_400_BAD_REQUEST
+                httpstatus = 400
+            if (erroroccurred == False):
+                returnstatus = status.HTTP_201_CREATED
+                httpstatus = 201
+            else :
+                returnstatus = status.HTTP_406_BAD_REQUEST
+                httpstatus = 406
+        else :
+            message = "File Not Uploaded"
+            returnstatus = status.HTTP_400_BAD_REQUEST
+            httpstatus = 400
+    except toolpool.ToolError as ex :
+        """ Error raised by verifyclass.verify without exiting the application"""
+        message = ex.message #+ "This SPDX Document is not a valid RDF/XML or tag/value format"
+        returnstatus = status.HTTP_400_BAD_REQUEST
+        httpstatus = 400
+    except :
+        message = format_exc()
+        returnstatus = status.HTTP_400_BAD_REQUEST
+        httpstatus = 400
+
+    query.message=message
+    query.result=result
+    query.status=httpstatus
+    query.state=JOB_FINISHED
+    CompareFileUpload.objects.filter(file1=uploaded_file1).filter(file2=uploaded_file2).update(message=message, result=result, status=httpstatus, state=JOB_FINISHED)
+    return returnstatus
+
 @api_view(['GET', 'POST'])
 @renderer_classes((JSONRenderer,))
 def check_license(request):
     """ Handle Check License api request """
     if request.method == 'GET':
-        """ Return all check license api request """
-        query = CheckLicenseFileUpload.objects.all()
-        serializer = CheckLicenseSerializer(query, many=True)
-        return Response(serializer.data)
+        """ Return a page of the check license api requests, all of them with export=1 """
+        return listing.listResponse(request, CheckLicenseFileUpload.objects.all(), CheckLicenseSerializer)
 
     elif request.method == 'POST':
         """ Return check license tool result on the post file"""
         serializer = CheckLicenseSerializer(data=request.data)
         if serializer.is_valid():
-            if (jpype.isJVMStarted()==0):
-                """ If JVM not already started, start it, attach a Thread and start processing the request """
-                classpath =settings.JAR_ABSOLUTE_PATH
-                jpype.startJVM(jpype.getDefaultJVMPath(),"-ea","-Djava.class.path=%s"%classpath)
-            """ Attach a Thread and start processing the request """
-            jpype.attachThreadToJVM()
-            package = jpype.JPackage("org.spdx.compare")
-            compareclass = package.LicenseCompareHelper
+            """ Get the tool classes, the calls run in the tool workers """
+            tools = toolpool.getTools()
+            compareclass = tools.LicenseCompareHelper
             query = CheckLicenseFileUpload.objects.create(
                 owner=request.user,
                 file=request.data.get('file')
@@ -480,32 +573,27 @@ def check_license(request):
                         result = matching_str
                         returnstatus = status.HTTP_201_CREATED
                         httpstatus = 201
-                        jpype.detachThreadFromJVM()
 
                     else:
                         result = "There are no matching SPDX listed licenses"
                         returnstatus = status.HTTP_400_BAD_REQUEST
                         httpstatus = 400
-                        jpype.detachThreadFromJVM()
 
                 else :
                     result = "File Not Uploaded"
                     returnstatus = status.HTTP_400_BAD_REQUEST
                     httpstatus = 400
-                    jpype.detachThreadFromJVM()
             
-            except jpype.JavaException as ex :
+            except toolpool.ToolError as ex :
                 """ Java exception raised without exiting the application """
-                result = jpype.JavaException.message(ex) 
+                result = ex.message 
                 returnstatus = status.HTTP_400_BAD_REQUEST
                 httpstatus = 400
-                jpype.detachThreadFromJVM()
             except :
                 """ Other errors raised"""
                 result = format_exc()
                 returnstatus = status.HTTP_400_BAD_REQUEST
                 httpstatus = 400
-                jpype.detachThreadFromJVM()
             query.result = result
             query.status=httpstatus
             CheckLicenseFileUpload.objects.filter(file=uploaded_file).update(result=result,status=httpstatus)
@@ -519,16 +607,59 @@ def check_license(request):
                 )
 
 
+@api_view(['GET'])
+@renderer_classes((JSONRenderer,))
+def job(request, job_id):
+    """ Return the state of an async validate, convert or compare request,
+    and its result once finished
+    """
+    query = jobs.getJob(job_id, request.user)
+    return Response(jobs.describe(query))
+
+
+@api_view(['GET'])
+def job_download(request, job_id):
+    """ Stream the file produced by a finished convert or compare job """
+    query = jobs.getJob(job_id, request.user)
+    if query.state != JOB_FINISHED:
+        return Response(jobs.describe(query), status=status.HTTP_409_CONFLICT)
+    path = jobs.resultPath(query)
+    if path is None:
+        raise Http404("This job has no result file.")
+    response = FileResponse(open(path, "rb"), content_type="application/octet-stream")
+    response["Content-Disposition"] = 'attachment; filename="{0}"'.format(basename(path))
+    return response
+
+
+@api_view(['POST'])
+@renderer_classes((JSONRenderer,))
+@parser_classes((JSONParser, MultiPartParser, FormParser))
+@permission_classes((IsAuthenticated, ))
+def check_license_batch(request):
+    """ Identify many license texts in one request, posted as a JSON array
+    of texts (or of {"name", "text"} objects) or as a tar or zip archive in
+    the file field. Nothing is stored, the response lists for every text
+    the matching license ID(s), the match type and the similarity score.
+    """
+    try:
+        if "file" in request.FILES:
+            items = licensebatch.readArchive(request.FILES["file"])
+        else:
+            items = licensebatch.readJson(request.data)
+    except licensebatch.BatchError as ex:
+        return Response({"error": ex.message}, status=status.HTTP_400_BAD_REQUEST)
+    results = licensebatch.identifyAll(items)
+    return Response({"count": len(results), "results": results})
+
+
 @api_view(['GET', 'POST'])
 @renderer_classes((JSONRenderer,))
 @permission_classes((AllowAny, ))
 def submit_license(request):
     """ Handle submit license api request """
     if request.method == 'GET':
-        """ Return all check license api request """
-        query = SubmitLicenseModel.objects.all()
-        serializer = SubmitLicenseSerializer(query, many=True)
-        return Response(serializer.data)
+        """ Return a page of the check license api requests, all of them with export=1 """
+        return listing.listResponse(request, SubmitLicenseModel.objects.all(), SubmitLicenseSerializer)
 
     elif request.method == 'POST':
         """ Return the result of license submittal on the post license details """
@@ -654,9 +785,8 @@ def createIssue(licenseAuthorName, licenseName, licenseIdentifier, licenseCommen
     body += '**8.** OSI Status: ' + licenseOsi
     title = 'New license request: ' + licenseIdentifier + ' [SPDX-Online-Tools]'
     payload = {'title' : title, 'body': body, 'labels': ['new license/exception request']}
-    headers = {'Authorization': 'token ' + token}
     url = TYPE_TO_URL[urlType]
-    r = post(url, data=dumps(payload), headers=headers)
+    r = githubclient.post(url, token=token, data=dumps(payload))
     return r.status_code
 
 
@@ -6,6 +6,8 @@
 # SPDX-License-Identifier: MIT
 #
 
+from __future__ import print_function, unicode_literals
+
 #-----------------------------------------------------------------
 # configuration parameters, self-explanatory :-)
 # they are simply defaults; can be overwritten by command-line options
@@ -76,11 +78,15 @@ NAMESPACE='{http://www.spdx.org/license}'
 VERSION = '1.0'
 
 import argparse
+import copy
 import datetime
 import logging
+import multiprocessing
+import os
 import re
 import shutil
 import sys
+import time
 import xml.etree.ElementTree as et
 
 NL = '\n'
@@ -89,25 +95,118 @@ XML_PROLOG = """<?xml version="1.0" encoding="UTF-8"?>"""
 logging.basicConfig(filename="error.log", format="%(levelname)s : %(asctime)s : %(message)s")
 logger = logging.getLogger()
 
-def process(fname):
-    tree = et.parse(fname)
-    root = tree.getroot()
+def make_config(width=LINE_LENGTH, indent=INDENT, inline=None, block=None):
+    """ Formatting options of format_xml, the defaults of the command line """
+    return {
+        'inline': inline if inline is not None else TAGS_inline,
+        'block': block if block is not None else TAGS_block,
+        'max_width': width,
+        'lvl_indent': indent,
+    }
+
+
+def format_xml(xml, config=None):
+    """ Format an XML license, given as a string or as an ElementTree
+    element or tree, and return it as a string with the XML prolog.
+    The given tree is not modified. Raises et.ParseError if the string
+    is not well formed XML.
+    """
+    if config is None:
+        config = make_config()
+    if isinstance(xml, et.ElementTree):
+        root = copy.deepcopy(xml.getroot())
+    elif et.iselement(xml):
+        root = copy.deepcopy(xml)
+    else:
+        if not isinstance(xml, bytes):
+            xml = xml.encode('utf-8')
+        root = et.fromstring(xml)
     if root.tag == 'spdx':
         root.tag = 'SPDX'
         logger.error('changing root element to SPDX (capital letters)')
     #ts = '{:%Y%m%d%H%M%S%z}'.format(datetime.datetime.now())
     root.set('xmlns', NAMESPACE_URL)
-    blocks = pretty(root, 0)
-    ser = fmt(blocks)
-    
-    with open(fname, 'w') as f:
-        f.write(XML_PROLOG+"\n")
-        f.write(ser)
-    
+    blocks = pretty(root, 0, config)
+    return XML_PROLOG + "\n" + fmt(blocks, config)
+
 
+def process(fname, config, check=False):
+    """ Format the file in place, or with check only compare it with its
+    formatted version. Returns True if the file is (or would be) changed.
+    """
+    with open(fname, 'rb') as f:
+        original = f.read()
+    ser = format_xml(original, config).encode('utf-8')
+    if ser == original:
+        return False
+    if not check:
+        with open(fname, 'wb') as f:
+            f.write(ser)
+    return True
+
+
+def process_task(task):
+    """ process() for the worker pool: never raises, returns
+    (fname, changed, error, seconds)
+    """
+    fname, config, check = task
+    start = time.time()
+    try:
+        changed = process(fname, config, check)
+        error = None
+    except et.ParseError as e:
+        changed, error = False, 'XML Parse Error: ' + str(e)
+    except Exception as e:
+        changed, error = False, '{}: {}'.format(type(e).__name__, e)
+    return fname, changed, error, time.time() - start
+
+
+def xml_files(paths):
+    """ The files of paths, with the .xml files found under the directories """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith('.xml'):
+                    yield os.path.join(dirpath, name)
 
-def pretty(node, level):
-    ser = ''
+
+def process_all(fnames, config, check=False, jobs=None):
+    """ Run process() on all the files, over a pool of jobs processes
+    (one per CPU by default) when there is more than one file.
+    Yields the results of process_task in the order they complete.
+    """
+    tasks = [(fname, config, check) for fname in fnames]
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    if jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield process_task(task)
+        return
+    pool = multiprocessing.Pool(processes=min(jobs, len(tasks)))
+    try:
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        for result in pool.imap_unordered(process_task, tasks, chunksize):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def pretty(node, level, config):
+    """ The tree as block lines, each prefixed with "<level>#" """
+    out = []
+    emit(node, level, config, out)
+    return ''.join(out)
+
+
+def emit(node, level, config, out):
+    """ Append the serialization of node to the list out, joined once by
+    pretty() instead of concatenating the subtrees level by level
+    """
     tag = node.tag
     if tag.startswith(NAMESPACE):
         tag = tag[len(NAMESPACE):]
@@ -119,9 +218,9 @@ def pretty(node, level):
         for a in ATTRS_SEQ[tag]:
             if a in node.attrib:
                 start_tag += ' {}="{}"'.format(a, node.attrib[a])
-                del node.attrib[a]
-        if node.attrib:
-            logger.error('more attrs remaining in {}: {}'.format(tag, node.attrib.keys()))
+        remaining = [a for a in node.attrib if a not in ATTRS_SEQ[tag]]
+        if remaining:
+            logger.error('more attrs remaining in {}: {}'.format(tag, remaining))
     start_tag += ">"
     end_tag = "</" + tag + ">"
     if tag in config['block']:
@@ -137,25 +236,27 @@ def pretty(node, level):
         child_level = level
         before = start_tag
         after = end_tag
-    ser += before
+    out.append(before)
     if text:
         text = text.replace('&', '&amp;').replace('>', '&gt;').replace('<', '&lt;')
-        ser += text
+        out.append(text)
     for child in node:
-        ser += pretty(child, child_level)
-    ser += after
+        emit(child, child_level, config, out)
+    out.append(after)
     if tail:
-        ser += tail
-    ser = ser.replace('\n\n', '\n')
-    return ser
+        out.append(tail)
 
-def fmt(blocks):
-    bregexp = re.compile(r'((?P<level>\d+)#)?(?P<paragraph>.*)')
-    ser = ''
+
+# The blank lines between blocks are skipped by fmt, there is no need to
+# remove them from the output of pretty
+BLOCK_LINE = re.compile(r'((?P<level>\d+)#)?(?P<paragraph>.*)')
+
+def fmt(blocks, config):
+    out = []
     for line in blocks.split('\n'):
         if line == '':
             continue
-        m = bregexp.match(line)
+        m = BLOCK_LINE.match(line)
         if m.group('level'):
             l = int(m.group('level'))
         else:
@@ -163,35 +264,53 @@ def fmt(blocks):
         par = m.group('paragraph')
         if par == '':
             continue
-        indent = l * config['lvl_indent']
-        width = config['max_width'] - indent
+        indent = ' ' * (l * config['lvl_indent'])
+        width = config['max_width'] - len(indent)
         for fmtline in to_lines(par, width):
-            ser += indent * ' ' + fmtline + '\n'
-    return ser
+            out.append(indent)
+            out.append(fmtline)
+            out.append('\n')
+    return ''.join(out)
 
 
 def to_lines(text, width):
+    """ Split text in lines of at most width characters, minimizing the sum
+    of the squares of the space left at the end of the lines. A word longer
+    than width puts the whole text on one line.
+    Only the words that fit on a line with the last one are candidates for
+    the start of that line, a window that moves forward with the last word,
+    so the cost is linear in the number of words.
+    """
     words = text.split()
     count = len(words)
-    last_offset = 0
-    offsets = [last_offset]
+    if count == 0:
+        return []
+    # offsets[i] is the length of the first i words, each with a space
+    offsets = [0]
     for w in words:
-        last_offset += len(w)
-        offsets.append(last_offset)
-
-    cost = [0] + [10 ** 20] * count
-    breaks = [0] + [0]      * count
-    for i in range(count):
-        j = i + 1
-        while j <= count:
-            w = offsets[j] - offsets[i] + j - i - 1
-            if w > width:
-                break
-            penalty = cost[i] + (width - w) ** 2
-            if penalty < cost[j]:
-                cost[j] = penalty
-                breaks[j] = i
-            j += 1
+        offsets.append(offsets[-1] + len(w) + 1)
+    # a single line is cheaper than any split when it fits
+    if offsets[count] - 1 <= width:
+        return [' '.join(words)]
+
+    cost = [0] * (count + 1)
+    breaks = [0] * (count + 1)
+    first = 0
+    for j in range(1, count + 1):
+        # words first..j-1 fit on a line when offsets[first] >= end,
+        # the space left on that line is offsets[first] - end
+        end = offsets[j] - 1 - width
+        while first < j and offsets[first] < end:
+            first += 1
+        best = 10 ** 20
+        brk = 0
+        for i in range(first, j):
+            penalty = cost[i] + (offsets[i] - end) ** 2
+            if penalty < best:
+                best = penalty
+                brk = i
+        cost[j] = best
+        breaks[j] = brk
     lines = []
     last = count
     while last > 0:
@@ -202,10 +321,12 @@ def to_lines(text, width):
     return lines
 
 
+WHITESPACE = re.compile(r'\s+')
+
 def singlespaceline(txt):
     if txt:
         txt = txt.strip()
-        txt = re.sub(r'\s+', ' ', txt)
+        txt = WHITESPACE.sub(' ', txt)
     return txt
 
 
@@ -221,7 +342,8 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(
             description='Indent XML file(s)')
     parser.add_argument('filename', nargs='+',
-            help='the XML files to process')
+            help='the XML files to process, or directories to process '
+            'all the .xml files under them')
     parser.add_argument('-w', '--width', action='store', type=int,
             default = LINE_LENGTH,
             help='the maximum width of the lines in output')
@@ -232,25 +354,45 @@ if __name__ == '__main__':
             help='space-separated list of tags to be rendered inline')
     parser.add_argument('--block-tags', action='store',
             help='space-separated list of tags to be rendered as blocks')
+    parser.add_argument('-j', '--jobs', action='store', type=int,
+            help='the number of processes formatting files (default: one per CPU)')
+    parser.add_argument('--check', action='store_true',
+            help='only list the files that would be changed, exit with 1 if there are any')
     parser.add_argument('-V', '--version', action='version',
             version='%(prog)s ' + VERSION,
             help='print the program version')
 
     args = parser.parse_args()
 
-    config = dict()
-    config['inline'] = TAGS_inline
-    config['block'] = TAGS_block
-    config['max_width'] = args.width
-    config['lvl_indent'] = args.indent
+    config = make_config(width=args.width, indent=args.indent)
     if args.inline_tags:
         config['inline'] = args.inline_tags.split()
     if args.block_tags:
         config['block'] = args.block_tags.split()
 
-    for fname in args.filename:
-        try:
-            process(fname)
-        except et.ParseError as e:
-            logger.error('XML Parse Error: ' + str(e))
-            print('XML Parse Error: ' + str(e))
+    start = time.time()
+    fnames = list(xml_files(args.filename))
+    changed = []
+    errors = []
+    slowest = (0, None)
+    for fname, file_changed, error, seconds in process_all(fnames, config, args.check, args.jobs):
+        if error:
+            logger.error(error)
+            print('{}: {}'.format(fname, error))
+            errors.append(fname)
+        elif file_changed:
+            changed.append(fname)
+            if args.check:
+                print('would reformat {}'.format(fname))
+        if seconds > slowest[0]:
+            slowest = (seconds, fname)
+    elapsed = time.time() - start
+
+    print('{} files, {} {}, {} errors in {:.2f}s ({:.1f} ms per file, slowest {} in {:.1f} ms)'.format(
+        len(fnames), len(changed), 'would be reformatted' if args.check else 'reformatted',
+        len(errors), elapsed, 1000 * elapsed / max(1, len(fnames)),
+        slowest[1], 1000 * slowest[0]), file=sys.stderr)
+    if errors:
+        sys.exit(2)
+    if args.check and changed:
+        sys.exit(1)
@@ -1,8 +1,8 @@
-import math
 import os
 import re
 import subprocess
 import xml.etree.ElementTree as ET
+from collections import namedtuple
 from itertools import chain, izip, tee
 
 entityMap = {
@@ -15,6 +15,22 @@ entityMap = {
 letterBullets = r"^(\s*)([^\s\w]?(?!(v|V) ?\.)(?:[a-zA-Z]|[MDCLXVImdclxvi]+)[^\s\w])(\s)"
 numberBullets = r"^(\s*)([^\s\w]?[0-9]+[^\s\w]|[^\s\w]?[0-9]+(?:\.[0-9]+)[^\s\w]?)(\s)"
 symbolBullets = r"^(\s*)([*\u2022\-])(\s)"
+bulletTypes = [("letter", letterBullets), ("number", numberBullets), ("symbol", symbolBullets)]
+
+
+def namedBullet(name, pattern):
+    """ The pattern without its ^, with the bullet group named name.
+    """
+    return pattern[1:].replace(r"(\s*)(", r"(\s*)(?P<%s>" % name, 1)
+
+
+""" One pattern for the three kinds of bullets, tried in the order of
+bulletTypes like the separate searches were, so that a line is scanned once.
+"""
+bulletRegex = re.compile("^(?:%s)" % "|".join(namedBullet(name, pattern) for name, pattern in bulletTypes))
+
+""" The bullet of a line: its text and its kind (letter, number or symbol) """
+Bullet = namedtuple("Bullet", ["text", "type"])
 
     
 def previous_and_current(some_iterable):
@@ -29,43 +45,47 @@ def escapeXmlData(string):
     return string
 
 
+def matchBullet(string):
+    """ Returns the Bullet the line starts with, None if it has none.
+    """
+    match = bulletRegex.match(string)
+    if match is None:
+        return None
+    for name, pattern in bulletTypes:
+        if match.group(name) is not None:
+            return Bullet(match.group(name), name)
+
+
 def isBullet(string):
     """ To check if the line has bullet or not.
     """
-    isLetterBullet = re.search(letterBullets, string)
-    isNumberBullet = re.search(numberBullets, string)
-    isSymbolBullet = re.search(symbolBullets, string)
-    if isLetterBullet or isNumberBullet or isSymbolBullet:
-        return True
-    return False
+    return matchBullet(string) is not None
 
 
-def wrapBullets(string, item):
+def wrapBullets(string, item, bullet=None):
     """ Wrap bullets around the bullet tags.
+    bullet is the Bullet of the line when it is already known.
     """
-    letterBullet = re.search(letterBullets, string)
-    numberBullet = re.search(numberBullets, string)
-    symbolBullet = re.search(symbolBullets, string)
-    bullet = letterBullet or numberBullet or symbolBullet    
-    ET.SubElement(item, "bullet").text = bullet.group(2)
-    string = string.replace(bullet.group(2), '').strip()
+    if bullet is None:
+        bullet = matchBullet(string)
+    ET.SubElement(item, "bullet").text = bullet.text
+    string = string.replace(bullet.text, '').strip()
     return string
 
 
 def groupLines(lines):
     """ Creates a list of dictionary of each line containing data, tagType and depth of the line. 
+    The items also hold their Bullet.
     """
     lis = []
     for line in lines:
-        if isBullet(line):
-            line = re.sub(r"\t", '      ', line)
-            matches = re.search(r"^( *)", line).group(1)
-            if not matches:
-                depth = 0
-            else:
-                depth = int(math.floor(len(matches)/4))
+        bullet = matchBullet(line)
+        if bullet:
+            line = line.replace("\t", '      ')
+            """ 4 leading spaces per level """
+            depth = (len(line) - len(line.lstrip(' '))) // 4
             tagType = 'item'
-            lis.append({'data':line, 'depth':depth, 'tagType':tagType})
+            lis.append({'data':line, 'depth':depth, 'tagType':tagType, 'bullet':bullet})
         else:
             tagType = 'p'
             lis.append({'data':line, 'tagType':tagType})
@@ -78,7 +98,7 @@ def insertOls(lines):
     depth = -1
     newLines = []
     for line in lines:
-        if isBullet(line.get('data')):
+        if line.get('bullet'):
             if line.get('depth') < depth:
                 while line.get('depth') < depth:
                     newLines.append({ 'tagType': 'list', 'isStart': False, 'data': '' })
@@ -97,38 +117,42 @@ def insertOls(lines):
 
 def getTextElement(points):
     """ Returns the text element of the license XML.
+    The open elements are kept on a stack with the last item added to each,
+    so the lists and paragraphs are attached without searching the items
+    already built and the text is built in one pass over points.
     """
     licenseTextElement = ET.Element("text")
-    elements = []
-    elements.append(licenseTextElement)
+    """ [element, its last item child or None] """
+    elements = [[licenseTextElement, None]]
     for pp,point in previous_and_current(points):
         if point.get('isStart'):
-            elements.append(ET.Element("list"))
-        
+            elements.append([ET.Element("list"), None])
+
         elif point.get('isStart') is False:
-            n = len(elements)
-            if elements[n-2].findall('item'):
-                elements[n-2].findall('item')[-1].append(elements[n-1])
+            element = elements.pop()[0]
+            parent, lastItem = elements[-1]
+            if lastItem is not None:
+                lastItem.append(element)
             else:
-                 elements[n-2].append(elements[n-1])
-            elements.pop()
+                parent.append(element)
         else:
             if pp:
                 if point.get('tagType') == "p" and pp.get('tagType') == "item":
                     p = ET.Element("p")
                     p.text = point.get('data')
-                    elements[-1].findall('item')[-1].append(p)
+                    elements[-1][1].append(p)
                     continue
             if point.get('tagType') == "p":
                 p = ET.Element("p")
                 p.text = point.get('data')
-                elements[-1].append(p)
-        
+                elements[-1][0].append(p)
+
             elif point.get('tagType') == "item":
                 item = ET.Element("item")
-                ET.SubElement(item, "p").text = wrapBullets(point.get('data'), item)
-                elements[-1].append(item)
-    return elements[0]
+                ET.SubElement(item, "p").text = wrapBullets(point.get('data'), item, point.get('bullet'))
+                elements[-1][0].append(item)
+                elements[-1][1] = item
+    return elements[0][0]
 
 
 def generateLicenseXml(licenseOsi, licenseIdentifier, licenseName, listVersionAdded, licenseSourceUrls, licenseHeader, licenseNotes, licenseText):
@@ -154,3 +178,35 @@ def generateLicenseXml(licenseOsi, licenseIdentifier, licenseName, listVersionAd
     license.append(textElement)
     xmlString = ET.tostring(root, method='xml')
     return xmlString
+
+
+def benchmark(sizes, depth):
+    """ Time generateLicenseXml on numbered lists of sizes items, each with
+    nested items down to depth and a paragraph after them
+    """
+    import time
+    for size in sizes:
+        paragraphs = ["Synthetic license of {0} numbered items.".format(size)]
+        for n in range(1, size + 1):
+            paragraphs.append("{0}. Item {0} of the license, with a sentence long enough to be realistic.".format(n))
+            for level in range(1, depth):
+                paragraphs.append("{0}({1}) Nested item at level {2}.".format(" " * 4 * level, chr(ord('a') + level - 1), level))
+            paragraphs.append("A paragraph continuing item {0}.".format(n))
+        text = "\n\n".join(paragraphs)
+        start = time.time()
+        generateLicenseXml("Approved", "Synthetic", "Synthetic License", "3.6", [], "", "", text)
+        elapsed = time.time() - start
+        print("{0:>7} items {1:>8} paragraphs {2:8.3f}s {3:8.1f} us/paragraph".format(
+            size, len(paragraphs), elapsed, 1e6 * elapsed / len(paragraphs)))
+
+
+if __name__ == '__main__':
+    """ Micro-benchmark: python app/generateXml.py [--depth N] [sizes...] """
+    import argparse
+    parser = argparse.ArgumentParser(description='Time the license XML generation on large numbered lists')
+    parser.add_argument('sizes', nargs='*', type=int, default=[1000, 2000, 4000, 8000],
+            help='the numbers of items of the synthetic licenses')
+    parser.add_argument('--depth', type=int, default=3,
+            help='the nesting depth of the lists')
+    args = parser.parse_args()
+    benchmark(args.sizes, args.depth)
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Client of the GitHub API shared by the tools.
+
+All the calls go through one requests.Session whose connections are kept
+(settings.GITHUB_POOL_SIZE per host), so a pull request made of several
+calls pays one TLS handshake. The idempotent requests failing with a
+server error are retried with an exponential backoff.
+
+The GET responses carrying an ETag or a Last-Modified header are stored on
+disk under settings.GITHUB_CACHE_DIR, by URL, Accept header and token. The
+next GET of the same URL is conditional and a 304 answer, which GitHub does
+not count in the rate limit, is served from the stored copy.
+
+The X-RateLimit headers of the responses are tracked per token. A request
+that would exceed the limit raises RateLimitError without being sent, and
+the background jobs (background=True) leave the last
+settings.GITHUB_RATE_LIMIT_RESERVE requests of the hour to the users, at most
+a quarter of the limit of the token.
+"""
+
+from __future__ import unicode_literals
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+
+API_URL = "https://api.github.com/"
+""" Headers kept with a cached response, Link for the paginated lists """
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+
+class RateLimitError(requests.RequestException):
+    """ Raised instead of sending a request the rate limit does not allow """
+
+    def __init__(self, reset, *args, **kwargs):
+        self.reset = reset
+        message = "GitHub rate limit exhausted until {0}".format(
+            time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(reset)))
+        super(RateLimitError, self).__init__(message, *args, **kwargs)
+
+
+""" Remaining requests of a token until reset (a unix time) """
+RateLimit = namedtuple("RateLimit", ["limit", "remaining", "reset"])
+
+
+class ResponseCache(object):
+    """ GET responses stored on disk with their validators, one json file
+    per entry. The least recently used entries are removed once the cache is
+    larger than maxBytes, 0 disables it.
+    """
+
+    def __init__(self, directory, maxBytes):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.lock = threading.Lock()
+
+    def enabled(self):
+        return self.maxBytes > 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        if not self.enabled():
+            return None
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key, response):
+        if not self.enabled():
+            return
+        entry = {
+            "url": response.url,
+            "headers": dict((name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers),
+            "content": base64.b64encode(response.content).decode("ascii"),
+        }
+        path = self.path(key)
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            """ Written aside and renamed, readers never see half an entry """
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            total = 0
+            for root, dirs, files in os.walk(self.directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+            entries.sort()
+            for mtime, size, path in entries:
+                if total <= self.maxBytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def clear(self):
+        with self.lock:
+            for root, dirs, files in os.walk(self.directory):
+                for name in files:
+                    os.remove(os.path.join(root, name))
+
+
+def cachedResponse(entry, response):
+    """ The response stored in entry, answered with the 304 response """
+    cached = requests.Response()
+    cached.status_code = 200
+    cached.reason = "OK"
+    cached.url = entry["url"]
+    cached.headers = CaseInsensitiveDict(response.headers)
+    cached.headers.update(entry["headers"])
+    cached.encoding = get_encoding_from_headers(cached.headers)
+    cached._content = base64.b64decode(entry["content"])
+    cached.request = response.request
+    cached.elapsed = response.elapsed
+    cached.fromCache = True
+    return cached
+
+
+class GithubClient(object):
+
+    def __init__(self):
+        self.session = requests.Session()
+        retry = Retry(total=settings.GITHUB_RETRIES, backoff_factor=settings.GITHUB_BACKOFF,
+            status_forcelist=(500, 502, 503, 504), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=settings.GITHUB_POOL_SIZE,
+            pool_maxsize=settings.GITHUB_POOL_SIZE, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.cache = ResponseCache(settings.GITHUB_CACHE_DIR, settings.GITHUB_CACHE_MAX_BYTES)
+        self.limits = {}
+        self.lock = threading.Lock()
+
+    def identity(self, token):
+        """ Key of the rate limit and of the cache entries of a token """
+        if not token:
+            return "anonymous"
+        return hashlib.sha1(token.encode("utf-8")).hexdigest()
+
+    def rateLimit(self, token=None):
+        """ Last known RateLimit of token, None if unknown """
+        return self.limits.get(self.identity(token))
+
+    def reserve(self, identity, background):
+        """ Count a request against the rate limit, raise RateLimitError if
+        the budget of the caller is spent
+        """
+        with self.lock:
+            limit = self.limits.get(identity)
+            if limit is None or limit.reset <= time.time():
+                return
+            """ The reserve is at most a quarter of the limit, the anonymous
+            limit (60) is below the default reserve
+            """
+            floor = min(settings.GITHUB_RATE_LIMIT_RESERVE, limit.limit // 4) if background else 0
+            if limit.remaining <= floor:
+                raise RateLimitError(limit.reset)
+            self.limits[identity] = limit._replace(remaining=limit.remaining - 1)
+
+    def updateLimit(self, identity, response):
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers or headers.get("X-RateLimit-Resource", "core") != "core":
+            return
+        try:
+            limit = RateLimit(int(headers["X-RateLimit-Limit"]), int(headers["X-RateLimit-Remaining"]),
+                int(headers["X-RateLimit-Reset"]))
+        except (KeyError, ValueError):
+            return
+        with self.lock:
+            self.limits[identity] = limit
+
+    def cacheKey(self, identity, request):
+        payload = json.dumps([request.url, request.headers.get("Accept", ""), identity])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def request(self, method, url, token=None, background=False, cache=True, headers=None, timeout=None, **kwargs):
+        """ Send a request to GitHub, url is absolute or relative to the API.
+        token authenticates it, background jobs pass background=True and cache
+        False skips the cache of the GET responses. The other arguments are
+        those of requests (params, data, json).
+        Raises requests.RequestException, RateLimitError when the rate limit
+        does not allow the request.
+        """
+        if "://" not in url:
+            url = API_URL + url.lstrip("/")
+        headers = dict(headers or {})
+        if token:
+            headers.setdefault("Authorization", "token " + token)
+        identity = self.identity(token)
+        prepared = self.session.prepare_request(requests.Request(method, url, headers=headers, **kwargs))
+        entry = None
+        key = None
+        if cache and method == "GET" and self.cache.enabled():
+            key = self.cacheKey(identity, prepared)
+            entry = self.cache.get(key)
+            if entry is not None:
+                if "ETag" in entry["headers"]:
+                    prepared.headers["If-None-Match"] = entry["headers"]["ETag"]
+                if "Last-Modified" in entry["headers"]:
+                    prepared.headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        self.reserve(identity, background)
+        options = self.session.merge_environment_settings(prepared.url, {}, None, None, None)
+        response = self.session.send(prepared, timeout=timeout or settings.GITHUB_TIMEOUT, **options)
+        self.updateLimit(identity, response)
+        if response.status_code == 304 and entry is not None:
+            return cachedResponse(entry, response)
+        if key is not None and response.status_code == 200 and (
+                "ETag" in response.headers or "Last-Modified" in response.headers):
+            self.cache.put(key, response)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+
+_client = None
+_clientLock = threading.Lock()
+
+
+def getClient():
+    """ The client shared by the threads of the process """
+    global _client
+    if _client is None:
+        with _clientLock:
+            if _client is None:
+                _client = GithubClient()
+    return _client
+
+
+def get(url, **kwargs):
+    return getClient().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return getClient().post(url, **kwargs)
+
+
+def put(url, **kwargs):
+    return getClient().put(url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return getClient().patch(url, **kwargs)
+
+
+_pool = None
+
+
+def concurrently(*calls):
+    """ Run the functions without arguments calls in parallel, each in a
+    thread of a pool of settings.GITHUB_POOL_SIZE threads. Returns their
+    results in order, the first exception raised is raised again.
+    """
+    global _pool
+    if _pool is None:
+        with _clientLock:
+            if _pool is None:
+                _pool = ThreadPool(settings.GITHUB_POOL_SIZE)
+    results = [_pool.apply_async(call) for call in calls]
+    return [result.get() for result in results]
+
+
+def reset():
+    """ Drop the client, its connections and known rate limits """
+    global _client
+    with _clientLock:
+        _client = None
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Process-wide bridge to the SPDX java tools (tool.jar).
+
+The JVM is started once per process, ideally when the WSGI worker boots,
+and the java classes used by the views are resolved once and cached.
+Views get a handle on the cached classes with attach()::
+
+    tools = jvm.attach()
+    retval = tools.Verify.verify(path)
+"""
+
+from __future__ import unicode_literals
+
+import threading
+from contextlib import contextmanager
+
+import jpype
+from django.conf import settings
+
+""" Short name -> fully qualified name of the java classes used by the tools """
+TOOL_CLASSES = {
+    "Verify": "org.spdx.tools.Verify",
+    "TagToRDF": "org.spdx.tools.TagToRDF",
+    "TagToSpreadsheet": "org.spdx.tools.TagToSpreadsheet",
+    "RdfToTag": "org.spdx.tools.RdfToTag",
+    "RdfToSpreadsheet": "org.spdx.tools.RdfToSpreadsheet",
+    "RdfToHtml": "org.spdx.tools.RdfToHtml",
+    "SpreadsheetToTag": "org.spdx.tools.SpreadsheetToTag",
+    "SpreadsheetToRDF": "org.spdx.tools.SpreadsheetToRDF",
+    "CompareMultpleSpdxDocs": "org.spdx.tools.CompareMultpleSpdxDocs",
+    "LicenseCompareHelper": "org.spdx.compare.LicenseCompareHelper",
+}
+
+_lock = threading.Lock()
+_classes = {}
+
+
+def startJVM():
+    """ Start the JVM with tool.jar on the classpath and resolve the tool
+    classes. Safe to call more than once, only the first call does the work.
+    """
+    if jpype.isJVMStarted() and len(_classes) == len(TOOL_CLASSES):
+        return
+    with _lock:
+        if not jpype.isJVMStarted():
+            classpath = settings.JAR_ABSOLUTE_PATH
+            jpype.startJVM(jpype.getDefaultJVMPath(), "-ea", "-Djava.class.path=%s" % classpath)
+        for name, className in TOOL_CLASSES.items():
+            if name not in _classes:
+                _classes[name] = jpype.JClass(className)
+
+
+def getClass(name):
+    """ Returns the cached java class registered under name in TOOL_CLASSES """
+    if name not in _classes:
+        startJVM()
+    return _classes[name]
+
+
+class ToolsHandle(object):
+    """ Gives access to the cached java classes by their short name,
+    e.g. handle.Verify or handle.CompareMultpleSpdxDocs
+    """
+
+    def __getattr__(self, name):
+        if name not in TOOL_CLASSES:
+            raise AttributeError(name)
+        return getClass(name)
+
+
+_handle = ToolsHandle()
+
+
+def attach():
+    """ Attach the calling thread to the JVM, starting it if needed,
+    and return the handle on the tool classes.
+    The thread stays attached, request threads are reused by the WSGI server
+    so there is no need to detach and re-attach them on every request.
+    """
+    startJVM()
+    if not jpype.isThreadAttachedToJVM():
+        jpype.attachThreadToJVM()
+    return _handle
+
+
+@contextmanager
+def attached(detach=False):
+    """ Context managed version of attach(). Short lived threads should pass
+    detach=True so that the thread is released from the JVM on exit.
+    """
+    handle = attach()
+    try:
+        yield handle
+    finally:
+        if detach and jpype.isThreadAttachedToJVM():
+            jpype.detachThreadFromJVM()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Identifies many license texts in one call.
+
+The texts are matched against the license corpus (app.licensecorpus) by a
+pool of settings.LICENSE_BATCH_WORKERS processes, in chunks so that the
+inter process traffic is paid per chunk and not per text. The pool is forked
+from a process that already loaded the corpus, the workers share it instead
+of each reading the license list from redis.
+"""
+
+from __future__ import unicode_literals
+
+import multiprocessing
+import tarfile
+import threading
+import zipfile
+from traceback import format_exc
+
+import jpype
+from django.conf import settings
+
+from app import licensecorpus
+from app.utils import match_spdx_license
+
+
+class BatchError(Exception):
+    """ Raised when a batch can not be read """
+
+    def __init__(self, message):
+        Exception.__init__(self, message)
+        self.message = message
+
+
+def toText(data):
+    if isinstance(data, bytes):
+        return data.decode("utf-8", "replace")
+    return data
+
+
+def readArchive(upload):
+    """ Returns [(name, text)] of the regular files of a tar (optionally
+    compressed) or zip archive
+    """
+    items = []
+    if zipfile.is_zipfile(upload):
+        upload.seek(0)
+        archive = zipfile.ZipFile(upload)
+        for info in archive.infolist():
+            if info.filename.endswith("/"):
+                continue
+            checkSize(info.filename, info.file_size)
+            items.append((toText(info.filename), toText(archive.read(info))))
+            checkCount(items)
+        return items
+    upload.seek(0)
+    try:
+        archive = tarfile.open(fileobj=upload, mode="r:*")
+    except tarfile.TarError:
+        raise BatchError("The file is neither a tar nor a zip archive.")
+    for member in archive:
+        if not member.isfile():
+            continue
+        checkSize(member.name, member.size)
+        items.append((toText(member.name), toText(archive.extractfile(member).read())))
+        checkCount(items)
+    return items
+
+
+def readJson(data):
+    """ Returns [(name, text)] of a JSON array of texts, or of objects
+    with a text and an optional name. Unnamed texts are named by their index.
+    """
+    if not isinstance(data, list):
+        raise BatchError("Expected a JSON array of license texts.")
+    items = []
+    for position, item in enumerate(data):
+        if isinstance(item, dict):
+            name, text = item.get("name", str(position)), item.get("text")
+        else:
+            name, text = str(position), item
+        if not isinstance(text, (bytes, unicode)):
+            raise BatchError("Item {0} has no license text.".format(position))
+        checkSize(name, len(text))
+        items.append((toText(name), toText(text)))
+        checkCount(items)
+    return items
+
+
+def checkSize(name, size):
+    if size > settings.LICENSE_BATCH_MAX_TEXT_SIZE:
+        raise BatchError("{0} is larger than {1} bytes.".format(name, settings.LICENSE_BATCH_MAX_TEXT_SIZE))
+
+
+def checkCount(items):
+    if len(items) > settings.LICENSE_BATCH_MAX_ITEMS:
+        raise BatchError("A batch holds at most {0} license texts.".format(settings.LICENSE_BATCH_MAX_ITEMS))
+
+
+def identify(item):
+    """ Match one (name, text) against the license list, returns the result
+    dict of the item. Runs in the workers, never raises.
+    """
+    name, text = item
+    try:
+        matchIds, matchType, score = match_spdx_license(text)
+    except Exception:
+        return {"name": name, "error": format_exc()}
+    if isinstance(matchIds, (bytes, unicode)):
+        matchIds = [matchIds]
+    return {
+        "name": name,
+        "matchIds": matchIds or [],
+        "matchType": matchType,
+        "score": score,
+    }
+
+
+_pool = None
+_poolLock = threading.Lock()
+
+
+def getPool():
+    """ Returns the worker pool, creating it on first use """
+    global _pool
+    if _pool is None:
+        with _poolLock:
+            if _pool is None:
+                if jpype.isJVMStarted():
+                    raise RuntimeError("The JVM is already running in this process, "
+                        "the license batch workers must be started before it.")
+                """ Load the corpus before forking, the workers inherit it """
+                licensecorpus.getCorpus()
+                _pool = multiprocessing.Pool(processes=settings.LICENSE_BATCH_WORKERS)
+    return _pool
+
+
+def usePool():
+    return settings.LICENSE_BATCH_WORKERS > 0
+
+
+def prewarm():
+    if usePool():
+        getPool()
+
+
+def identifyAll(items):
+    """ Match every (name, text) of items, returns the result dicts in order """
+    if not items:
+        return []
+    if not usePool():
+        return [identify(item) for item in items]
+    chunksize = max(1, len(items) // (settings.LICENSE_BATCH_WORKERS * 4))
+    return getPool().map(identify, items, chunksize)
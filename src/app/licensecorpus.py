@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Process resident copy of the SPDX license texts stored in redis.
+
+The texts are read from redis once and kept with their normalized form and
+token set, check_spdx_license then only compares the submitted text with
+the licenses it can match instead of pulling the whole list out of redis
+on every call. The candidates are looked up in a MinHash/LSH index
+(app.minhash) so the cost of a check does not grow with the license list.
+The corpus is reloaded when the number of licenses in redis changes (a new
+license list was built) and at least every settings.LICENSE_CORPUS_MAX_AGE
+seconds.
+"""
+
+from __future__ import unicode_literals
+
+import re
+import threading
+import time
+from collections import namedtuple
+
+import redis
+from django.conf import settings
+from spdx_license_matcher.build_licenses import build_spdx_licenses
+
+from app import minhash
+from app.minhash import MinHashIndex, normalize
+
+""" A listed license: its raw text as stored in redis, the text in lower case
+with the white space collapsed, and the set of its words
+"""
+LicenseText = namedtuple("LicenseText", ["licenseId", "text", "normalized", "tokens"])
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+""" check_spdx_license keeps a license when its similarity with the input is at
+least 0.9. A dice coefficient that high needs texts of similar lengths, the
+texts more than twice as long or short as the input are skipped.
+"""
+LENGTH_RATIO = 2.0
+
+
+def tokenize(normalized):
+    return frozenset(WORD.findall(normalized))
+
+
+def getRedis():
+    return redis.StrictRedis(host="localhost", port=6379, db=0)
+
+
+class LicenseCorpus(object):
+    """ The listed license texts, indexed by id and by normalized text """
+
+    def __init__(self, licenseData):
+        """ licenseData maps the license ids to their texts """
+        self.licenses = {}
+        self.byNormalized = {}
+        self.index = MinHashIndex()
+        for licenseId, text in licenseData.items():
+            if text is None:
+                continue
+            normalized = normalize(text)
+            license = LicenseText(licenseId, text, normalized, tokenize(normalized))
+            self.licenses[licenseId] = license
+            self.byNormalized.setdefault(normalized, []).append(licenseId)
+            self.index.add(licenseId, normalized)
+        self.size = len(licenseData)
+        self.loaded = time.time()
+
+    def __len__(self):
+        return len(self.licenses)
+
+    def exactMatches(self, text):
+        """ Ids of the licenses whose text is the same as text,
+        ignoring the case and the white space
+        """
+        return list(self.byNormalized.get(normalize(text), []))
+
+    def candidates(self, text):
+        """ Returns {licenseId: text} of the licenses that can be close
+        matches of text
+        """
+        normalized = normalize(text)
+        length = len(normalized)
+        licenses = [self.licenses[licenseId] for licenseId in self.index.query(normalized)]
+        return dict(
+            (license.licenseId, license.text)
+            for license in licenses
+            if length <= len(license.normalized) * LENGTH_RATIO
+            and len(license.normalized) <= length * LENGTH_RATIO
+            )
+
+    def getText(self, licenseId):
+        """ Text of the license, None if it is not in the corpus """
+        license = self.licenses.get(licenseId)
+        return license.text if license is not None else None
+
+    @classmethod
+    def fromRedis(cls, r):
+        licenseIds = r.keys("*")
+        return cls(dict(zip(licenseIds, r.mget(licenseIds))))
+
+
+_corpus = None
+_lastChecked = 0
+_lock = threading.Lock()
+
+
+def isStale(corpus, r):
+    if time.time() - corpus.loaded > settings.LICENSE_CORPUS_MAX_AGE:
+        return True
+    return r.dbsize() != corpus.size
+
+
+def getCorpus():
+    """ Returns the license corpus, building the license list in redis if it
+    is empty, and loading or refreshing the corpus when needed.
+    Redis is asked whether the list changed at most every
+    settings.LICENSE_CORPUS_CHECK_INTERVAL seconds.
+    """
+    global _corpus, _lastChecked
+    corpus = _corpus
+    if corpus is not None and time.time() - _lastChecked < settings.LICENSE_CORPUS_CHECK_INTERVAL:
+        return corpus
+    with _lock:
+        r = getRedis()
+        if _corpus is None or isStale(_corpus, r):
+            if r.dbsize() == 0:
+                """ Build the spdx license list in the redis database """
+                build_spdx_licenses()
+            _corpus = LicenseCorpus.fromRedis(r)
+        _lastChecked = time.time()
+        return _corpus
+
+
+_requestIndex = MinHashIndex()
+_requestLock = threading.Lock()
+
+
+def requestCandidates(text, licenseData, fingerprints=None):
+    """ Returns the part of licenseData, {licenseId: text} of the pending and
+    rejected license requests, that can be close matches of text.
+    The index of the requests is kept between calls, only the requests
+    that are new or changed since the last call are hashed, unless their
+    stored fingerprint is given in fingerprints, {licenseId: fingerprint}.
+    """
+    signatures = dict(
+        (licenseId, minhash.fromFingerprint(value))
+        for licenseId, value in (fingerprints or {}).items() if value
+        )
+    with _requestLock:
+        _requestIndex.sync(dict((licenseId, normalize(requestText)) for licenseId, requestText in licenseData.items()), signatures)
+        licenseIds = _requestIndex.query(normalize(text))
+    return dict((licenseId, licenseData[licenseId]) for licenseId in licenseIds)
+
+
+def reset():
+    """ Drop the corpus, the next getCorpus() reloads it from redis """
+    global _corpus, _lastChecked
+    with _lock:
+        _corpus = None
+        _lastChecked = 0
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Lookup of the listed licenses and exceptions by id and by name.
+
+The index is built once per license list version from licenses.json and
+exceptions.json: from the current snapshot of the local mirror
+(app.licenselist) when it was synced, else from GitHub. Without mirror the
+files are fetched again at most every settings.LICENSE_INDEX_REFRESH_INTERVAL
+seconds and the index is only rebuilt when the licenseListVersion changed.
+"""
+
+from __future__ import unicode_literals
+
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from app import githubclient, licenselist
+
+LICENSE_LIST_DATA_URL = "https://raw.githubusercontent.com/spdx/license-list-data/master/"
+
+""" A listed license or exception: its id, its name, whether it is an
+exception and its entry of licenses.json or exceptions.json
+"""
+ListedEntry = namedtuple("ListedEntry", ["licenseId", "name", "isException", "data"])
+
+
+def fold(name):
+    return name.strip().lower()
+
+
+class EntryMap(object):
+    """ The entries of one kind by id, by name and by case-folded id or name """
+
+    def __init__(self, entries):
+        self.byId = {}
+        self.byName = {}
+        self.byFolded = {}
+        for entry in entries:
+            self.byId.setdefault(entry.licenseId, entry)
+            self.byName.setdefault(entry.name, entry)
+        """ A folded id wins over a folded name, as the exact lookups do """
+        for entry in entries:
+            self.byFolded.setdefault(fold(entry.name), entry)
+        for entry in entries:
+            self.byFolded[fold(entry.licenseId)] = entry
+
+    def __len__(self):
+        return len(self.byId)
+
+    def find(self, name, ignoreCase=True):
+        """ Entry whose id or name is name, then whose id or name is name
+        ignoring the case, None if there is none
+        """
+        if not name:
+            return None
+        entry = self.byId.get(name) or self.byName.get(name)
+        if entry is None and ignoreCase:
+            entry = self.byFolded.get(fold(name))
+        return entry
+
+
+class LicenseIndex(object):
+    """ The licenses and exceptions of one version of the license list """
+
+    def __init__(self, licenseData, exceptionData):
+        self.version = licenseData.get("licenseListVersion")
+        self.licenses = EntryMap([
+            ListedEntry(license["licenseId"], license["name"], False, license)
+            for license in licenseData["licenses"]
+            ])
+        self.exceptions = EntryMap([
+            ListedEntry(exception["licenseExceptionId"], exception["name"], True, exception)
+            for exception in exceptionData["exceptions"]
+            ])
+
+    def findLicense(self, name):
+        return self.licenses.find(name)
+
+    def findException(self, name):
+        return self.exceptions.find(name)
+
+    def find(self, name):
+        """ License, else exception, whose id or name is name. An exact
+        match of either kind wins over a match ignoring the case.
+        """
+        return (self.licenses.find(name, ignoreCase=False)
+            or self.exceptions.find(name, ignoreCase=False)
+            or self.licenses.find(name)
+            or self.exceptions.find(name))
+
+
+def fetchJson(name):
+    response = githubclient.get(LICENSE_LIST_DATA_URL + "json/" + name, timeout=settings.LICENSE_LIST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+_index = None
+_source = None
+_fetched = 0
+_lock = threading.Lock()
+
+
+def getIndex():
+    """ Returns the index of the license list in use.
+    Raises requests.RequestException when the list has to be fetched from
+    GitHub and can not be.
+    """
+    global _index, _source, _fetched
+    snapshot = licenselist.currentSnapshot()
+    index = _index
+    if snapshot is not None:
+        if index is not None and _source == snapshot:
+            return index
+    elif index is not None and _source is None and time.time() - _fetched < settings.LICENSE_INDEX_REFRESH_INTERVAL:
+        return index
+    with _lock:
+        if snapshot is not None:
+            if _index is None or _source != snapshot:
+                _index = LicenseIndex(licenselist.getLicenses(), licenselist.getExceptions())
+                _source = snapshot
+            return _index
+        if _index is None or _source is not None or time.time() - _fetched >= settings.LICENSE_INDEX_REFRESH_INTERVAL:
+            licenseData = fetchJson("licenses.json")
+            if _index is None or _source is not None or _index.version != licenseData.get("licenseListVersion"):
+                _index = LicenseIndex(licenseData, fetchJson("exceptions.json"))
+                _source = None
+            _fetched = time.time()
+        return _index
+
+
+def isLoaded():
+    return _index is not None
+
+
+def reset():
+    """ Drop the index, the next getIndex() builds it again """
+    global _index, _source, _fetched
+    with _lock:
+        _index = None
+        _source = None
+        _fetched = 0
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Local index of the issues of the license request repositories.
+
+The issues are stored in LicenseRequestIssue with their state and labels.
+`python manage.py sync_license_issues` reads all their pages from the GitHub
+API, then only the issues updated since the previous sync, and the GitHub
+"issues" webhook (app.views.githubWebhook) stores each change as it happens.
+The check of a new license request against the pending and rejected
+requests then reads the index instead of the GitHub API, it never syncs it:
+the command runs from cron, e.g. every hour::
+
+    0 * * * * cd /path/to/src && python manage.py sync_license_issues
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import hmac
+import json
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from app import githubclient
+from app.models import LicenseIssueSync, LicenseRequestIssue
+
+PENDING_LABEL = "new license/exception request"
+REJECTED_LABEL = "new license/exception: Not Accepted"
+ACCEPTED_LABEL = "new license/exception: Accepted"
+""" Title of the issues opened by the tools, see app.utils.createIssue """
+TOOL_MARKER = "[SPDX-Online-Tools]"
+SHORT_IDENTIFIER = re.compile(r"(?im)short identifier:\s([a-zA-Z0-9|.|-]+)")
+PER_PAGE = 100
+
+
+def repositoryName(url):
+    """ owner/name of a repository API URL, as GitHub names it in the webhooks """
+    return url.split("/repos/", 1)[-1].strip("/")
+
+
+def repositoryUrl(repository):
+    return "https://api.github.com/repos/" + repository
+
+
+def shortIdentifier(issue):
+    """ Short identifier of the license requested by an issue opened by the
+    tools, "" for the other issues
+    """
+    if TOOL_MARKER not in (issue.get("title") or ""):
+        return ""
+    match = SHORT_IDENTIFIER.search(issue.get("body") or "")
+    if match is None:
+        return ""
+    return match.group(1)[:LicenseRequestIssue._meta.get_field("shortIdentifier").max_length]
+
+
+def store(repository, issue):
+    """ Store an issue of the GitHub API. Pull requests are skipped, and so
+    are the issues older than the one stored (webhooks can arrive out of
+    order). Returns the stored LicenseRequestIssue or None.
+    """
+    if issue.get("pull_request") is not None:
+        return None
+    updated = parse_datetime(issue["updated_at"])
+    fields = {
+        "title": (issue.get("title") or "")[:LicenseRequestIssue._meta.get_field("title").max_length],
+        "url": issue.get("html_url") or "",
+        "state": issue.get("state") or "",
+        "labels": json.dumps(sorted(label["name"] for label in issue.get("labels") or [])),
+        "shortIdentifier": shortIdentifier(issue),
+        "updated": updated,
+    }
+    with transaction.atomic():
+        row, created = LicenseRequestIssue.objects.select_for_update().get_or_create(
+            repository=repository, number=issue["number"], defaults=fields)
+        if not created and row.updated <= updated:
+            for name, value in fields.items():
+                setattr(row, name, value)
+            row.save()
+    return row
+
+
+def fetchIssues(repository, since=None):
+    """ Yields the issues of the repository, all the pages of them, only
+    those updated since the datetime since if it is given
+    """
+    params = {"state": "all", "sort": "updated", "direction": "asc", "per_page": PER_PAGE}
+    if since is not None:
+        params["since"] = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+    url = repositoryUrl(repository) + "/issues"
+    while url:
+        response = githubclient.get(url, params=params, token=settings.LICENSE_ISSUES_TOKEN,
+            background=True, headers={"Accept": "application/vnd.github.v3+json"},
+            timeout=settings.LICENSE_ISSUES_TIMEOUT)
+        response.raise_for_status()
+        for issue in response.json():
+            yield issue
+        """ The next link already carries the parameters """
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+
+def sync(repository, full=False):
+    """ Store the issues updated since the last sync of the repository, all
+    of them if it was never synced or full. Returns the number of issues read.
+    Raises requests.RequestException when GitHub can not be read.
+    """
+    state = LicenseIssueSync.objects.filter(repository=repository).first()
+    since = None if full or state is None else state.synced
+    started = timezone.now()
+    count = 0
+    for issue in fetchIssues(repository, since):
+        store(repository, issue)
+        count += 1
+    LicenseIssueSync.objects.update_or_create(repository=repository, defaults={"synced": started})
+    return count
+
+
+def isSynced(repository):
+    return LicenseIssueSync.objects.filter(repository=repository).exists()
+
+
+def requestIssues(repository):
+    """ Issues of the rejected license requests (closed with the not accepted
+    label), then of the pending ones (open with the request label and not
+    accepted yet), the newest first
+    """
+    rejected = Q(state="closed", labels__contains=json.dumps(REJECTED_LABEL))
+    pending = Q(state="open", labels__contains=json.dumps(PENDING_LABEL)) & ~Q(labels__contains=json.dumps(ACCEPTED_LABEL))
+    return (LicenseRequestIssue.objects
+        .filter(repository=repository)
+        .filter(rejected | pending)
+        .exclude(shortIdentifier="")
+        .order_by("state", "-number"))
+
+
+def checkSignature(body, header):
+    """ Whether header, the X-Hub-Signature-256 (or X-Hub-Signature) of a
+    webhook, is the signature of body with settings.GITHUB_WEBHOOK_SECRET
+    """
+    secret = settings.GITHUB_WEBHOOK_SECRET
+    if not secret or not header or "=" not in header:
+        return False
+    algorithm, signature = header.split("=", 1)
+    if algorithm not in ("sha256", "sha1"):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, getattr(hashlib, algorithm)).hexdigest()
+    try:
+        return hmac.compare_digest(expected.encode("ascii"), signature.encode("ascii"))
+    except UnicodeError:
+        return False
+
+
+def handleEvent(event, payload):
+    """ Store the issue of an "issues" event of a license request repository.
+    Returns the stored LicenseRequestIssue or None.
+    """
+    if event != "issues" or "issue" not in payload:
+        return None
+    repository = payload.get("repository", {}).get("full_name")
+    if repository not in knownRepositories():
+        return None
+    if payload.get("action") == "deleted":
+        LicenseRequestIssue.objects.filter(repository=repository, number=payload["issue"]["number"]).delete()
+        return None
+    return store(repository, payload["issue"])
+
+
+def knownRepositories():
+    return set(repositoryName(url) for url in (settings.REPO_URL, settings.DEV_REPO_URL, settings.PROD_REPO_URL))
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Local mirror of spdx/license-list-data and spdx/license-list-XML.
+
+`python manage.py sync_license_list` downloads the two repositories and
+stores what the tools use in a new snapshot under settings.LICENSE_LIST_DIR::
+
+    snapshots/<licenseListVersion>_<time>/
+        manifest.json           version, git refs and date of the sync
+        licenses.json           license-list-data json/
+        exceptions.json
+        texts/<id>.txt          license-list-data text/
+        ListedLicense.xsd       license-list-XML schema/
+        xml/<id>.xml            license-list-XML src/
+        xml/exceptions/<id>.xml license-list-XML src/exceptions/
+    CURRENT                     name of the snapshot in use
+
+The snapshot is built aside and CURRENT is switched once it is complete,
+the previous snapshots are kept (settings.LICENSE_LIST_KEEP_SNAPSHOTS) to be
+able to go back to them. The readers return None when the mirror was never
+synced, the callers then fall back to fetching the files from GitHub.
+"""
+
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+from datetime import datetime
+
+import requests
+from django.conf import settings
+
+CURRENT_FILE = "CURRENT"
+SNAPSHOTS_DIR = "snapshots"
+MANIFEST_FILE = "manifest.json"
+SCHEMA_FILE = "ListedLicense.xsd"
+
+""" Files kept from each repository archive: path in the repository -> path
+in the snapshot. A path ending with / maps the files of a directory, the
+first matching entry wins.
+"""
+DATA_FILES = [
+    ("json/licenses.json", "licenses.json"),
+    ("json/exceptions.json", "exceptions.json"),
+    ("text/", "texts/"),
+]
+XML_FILES = [
+    ("schema/ListedLicense.xsd", SCHEMA_FILE),
+    ("src/exceptions/", "xml/exceptions/"),
+    ("src/", "xml/"),
+]
+
+
+class SyncError(Exception):
+    """ Raised when the mirror could not be updated """
+
+
+def snapshotsDir():
+    return os.path.join(settings.LICENSE_LIST_DIR, SNAPSHOTS_DIR)
+
+
+def currentSnapshot():
+    """ Path of the snapshot in use, None if the mirror was never synced """
+    try:
+        with open(os.path.join(settings.LICENSE_LIST_DIR, CURRENT_FILE)) as f:
+            name = f.read().strip()
+    except IOError:
+        return None
+    path = os.path.join(snapshotsDir(), name)
+    if not name or not os.path.isdir(path):
+        return None
+    return path
+
+
+def isSynced():
+    return currentSnapshot() is not None
+
+
+def snapshotFile(*parts):
+    """ Path of a file of the current snapshot, None if it is not there """
+    snapshot = currentSnapshot()
+    if snapshot is None:
+        return None
+    path = os.path.join(snapshot, *parts)
+    if not os.path.isfile(path):
+        return None
+    return path
+
+
+def readFile(*parts):
+    path = snapshotFile(*parts)
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+_jsonCache = {}
+_jsonLock = threading.Lock()
+
+
+def readJson(name):
+    """ Parsed json file of the current snapshot, parsed once per snapshot """
+    path = snapshotFile(name)
+    if path is None:
+        return None
+    with _jsonLock:
+        if path not in _jsonCache:
+            with open(path) as f:
+                _jsonCache[path] = json.load(f)
+        return _jsonCache[path]
+
+
+def getLicenses():
+    """ Content of licenses.json, None without mirror """
+    return readJson("licenses.json")
+
+
+def getExceptions():
+    """ Content of exceptions.json, None without mirror """
+    return readJson("exceptions.json")
+
+
+def getVersion():
+    manifest = readJson(MANIFEST_FILE)
+    if manifest is None:
+        return None
+    return manifest["licenseListVersion"]
+
+
+def getSchemaPath():
+    """ Path of ListedLicense.xsd, None without mirror """
+    return snapshotFile(SCHEMA_FILE)
+
+
+def getLicenseXml(licenseId, exception=False):
+    """ XML source of a license or exception, None if it is not mirrored """
+    if exception:
+        return readFile("xml", "exceptions", licenseId + ".xml")
+    return readFile("xml", licenseId + ".xml")
+
+
+def getLicenseText(licenseId):
+    """ Plain text of a license or exception, None if it is not mirrored """
+    return readFile("texts", licenseId + ".txt")
+
+
+def listSnapshots():
+    """ Names of the snapshots, oldest first """
+    if not os.path.isdir(snapshotsDir()):
+        return []
+    names = [name for name in os.listdir(snapshotsDir()) if not name.startswith(".")]
+    """ Sorted by the sync time, 3.10 would come before 3.9 as a string """
+    return sorted(names, key=lambda name: name.rsplit("_", 1)[-1])
+
+
+def activate(name):
+    """ Make the snapshot name the one in use """
+    if not os.path.isdir(os.path.join(snapshotsDir(), name)):
+        raise SyncError("No snapshot named {0}.".format(name))
+    current = os.path.join(settings.LICENSE_LIST_DIR, CURRENT_FILE)
+    fd, tmp = tempfile.mkstemp(dir=settings.LICENSE_LIST_DIR)
+    with os.fdopen(fd, "w") as f:
+        f.write(name)
+    os.rename(tmp, current)
+
+
+def extractArchive(url, destination, files):
+    """ Stream the tar.gz archive at url and write the entries selected by
+    files (see DATA_FILES) under destination
+    """
+    try:
+        response = requests.get(url, stream=True, timeout=settings.LICENSE_LIST_TIMEOUT)
+    except requests.RequestException as ex:
+        raise SyncError("Could not download {0}: {1}".format(url, ex))
+    if response.status_code != 200:
+        raise SyncError("Could not download {0}: HTTP {1}".format(url, response.status_code))
+    response.raw.decode_content = True
+    extracted = 0
+    try:
+        with tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                """ Drop the <repository>-<ref>/ directory of the archive """
+                path = member.name.split("/", 1)[-1]
+                target = targetPath(path, files)
+                if target is None:
+                    continue
+                target = os.path.join(destination, target)
+                if not os.path.isdir(os.path.dirname(target)):
+                    os.makedirs(os.path.dirname(target))
+                source = archive.extractfile(member)
+                with open(target, "wb") as f:
+                    shutil.copyfileobj(source, f)
+                extracted += 1
+    except (tarfile.TarError, IOError, requests.RequestException) as ex:
+        raise SyncError("Could not read {0}: {1}".format(url, ex))
+    return extracted
+
+
+def targetPath(path, files):
+    for source, target in files:
+        if source.endswith("/"):
+            rest = path[len(source):]
+            if path.startswith(source) and rest and "/" not in rest:
+                return target + rest
+        elif path == source:
+            return target
+    return None
+
+
+def sync(dataRef="master", xmlRef="master", keep=None):
+    """ Download a new snapshot and make it the current one.
+    Returns the manifest of the snapshot.
+    """
+    if keep is None:
+        keep = settings.LICENSE_LIST_KEEP_SNAPSHOTS
+    if not os.path.isdir(snapshotsDir()):
+        os.makedirs(snapshotsDir())
+    """ Hidden while it is built, listSnapshots() skips it """
+    tmp = tempfile.mkdtemp(prefix=".sync-", dir=snapshotsDir())
+    try:
+        extractArchive(settings.LICENSE_LIST_DATA_ARCHIVE_URL.format(ref=dataRef), tmp, DATA_FILES)
+        extractArchive(settings.LICENSE_LIST_XML_ARCHIVE_URL.format(ref=xmlRef), tmp, XML_FILES)
+        try:
+            with open(os.path.join(tmp, "licenses.json")) as f:
+                licenses = json.load(f)
+            with open(os.path.join(tmp, "exceptions.json")) as f:
+                exceptions = json.load(f)
+        except (IOError, ValueError) as ex:
+            raise SyncError("The license list json files are missing or invalid: {0}".format(ex))
+        if not os.path.isfile(os.path.join(tmp, SCHEMA_FILE)):
+            raise SyncError("The license list XML schema is missing.")
+        manifest = {
+            "licenseListVersion": licenses["licenseListVersion"],
+            "dataRef": dataRef,
+            "xmlRef": xmlRef,
+            "synced": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "licenses": len(licenses["licenses"]),
+            "exceptions": len(exceptions["exceptions"]),
+        }
+        with open(os.path.join(tmp, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        name = "{0}_{1}".format(manifest["licenseListVersion"], datetime.utcnow().strftime("%Y%m%d%H%M%S"))
+        os.rename(tmp, os.path.join(snapshotsDir(), name))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    activate(name)
+    prune(keep)
+    manifest["snapshot"] = name
+    return manifest
+
+
+def prune(keep):
+    """ Remove the oldest snapshots, keeping keep of them and the current one """
+    current = currentSnapshot()
+    snapshots = listSnapshots()
+    for name in snapshots[:max(0, len(snapshots) - keep)]:
+        path = os.path.join(snapshotsDir(), name)
+        if path != current:
+            shutil.rmtree(path, ignore_errors=True)
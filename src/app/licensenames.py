@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" In memory search of the license and exception names and ids, for the
+autocomplete of the license name fields (app.views.autocompleteModel).
+
+The names come from the current snapshot of the local mirror
+(app.licenselist), else from the LicenseNames table filled by populate.py.
+The index is built again when the snapshot changes, and when the table
+changed, which is checked at most every settings.LICENSE_NAMES_REFRESH_INTERVAL
+seconds.
+
+A term matches the names which start with it, then those having a word
+which starts with it, found in a prefix trie of the words of the names.
+When they are fewer than asked for, the names sharing most of the
+trigrams of the term follow, which also finds the term inside a word or
+misspelt, then the names containing the term. Terms of SHORT_TERM
+characters or less have too few trigrams, they skip to the names
+containing them ("gpl" finds LGPL-2.1 and AGPL-3.0).
+
+`python manage.py populate_license_names` (or populate.py) fills the
+LicenseNames table from the license list with store(): one query reads the
+names stored, the missing ones are inserted in bulk and, with --rebuild, the
+ones no longer listed are deleted.
+"""
+
+from __future__ import unicode_literals
+
+import itertools
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+from app import licenselist
+from app.models import LicenseNames
+
+""" Characters of a suffix walked in the trie, longer terms are checked on
+the names found at that depth
+"""
+TRIE_DEPTH = 10
+""" Share of the trigrams of a term a name needs to be returned """
+MIN_SIMILARITY = 0.5
+""" Longest term looked up by substring only, without the trigrams """
+SHORT_TERM = 3
+MAX_LIMIT = 100
+""" Rows inserted or deleted by one query of store(), below the 999
+parameters of sqlite
+"""
+STORE_BATCH_SIZE = 500
+WORD_START = re.compile(r"(?:^|(?<=[\s\-_.,/()+]))\w", re.UNICODE)
+
+
+def fold(name):
+    return " ".join(name.lower().split())
+
+
+def trigrams(text):
+    padded = " {0} ".format(text)
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrieNode(object):
+    """ ids are the names having a word starting with the prefix of the
+    node, headIds those starting with it, both in rank order
+    """
+    __slots__ = ("children", "ids", "headIds")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+        self.headIds = []
+
+
+class NameIndex(object):
+    """ Prefix trie and trigram index of a list of names """
+
+    def __init__(self, names):
+        unique = {}
+        for name in names:
+            name = name.strip()
+            if name:
+                unique.setdefault(name, fold(name))
+        """ The shorter names first, they are the closer matches of a prefix """
+        self.names = sorted(unique, key=lambda name: (len(name), unique[name], name))
+        self.folded = [unique[name] for name in self.names]
+        self.byFolded = {}
+        for i, folded in enumerate(self.folded):
+            self.byFolded.setdefault(folded, i)
+        self.root = TrieNode()
+        self.trigrams = defaultdict(list)
+        for i, folded in enumerate(self.folded):
+            for start in sorted(set(match.start() for match in WORD_START.finditer(folded)) | set([0])):
+                self.insert(folded[start:start + TRIE_DEPTH], i, start == 0)
+            for trigram in trigrams(folded):
+                self.trigrams[trigram].append(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def insert(self, suffix, i, head):
+        node = self.root
+        for char in suffix:
+            node = node.children.setdefault(char, TrieNode())
+            """ Names are inserted in rank order, a name is only kept once per node """
+            if not node.ids or node.ids[-1] != i:
+                node.ids.append(i)
+            if head:
+                node.headIds.append(i)
+
+    def prefixMatches(self, term, limit):
+        """ The names equal to term, then starting with it, then having a
+        word starting with it, at most limit of them
+        """
+        node = self.root
+        for char in term[:TRIE_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found = []
+        seen = set()
+        exact = self.byFolded.get(term)
+        for i in itertools.chain([exact] if exact is not None else [], node.headIds, node.ids):
+            if len(found) == limit:
+                break
+            if i in seen:
+                continue
+            seen.add(i)
+            if len(term) <= TRIE_DEPTH or self.hasWordPrefix(self.folded[i], term):
+                found.append(i)
+        return found
+
+    def hasWordPrefix(self, folded, term):
+        return any(folded.startswith(term, match.start()) for match in WORD_START.finditer(folded))
+
+    def trigramMatches(self, term, exclude, limit):
+        grams = trigrams(term)
+        counts = defaultdict(int)
+        for trigram in grams:
+            for i in self.trigrams.get(trigram, ()):
+                counts[i] += 1
+        needed = max(1, int(len(grams) * MIN_SIMILARITY + 0.5))
+        found = [(-count, i) for i, count in counts.items() if count >= needed and i not in exclude]
+        found.sort()
+        return [i for count, i in found[:limit]]
+
+    def substringMatches(self, term, exclude, limit):
+        found = []
+        for i, folded in enumerate(self.folded):
+            if len(found) == limit:
+                break
+            if term in folded and i not in exclude:
+                found.append(i)
+        return found
+
+    def search(self, term, limit):
+        """ The names matching term, the best first, at most limit of them """
+        term = fold(term)
+        if not term or limit <= 0:
+            return []
+        ids = self.prefixMatches(term, limit)
+        if len(ids) < limit and len(term) > SHORT_TERM:
+            ids.extend(self.trigramMatches(term, set(ids), limit - len(ids)))
+        if len(ids) < limit:
+            ids.extend(self.substringMatches(term, set(ids), limit - len(ids)))
+        return [self.names[i] for i in ids]
+
+
+def namesOf(licenseData, exceptionData):
+    """ Names and ids of the licenses of licenses.json and the exceptions of
+    exceptions.json, either can be None
+    """
+    names = []
+    for license in (licenseData or {}).get("licenses", []):
+        names.extend((license["name"], license["licenseId"]))
+    for exception in (exceptionData or {}).get("exceptions", []):
+        names.extend((exception["name"], exception["licenseExceptionId"]))
+    return names
+
+
+def listedNames():
+    """ Names and ids of the mirrored licenses and exceptions """
+    return namesOf(licenselist.getLicenses(), licenselist.getExceptions())
+
+
+def store(names, rebuild=False):
+    """ Add the names missing from the LicenseNames table, and with rebuild
+    remove the rows whose name is not in names, in one transaction.
+    Returns the numbers of names added and removed.
+    """
+    names = set(name.strip() for name in names if name.strip())
+    with transaction.atomic():
+        existing = set(LicenseNames.objects.select_for_update().values_list("name", flat=True))
+        added = sorted(names - existing)
+        LicenseNames.objects.bulk_create([LicenseNames(name=name) for name in added], batch_size=STORE_BATCH_SIZE)
+        removed = sorted(existing - names) if rebuild else []
+        for start in range(0, len(removed), STORE_BATCH_SIZE):
+            LicenseNames.objects.filter(name__in=removed[start:start + STORE_BATCH_SIZE]).delete()
+    reset()
+    return len(added), len(removed)
+
+
+def tableVersion():
+    """ Changes whenever rows of LicenseNames are added or removed """
+    state = LicenseNames.objects.aggregate(count=Count("id"), last=Max("id"))
+    return (state["count"], state["last"])
+
+
+_index = None
+_source = None
+_checked = 0
+_lock = threading.Lock()
+
+
+def getIndex():
+    """ Returns the NameIndex of the names in use """
+    global _index, _source, _checked
+    snapshot = licenselist.currentSnapshot()
+    index = _index
+    if index is not None:
+        if snapshot is not None and _source == snapshot:
+            return index
+        """ Built from the table, whose version is a tuple """
+        if snapshot is None and isinstance(_source, tuple) and (
+                time.time() - _checked < settings.LICENSE_NAMES_REFRESH_INTERVAL):
+            return index
+    with _lock:
+        if snapshot is not None:
+            if _index is None or _source != snapshot:
+                _index = NameIndex(listedNames())
+                _source = snapshot
+            return _index
+        version = tableVersion()
+        if _index is None or _source != version:
+            _index = NameIndex(LicenseNames.objects.values_list("name", flat=True))
+            _source = version
+        _checked = time.time()
+        return _index
+
+
+def search(term, limit=None):
+    """ The names matching term, at most limit (settings.LICENSE_NAMES_LIMIT
+    by default, MAX_LIMIT at most)
+    """
+    if limit is None:
+        limit = settings.LICENSE_NAMES_LIMIT
+    return getIndex().search(term, min(limit, MAX_LIMIT))
+
+
+def reset():
+    """ Drop the index, the next getIndex() builds it again """
+    global _index, _source, _checked
+    with _lock:
+        _index = None
+        _source = None
+        _checked = 0
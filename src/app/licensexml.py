@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Fields of a license XML (the xml of LicenseRequest and LicenseNamespace).
+
+The XML is read in one iterparse pass which keeps the first element of
+each field, in document order as the findall calls of parseXmlString did.
+The records are memoized by the sha1 of the XML, the license request pages
+and the matching of the license requests read the same rows again and again.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import re
+import threading
+import xml.etree.cElementTree as ET
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+
+from django.conf import settings
+
+from app import minhash
+
+NAMESPACE = "http://www.spdx.org/license"
+LICENSE = "{%s}license" % NAMESPACE
+CROSS_REFS = "{%s}crossRefs" % NAMESPACE
+NOTES = "{%s}notes" % NAMESPACE
+HEADER = "{%s}standardLicenseHeader" % NAMESPACE
+TEXT = "{%s}text" % NAMESPACE
+
+TEXT_START = '<text xmlns="%s">' % NAMESPACE
+TEXT_END = "</text>"
+TAGS = re.compile("<.*?>")
+""" cElementTree wants native strings for the event names """
+EVENTS = (str("start"), str("end"))
+
+""" osiApproved is the isOsiApproved attribute of the first license, '-'
+without it. text is the content of the text element as XML, plainText the
+same without its tags.
+"""
+LicenseXml = namedtuple("LicenseXml", ["osiApproved", "crossRefs", "notes", "standardLicenseHeader", "text", "plainText"])
+
+
+def textXml(element):
+    """ Content of the text element, serialized without the element itself """
+    ET.register_namespace("", NAMESPACE)
+    textStr = ET.tostring(element).decode("ascii").strip()
+    if len(textStr) >= 49 and textStr[:42] == TEXT_START and textStr[-7:] == TEXT_END:
+        textStr = textStr[42:]
+        textStr = textStr[:-7].strip().replace("&lt;", "<").replace("&gt;", ">").strip()
+    return textStr.strip()
+
+
+def extract(xmlString):
+    """ Returns the LicenseXml of xmlString.
+    Raises ET.ParseError if it is not well formed.
+    """
+    xmlString = toBytes(xmlString)
+    osiApproved = "-"
+    firstChild = True
+    fields = {}
+    depth = 0
+    parent = None
+    for event, element in ET.iterparse(BytesIO(xmlString), events=EVENTS):
+        if event == "start":
+            depth += 1
+            if depth == 2:
+                parent = element.tag
+                if firstChild:
+                    osiApproved = element.get("isOsiApproved", "-")
+                    firstChild = False
+            continue
+        if depth == 3 and parent == LICENSE and element.tag not in fields:
+            fields[element.tag] = element
+        depth -= 1
+    crossRefs = fields.get(CROSS_REFS)
+    text = textXml(fields[TEXT]) if TEXT in fields else ""
+    return LicenseXml(
+        osiApproved=osiApproved,
+        crossRefs=tuple(crossRef.text for crossRef in crossRefs) if crossRefs is not None else (),
+        notes=fields[NOTES].text if NOTES in fields else "",
+        standardLicenseHeader=fields[HEADER].text if HEADER in fields else "",
+        text=text,
+        plainText=TAGS.sub("", text),
+        )
+
+
+_cache = OrderedDict()
+_cacheLock = threading.Lock()
+
+
+def toBytes(xmlString):
+    return xmlString if isinstance(xmlString, bytes) else xmlString.encode("utf-8")
+
+
+def xmlHash(xmlString):
+    return hashlib.sha1(toBytes(xmlString)).hexdigest()
+
+
+def parse(xmlString):
+    """ extract() memoized by the sha1 of xmlString, keeping the
+    settings.LICENSE_XML_CACHE_SIZE most recently used records
+    """
+    data = toBytes(xmlString)
+    key = xmlHash(data)
+    with _cacheLock:
+        record = _cache.pop(key, None)
+        if record is not None:
+            _cache[key] = record
+            return record
+    record = extract(data)
+    with _cacheLock:
+        _cache[key] = record
+        while len(_cache) > settings.LICENSE_XML_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return record
+
+
+def clearCache():
+    with _cacheLock:
+        _cache.clear()
+
+
+def textFields(xmlString):
+    """ Returns the (plainText, xmlHash, fingerprint) stored with a license
+    request: the text without its tags, the sha1 of the XML and the MinHash
+    fingerprint of the normalized text. The plain text of an XML that can
+    not be parsed is empty.
+    """
+    try:
+        plainText = parse(xmlString).plainText
+    except ET.ParseError:
+        plainText = ""
+    return plainText, xmlHash(xmlString), minhash.fingerprint(minhash.normalize(plainText))
+
+
+def backfill(model, recompute=False, batchSize=200):
+    """ Store the text fields of the rows of model, LicenseRequest or
+    LicenseNamespace (also their migration models, save() is not called).
+    Only the rows without fingerprint unless recompute.
+    Returns the number of rows updated.
+    """
+    rows = model.objects.all() if recompute else model.objects.filter(fingerprint="")
+    pks = list(rows.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(pks), batchSize):
+        batch = model.objects.filter(pk__in=pks[start:start + batchSize]).values_list("pk", "xml")
+        for pk, xml in batch:
+            plainText, hash, fingerprint = textFields(xml)
+            model.objects.filter(pk=pk).update(plainText=plainText, xmlHash=hash, fingerprint=fingerprint)
+    return len(pks)
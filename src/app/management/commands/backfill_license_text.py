@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app import licensexml
+from app.models import LicenseNamespace, LicenseRequest
+
+
+class Command(BaseCommand):
+    help = "Compute the plain text, XML hash and fingerprint of the license and namespace requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true",
+            help="Compute them again for every request, not only the ones without fingerprint")
+
+    def handle(self, *args, **options):
+        for model in [LicenseRequest, LicenseNamespace]:
+            with transaction.atomic():
+                count = licensexml.backfill(model, recompute=options["all"])
+            self.stdout.write("{0}: {1} rows updated".format(model._meta.verbose_name_plural, count))
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import unicode_literals
+
+import time
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from app import licenseindex, licenselist, licensenames
+
+
+class Command(BaseCommand):
+    help = "Store the names and ids of the listed licenses and exceptions used by the license name autocomplete"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true",
+            help="Also remove the names which are no longer in the license list")
+
+    def handle(self, *args, **options):
+        started = time.time()
+        if licenselist.isSynced():
+            licenseData, exceptionData = licenselist.getLicenses(), licenselist.getExceptions()
+        else:
+            try:
+                licenseData = licenseindex.fetchJson("licenses.json")
+                exceptionData = licenseindex.fetchJson("exceptions.json")
+            except requests.RequestException as ex:
+                raise CommandError("Could not download the license list: {0}".format(ex))
+        names = licensenames.namesOf(licenseData, exceptionData)
+        read = time.time()
+        self.stdout.write("License list {0}: {1} names read in {2:.2f}s".format(
+            licenseData.get("licenseListVersion"), len(names), read - started))
+        added, removed = licensenames.store(names, rebuild=options["rebuild"])
+        self.stdout.write("{0} names added, {1} removed in {2:.2f}s".format(added, removed, time.time() - read))
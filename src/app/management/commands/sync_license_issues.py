@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import unicode_literals
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from app import licenseissues
+
+
+class Command(BaseCommand):
+    help = "Update the local index of the issues of the license request repositories"
+
+    def add_arguments(self, parser):
+        parser.add_argument("repositories", nargs="*", metavar="OWNER/NAME",
+            help="Repositories to sync, by default those of settings.REPO_URL, DEV_REPO_URL and PROD_REPO_URL")
+        parser.add_argument("--full", action="store_true",
+            help="Read all the issues again instead of those updated since the last sync")
+
+    def handle(self, *args, **options):
+        repositories = options["repositories"] or sorted(licenseissues.knownRepositories())
+        for repository in repositories:
+            try:
+                count = licenseissues.sync(repository, full=options["full"])
+            except requests.RequestException as ex:
+                raise CommandError("Could not sync the issues of {0}: {1}".format(repository, ex))
+            self.stdout.write("{0}: {1} issues read".format(repository, count))
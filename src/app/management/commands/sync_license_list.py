@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app import licenselist
+
+
+class Command(BaseCommand):
+    help = "Update the local mirror of the SPDX license list (license-list-data and license-list-XML)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data-ref", default="master",
+            help="Branch or tag of spdx/license-list-data to mirror")
+        parser.add_argument("--xml-ref", default="master",
+            help="Branch or tag of spdx/license-list-XML to mirror")
+        parser.add_argument("--keep", type=int, default=settings.LICENSE_LIST_KEEP_SNAPSHOTS,
+            help="Number of snapshots to keep")
+        parser.add_argument("--list", action="store_true",
+            help="List the snapshots instead of syncing")
+        parser.add_argument("--activate", metavar="SNAPSHOT",
+            help="Go back to a previous snapshot instead of syncing")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            current = licenselist.currentSnapshot()
+            for name in licenselist.listSnapshots():
+                marker = "*" if current and current.endswith(name) else " "
+                self.stdout.write("{0} {1}".format(marker, name))
+            return
+        if options["activate"]:
+            try:
+                licenselist.activate(options["activate"])
+            except licenselist.SyncError as ex:
+                raise CommandError(str(ex))
+            self.stdout.write("Using snapshot {0}".format(options["activate"]))
+            return
+        try:
+            manifest = licenselist.sync(options["data_ref"], options["xml_ref"], options["keep"])
+        except licenselist.SyncError as ex:
+            raise CommandError(str(ex))
+        self.stdout.write("License list {licenseListVersion}: {licenses} licenses and "
+            "{exceptions} exceptions mirrored in snapshot {snapshot}".format(**manifest))
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 13:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_sync_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='licensenamespace',
+            name='fingerprint',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='licensenamespace',
+            name='plainText',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='licensenamespace',
+            name='xmlHash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='licenserequest',
+            name='fingerprint',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='licenserequest',
+            name='plainText',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='licenserequest',
+            name='xmlHash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+    ]
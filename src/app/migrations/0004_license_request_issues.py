@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 13:08
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_license_text_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicenseIssueSync',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repository', models.CharField(max_length=100, unique=True)),
+                ('synced', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LicenseRequestIssue',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repository', models.CharField(max_length=100)),
+                ('number', models.IntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('url', models.URLField(max_length=250)),
+                ('state', models.CharField(max_length=10)),
+                ('labels', models.TextField(default='[]')),
+                ('shortIdentifier', models.CharField(blank=True, db_index=True, default='', max_length=100)),
+                ('updated', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'LicenseRequestIssue',
+                'verbose_name_plural': 'LicenseRequestIssues',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='licenserequestissue',
+            unique_together=set([('repository', 'number')]),
+        ),
+    ]
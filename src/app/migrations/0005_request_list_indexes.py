@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 13:15
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_license_request_issues'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='licensenamespace',
+            name='shortIdentifier',
+            field=models.CharField(db_index=True, max_length=25),
+        ),
+        migrations.AlterField(
+            model_name='licenserequest',
+            name='shortIdentifier',
+            field=models.CharField(db_index=True, max_length=25),
+        ),
+        migrations.AddIndex(
+            model_name='licenserequest',
+            index=models.Index(fields=['archive', '-submissionDatetime', '-id'], name='app_licreq_archive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='licensenamespace',
+            index=models.Index(fields=['archive', '-submissionDatetime', '-id'], name='app_licns_archive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='licensenamespace',
+            index=models.Index(fields=['promoted', '-submissionDatetime', '-id'], name='app_licns_promoted_idx'),
+        ),
+    ]
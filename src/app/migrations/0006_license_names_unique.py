@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 13:23
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def removeDuplicates(apps, schema_editor):
+    """ Keep the first row of each name, the constraint would fail on the others """
+    LicenseNames = apps.get_model("app", "LicenseNames")
+    kept = LicenseNames.objects.values("name").annotate(first=Min("id")).values_list("first", flat=True)
+    LicenseNames.objects.exclude(id__in=list(kept)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_request_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(removeDuplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='licensenames',
+            name='name',
+            field=models.CharField(max_length=200, unique=True),
+        ),
+    ]
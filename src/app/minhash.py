@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" MinHash/LSH index used to find the license texts that may match a text.
+
+Every text is cut in overlapping shingles of SHINGLE_SIZE words and
+summarized by a MinHash signature of NUM_PERM values. The signatures are
+split in BANDS bands of ROWS values, two texts sharing one band are
+candidates. With 32 bands of 4 rows a text whose shingles overlap 50% with
+a license finds it 87% of the time, at 60% it is found 99% of the time,
+which is well below the similarity get_close_matches asks for.
+Querying costs one signature and BANDS dict lookups whatever the number of
+indexed texts, the full similarity is then only computed on the candidates.
+"""
+
+from __future__ import unicode_literals
+
+import binascii
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+BANDS = 32
+ROWS = 4
+
+""" Universal hashing h(x) = (a * x + b) mod p, truncated to 32 bits """
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+""" Fixed seed, the signatures must be the same in every process """
+_random = np.random.RandomState(1)
+PERM_A = _random.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+PERM_B = _random.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+WHITESPACE = re.compile(r"\s+", re.UNICODE)
+
+
+def toUnicode(text):
+    if isinstance(text, bytes):
+        return text.decode("utf-8", "replace")
+    return text
+
+
+def normalize(text):
+    """ The text in lower case with the white space collapsed """
+    return WHITESPACE.sub(" ", toUnicode(text)).strip().lower()
+
+
+def shingles(normalized):
+    """ Set of the SHINGLE_SIZE words shingles of a normalized text,
+    the text itself when it is shorter than a shingle
+    """
+    words = normalized.split()
+    if len(words) < SHINGLE_SIZE:
+        return set([" ".join(words)])
+    return set(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+
+
+def signature(normalized):
+    """ MinHash signature of a normalized text, an array of NUM_PERM values """
+    hashes = np.array(
+        [zlib.crc32(shingle.encode("utf-8")) & 0xffffffff for shingle in shingles(normalized)],
+        dtype=np.uint64)
+    """ One row per shingle, one column per permutation """
+    permuted = np.bitwise_and((np.outer(hashes, PERM_A) + PERM_B) % MERSENNE_PRIME, MAX_HASH)
+    return permuted.min(axis=0)
+
+
+def fingerprint(normalized):
+    """ The signature of a normalized text as a string, to be stored """
+    return binascii.hexlify(signature(normalized).astype("<u4").tobytes()).decode("ascii")
+
+
+def fromFingerprint(value):
+    """ The signature stored by fingerprint() """
+    return np.frombuffer(binascii.unhexlify(value), dtype="<u4").astype(np.uint64)
+
+
+def bandKeys(sig):
+    return [sig[band * ROWS:(band + 1) * ROWS].tobytes() for band in range(BANDS)]
+
+
+def estimateSimilarity(sig1, sig2):
+    """ Estimated Jaccard similarity of the shingles of two texts """
+    return float(np.count_nonzero(sig1 == sig2)) / NUM_PERM
+
+
+class MinHashIndex(object):
+    """ LSH index of texts by key. Texts are expected normalized, see
+    app.licensecorpus.normalize
+    """
+
+    def __init__(self):
+        self.signatures = {}
+        self.digests = {}
+        self.buckets = [{} for band in range(BANDS)]
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __contains__(self, key):
+        return key in self.signatures
+
+    def add(self, key, normalized, sig=None):
+        """ Index normalized under key, re-indexing it if the text changed.
+        sig is its signature when it is already known.
+        """
+        digest = hashlib.sha1(normalized.encode("utf-8")).digest()
+        if self.digests.get(key) == digest:
+            return
+        self.remove(key)
+        if sig is None:
+            sig = signature(normalized)
+        self.signatures[key] = sig
+        self.digests[key] = digest
+        for band, bandKey in enumerate(bandKeys(sig)):
+            self.buckets[band].setdefault(bandKey, set()).add(key)
+
+    def remove(self, key):
+        sig = self.signatures.pop(key, None)
+        if sig is None:
+            return
+        del self.digests[key]
+        for band, bandKey in enumerate(bandKeys(sig)):
+            bucket = self.buckets[band][bandKey]
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[band][bandKey]
+
+    def sync(self, data, signatures=None):
+        """ Make the index hold exactly data, {key: normalized text}.
+        Only the new and changed texts are hashed, or taken from signatures,
+        {key: signature}, when they are there.
+        """
+        signatures = signatures or {}
+        for key in set(self.signatures) - set(data):
+            self.remove(key)
+        for key, normalized in data.items():
+            self.add(key, normalized, signatures.get(key))
+
+    def query(self, normalized):
+        """ Keys of the texts sharing at least one band with normalized """
+        candidates = set()
+        for band, bandKey in enumerate(bandKeys(signature(normalized))):
+            candidates.update(self.buckets[band].get(bandKey, ()))
+        return candidates
@@ -12,11 +12,14 @@
 # limitations under the License.
 
 from __future__ import unicode_literals
+import json
 from django.db import models
 from datetime import datetime
 from django import forms
 from django.contrib.auth.models import User
 
+from app import licensexml
+
 class UserID(models.Model):
     user = models.OneToOneField(User)
     organisation = models.CharField("Organisation",max_length=64, null=False, blank=False)
@@ -25,21 +28,39 @@ class UserID(models.Model):
         return self.user.username
 
 class LicenseNames(models.Model):
-    name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200, unique=True)
 
 class License(models.Model):
     licenseAuthorName = models.CharField(max_length=100, default="", blank=True, null=True)
     fullname = models.CharField(max_length=70)
-    shortIdentifier = models.CharField(max_length=25)
+    shortIdentifier = models.CharField(max_length=25, db_index=True)
     submissionDatetime = models.DateTimeField(auto_now_add=True)
     userEmail = models.EmailField(max_length=35)
     notes = models.CharField(max_length=255, default="")
     xml = models.TextField()
     archive = models.BooleanField(default=False)
+    # Computed from xml on save, see updateTextFields()
+    plainText = models.TextField(default="", blank=True)
+    xmlHash = models.CharField(max_length=40, default="", blank=True, db_index=True)
+    fingerprint = models.TextField(default="", blank=True)
 
     class Meta:
         abstract = True
 
+    def updateTextFields(self):
+        """ Compute plainText, xmlHash and fingerprint again if xml changed.
+        Returns True if they were computed.
+        """
+        if self.fingerprint and self.xmlHash == licensexml.xmlHash(self.xml):
+            return False
+        self.plainText, self.xmlHash, self.fingerprint = licensexml.textFields(self.xml)
+        return True
+
+    def save(self, *args, **kwargs):
+        if self.updateTextFields() and kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | set(["plainText", "xmlHash", "fingerprint"])
+        super(License, self).save(*args, **kwargs)
+
 class LicenseRequest(License):
 
     def __unicode__(self):
@@ -50,6 +71,10 @@ class LicenseRequest(License):
     class Meta:
         verbose_name = "LicenseRequest"
         verbose_name_plural = "LicenseRequests"
+        # The request lists filter on archive, newest first
+        indexes = [
+            models.Index(fields=["archive", "-submissionDatetime", "-id"], name="app_licreq_archive_idx"),
+        ]
 
 
 class OrganisationName(models.Model):
@@ -87,3 +112,42 @@ class LicenseNamespace(License):
     class Meta:
         verbose_name = "LicenseNamespace"
         verbose_name_plural = "LicenseNamespaces"
+        # The namespace lists filter on archive or promoted, newest first
+        indexes = [
+            models.Index(fields=["archive", "-submissionDatetime", "-id"], name="app_licns_archive_idx"),
+            models.Index(fields=["promoted", "-submissionDatetime", "-id"], name="app_licns_promoted_idx"),
+        ]
+
+
+class LicenseRequestIssue(models.Model):
+    """ GitHub issue of a license request repository, see app.licenseissues """
+    repository = models.CharField(max_length=100)
+    number = models.IntegerField()
+    title = models.CharField(max_length=255)
+    url = models.URLField(max_length=250)
+    state = models.CharField(max_length=10)
+    # JSON list of the label names
+    labels = models.TextField(default="[]")
+    # Short identifier of the requested license, "" if the tools did not open the issue
+    shortIdentifier = models.CharField(max_length=100, default="", blank=True, db_index=True)
+    updated = models.DateTimeField()
+
+    def __unicode__(self):
+        return "%s#%d" % (self.repository, self.number)
+
+    def __str__(self):
+        return "{0}#{1}".format(self.repository, self.number)
+
+    def labelNames(self):
+        return json.loads(self.labels)
+
+    class Meta:
+        verbose_name = "LicenseRequestIssue"
+        verbose_name_plural = "LicenseRequestIssues"
+        unique_together = ("repository", "number")
+
+
+class LicenseIssueSync(models.Model):
+    """ Start time of the last sync of the issues of a repository """
+    repository = models.CharField(max_length=100, unique=True)
+    synced = models.DateTimeField()
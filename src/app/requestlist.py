@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Keyset pagination and filtering of the license request lists.
+
+The lists are ordered by submissionDatetime then id, newest first. A page
+starts after the (submissionDatetime, id) of the last row of the previous
+page, carried by an opaque cursor, so reading a page costs the same at any
+depth and the requests filed meanwhile do not shift the pages. The filters
+(identifier, author and submission dates) are applied in SQL.
+"""
+
+from __future__ import unicode_literals
+
+import base64
+import datetime
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from app.models import LicenseNamespace, LicenseRequest
+
+""" Columns rendered by the request lists, the xml and the text fields are not read """
+LIST_FIELDS = ("fullname", "licenseAuthorName", "shortIdentifier", "submissionDatetime")
+
+""" A request list: its model, the rows it shows, the other columns it
+renders and the template of its rows
+"""
+RequestList = namedtuple("RequestList", ["model", "filters", "extraFields", "rowTemplate"])
+
+LISTS = {
+    "license_requests": RequestList(LicenseRequest, {"archive": False}, (), "app/rows/request_rows.html"),
+    "archive_requests": RequestList(LicenseRequest, {"archive": True}, (), "app/rows/archived_rows.html"),
+    "license_namespace_requests": RequestList(LicenseNamespace, {"archive": False}, ("promoted",), "app/rows/namespace_rows.html"),
+    "archive_namespace_requests": RequestList(LicenseNamespace, {"archive": True}, (), "app/rows/archived_rows.html"),
+    "promoted_namespace_requests": RequestList(LicenseNamespace, {"promoted": True}, (), "app/rows/archived_rows.html"),
+}
+
+FILTERS = ("identifier", "author", "from", "to")
+
+""" The rows of a page, the cursor of the next page (None on the last one)
+and the filters applied
+"""
+Page = namedtuple("Page", ["rows", "next", "filters"])
+
+
+def encodeCursor(row):
+    value = "{0}|{1}".format(row.submissionDatetime.isoformat(), row.pk)
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+
+def decodeCursor(cursor):
+    """ (submissionDatetime, id) of a cursor. Raises ValueError if it is not one """
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        submitted, pk = value.rsplit("|", 1)
+        submitted = parse_datetime(submitted)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor.")
+    if submitted is None:
+        raise ValueError("Invalid cursor.")
+    return submitted, pk
+
+
+def parseDate(value, name):
+    date = parse_date(value)
+    if date is None:
+        raise ValueError("Invalid {0} date, expected YYYY-MM-DD.".format(name))
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time()), timezone.get_current_timezone())
+
+
+def getFilters(params):
+    """ The non empty filters of the query parameters params """
+    return dict((name, params[name].strip()) for name in FILTERS if params.get(name, "").strip())
+
+
+def filterRows(queryset, filters):
+    """ Apply the filters: identifier and author are matched ignoring the
+    case, from and to are dates, both included.
+    Raises ValueError for an invalid date.
+    """
+    if "identifier" in filters:
+        queryset = queryset.filter(shortIdentifier__icontains=filters["identifier"])
+    if "author" in filters:
+        queryset = queryset.filter(licenseAuthorName__icontains=filters["author"])
+    if "from" in filters:
+        queryset = queryset.filter(submissionDatetime__gte=parseDate(filters["from"], "from"))
+    if "to" in filters:
+        queryset = queryset.filter(submissionDatetime__lt=parseDate(filters["to"], "to") + datetime.timedelta(days=1))
+    return queryset
+
+
+def pageSize(params):
+    try:
+        limit = int(params.get("limit", settings.REQUEST_LIST_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("Invalid limit.")
+    return max(1, min(limit, settings.REQUEST_LIST_MAX_PAGE_SIZE))
+
+
+def pageQuery(listName, params, limit):
+    """ The query of the rows of a page of the request list listName, at
+    most limit of them, after the cursor of the query parameters params.
+    Raises ValueError for invalid parameters.
+    """
+    requestList = LISTS[listName]
+    queryset = filterRows(requestList.model.objects.filter(**requestList.filters), getFilters(params))
+    if params.get("cursor"):
+        submitted, pk = decodeCursor(params["cursor"])
+        queryset = queryset.filter(Q(submissionDatetime__lt=submitted) | Q(submissionDatetime=submitted, pk__lt=pk))
+    return queryset.only(*(LIST_FIELDS + requestList.extraFields)).order_by("-submissionDatetime", "-pk")[:limit]
+
+
+def getPage(listName, params):
+    """ The page of the request list listName selected by the query
+    parameters params: the filters, cursor and limit.
+    Raises ValueError for invalid parameters.
+    """
+    limit = pageSize(params)
+    rows = list(pageQuery(listName, params, limit + 1))
+    nextCursor = encodeCursor(rows[limit - 1]) if len(rows) > limit else None
+    return Page(rows[:limit], nextCursor, getFilters(params))
+
+
+def rowData(row, requestList):
+    data = {
+        "id": row.pk,
+        "fullname": row.fullname,
+        "shortIdentifier": row.shortIdentifier,
+        "licenseAuthorName": row.licenseAuthorName,
+        "submissionDatetime": row.submissionDatetime.isoformat(),
+    }
+    for name in requestList.extraFields:
+        data[name] = getattr(row, name)
+    return data
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Compiled SPDX License XML Schema used to validate the editor XML.
+
+The schema text is read once from the local license list mirror
+(app.licenselist), else from GitHub, else from examples/xml-schema.xsd, and
+compiled once per thread and schema version (lxml validators keep their
+error log and must not be shared between threads). Past
+settings.XML_SCHEMA_REFRESH_INTERVAL seconds, or when the mirror switches to
+another snapshot, the text is read again in a background thread while the
+requests keep using the schema they have.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from django.conf import settings
+from lxml import etree
+
+from app import githubclient, licenselist
+
+SCHEMA_URL = "https://raw.githubusercontent.com/spdx/license-list-XML/master/schema/ListedLicense.xsd"
+
+logger = logging.getLogger(__name__)
+
+""" The text of the schema, its version (sha1 of the text), where it was read
+from and when
+"""
+SchemaSource = namedtuple("SchemaSource", ["version", "text", "origin", "loaded"])
+
+
+def fallbackPath():
+    return os.path.join(settings.BASE_DIR, "examples", "xml-schema.xsd")
+
+
+def makeSource(text, origin):
+    return SchemaSource(hashlib.sha1(text).hexdigest(), text, origin, time.time())
+
+
+def readSchemaFile(path):
+    with open(path, "rb") as f:
+        return makeSource(f.read(), path)
+
+
+def loadSource():
+    """ Read the schema from the mirror, GitHub or the examples folder """
+    path = licenselist.getSchemaPath()
+    if path is not None:
+        try:
+            return readSchemaFile(path)
+        except IOError:
+            logger.exception("Could not read the mirrored XML schema")
+    try:
+        response = githubclient.get(SCHEMA_URL, timeout=settings.XML_SCHEMA_TIMEOUT)
+        response.raise_for_status()
+        """ Make sure it is XML before replacing a working schema with it """
+        etree.fromstring(response.content)
+        return makeSource(response.content, SCHEMA_URL)
+    except (requests.RequestException, etree.XMLSyntaxError):
+        logger.warning("Could not download the XML schema, using %s", fallbackPath())
+    return readSchemaFile(fallbackPath())
+
+
+_source = None
+_refreshing = False
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def isOutdated(source):
+    if time.time() - source.loaded > settings.XML_SCHEMA_REFRESH_INTERVAL:
+        return True
+    path = licenselist.getSchemaPath()
+    return path is not None and path != source.origin
+
+
+def refresh():
+    global _source, _refreshing
+    try:
+        source = loadSource()
+        current = _source
+        if source.origin == fallbackPath() and current is not None and current.origin != fallbackPath():
+            """ Keep the schema we have rather than the older local copy """
+            source = current._replace(loaded=time.time())
+        _source = source
+    except Exception:
+        logger.exception("Could not refresh the XML schema")
+    finally:
+        _refreshing = False
+
+
+def startRefresh():
+    global _refreshing
+    with _lock:
+        if _refreshing:
+            return
+        _refreshing = True
+    thread = threading.Thread(target=refresh, name="xml-schema-refresh")
+    thread.daemon = True
+    thread.start()
+
+
+def getSource():
+    """ Returns the schema text, reading it on first use """
+    global _source
+    source = _source
+    if source is None:
+        with _lock:
+            if _source is None:
+                _source = loadSource()
+            return _source
+    if isOutdated(source):
+        startRefresh()
+    return source
+
+
+def getSchema():
+    """ Returns the compiled etree.XMLSchema of this thread """
+    source = getSource()
+    if getattr(_local, "version", None) != source.version:
+        _local.schema = etree.XMLSchema(etree.fromstring(source.text, base_url=source.origin))
+        _local.version = source.version
+    return _local.schema
+
+
+def validate(xmlText):
+    """ Validate the XML text, bytes, against the schema.
+    Raises etree.XMLSyntaxError if it is not well formed and
+    etree.DocumentInvalid if it is not valid.
+    """
+    getSchema().assertValid(etree.fromstring(xmlText))
+
+
+def prewarm():
+    getSchema()
+
+
+def reset():
+    """ Drop the schema, the next getSchema() reads it again """
+    global _source
+    with _lock:
+        _source = None
+    _local.__dict__.clear()
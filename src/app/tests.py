@@ -1,15 +1,29 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from unittest import skipIf
 from src.secret import getAccessToken, getGithubUserId, getGithubUserName
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.utils import six
+from django.utils.six.moves import BaseHTTPServer
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
 
 import jpype
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import tempfile
+import threading
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
@@ -17,10 +31,26 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.firefox.options import Options
 import time
+from lxml import etree
 
 from app.models import UserID
-from app.models import LicenseRequest, LicenseNamespace
+from app.models import LicenseRequest, LicenseNamespace, LicenseIssueSync, LicenseRequestIssue, LicenseNames
 from app.generateXml import generateLicenseXml
+from app import generateXml
+from app import jvm
+from app import toolpool
+from app.licensecorpus import LicenseCorpus
+from app import minhash
+from app import licenselist
+from app import licenseindex
+from app import schemacache
+from app import formatxml
+from app import licensexml
+from app import utils
+from app import licenseissues
+from app import githubclient
+from app import licensenames
+from app import requestlist
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from social_django.models import UserSocialAuth
@@ -227,6 +257,287 @@ class ValidateViewsTestCase(TestCase):
         self.client.logout()
 
 
+class JVMBridgeTestCase(TestCase):
+
+    def test_attach(self):
+        """The JVM is started once and the tool classes are cached"""
+        tools = jvm.attach()
+        self.assertTrue(jpype.isJVMStarted())
+        self.assertTrue(jpype.isThreadAttachedToJVM())
+        self.assertIs(tools.Verify, jvm.attach().Verify)
+        self.assertIs(tools.LicenseCompareHelper, jvm.getClass("LicenseCompareHelper"))
+
+    def test_unknown_class(self):
+        """Only the classes listed in TOOL_CLASSES are exposed"""
+        tools = jvm.attach()
+        with self.assertRaises(AttributeError):
+            tools.NotATool
+
+
+def noJVM():
+    pass
+
+
+def crashTool(className, methodName, args, token=None):
+    """Stands for a JVM crash in the tool worker"""
+    toolpool.jobStarted(token)
+    os._exit(1)
+
+
+class ToolPoolTestCase(TestCase):
+
+    def test_messages(self):
+        """The tool warnings are printed like the java List"""
+        messages = toolpool.ToolMessages(["first", "second"])
+        self.assertEqual(unicode(messages), "[first, second]")
+        self.assertEqual(str(toolpool.ToolMessages()), "[]")
+
+    def test_error(self):
+        """A failing tool call raises ToolError instead of a java exception"""
+        with self.assertRaises(toolpool.ToolError):
+            toolpool.getTools().Verify.verify("examples/does-not-exist.rdf")
+
+    def test_failure(self):
+        """An error outside of the java code is a ToolFailure, not a tool verdict"""
+        with self.assertRaises(toolpool.ToolFailure):
+            toolpool.unwrap((toolpool.FAILED, "Traceback"))
+        with self.assertRaises(toolpool.ToolError) as raised:
+            toolpool.unwrap((toolpool.ERROR, "Invalid document"))
+        self.assertNotIsInstance(raised.exception, toolpool.ToolFailure)
+
+    def test_unknown_class(self):
+        with self.assertRaises(AttributeError):
+            toolpool.getTools().NotATool
+
+    @override_settings(SPDX_TOOL_WORKERS=1)
+    def test_dead_worker(self):
+        """A job whose worker dies fails at once with ToolFailure, not after the timeout"""
+        if jpype.isJVMStarted():
+            self.skipTest("The tool workers cannot be forked from a process running a JVM")
+        startJVM, runTool = jvm.startJVM, toolpool.runTool
+        jvm.startJVM, toolpool.runTool = noJVM, crashTool
+        try:
+            started = time.time()
+            with self.assertRaises(toolpool.ToolFailure):
+                toolpool.call("Verify", "verify", "examples/does-not-exist.rdf", timeout=60)
+            self.assertLess(time.time() - started, 10)
+            self.assertEqual(toolpool._started, {})
+        finally:
+            jvm.startJVM, toolpool.runTool = startJVM, runTool
+            toolpool._pool.terminate()
+            toolpool._pool = None
+
+
+class LicenseCorpusTestCase(TestCase):
+
+    def setUp(self):
+        self.corpus = LicenseCorpus({
+            "MIT": "Permission is hereby granted, free of charge,\n to any person",
+            "Short": "Short text",
+            "Missing": None,
+        })
+
+    def test_exact_matches(self):
+        """Case and white space are ignored by the exact match"""
+        self.assertEqual(self.corpus.exactMatches("permission is hereby  granted, free of charge, to any person "), ["MIT"])
+        self.assertEqual(self.corpus.exactMatches("Permission is granted"), [])
+
+    def test_candidates(self):
+        """Only the licenses sharing shingles with the text and of a similar length are candidates"""
+        candidates = self.corpus.candidates("Permission is hereby granted, free of charge, to any person.")
+        self.assertEqual(list(candidates.keys()), ["MIT"])
+        self.assertEqual(self.corpus.candidates("Short text, permission is hereby granted"), {})
+        self.assertEqual(len(self.corpus), 2)
+        self.assertIsNone(self.corpus.getText("Missing"))
+        self.assertIn("any", self.corpus.licenses["MIT"].tokens)
+
+
+class MinHashIndexTestCase(TestCase):
+
+    def setUp(self):
+        self.text = " ".join("word%d" % i for i in range(300))
+        self.index = minhash.MinHashIndex()
+        self.index.add("text", self.text)
+        self.index.add("other", " ".join("other%d" % i for i in range(300)))
+
+    def test_query(self):
+        """A slightly modified text finds the original, unrelated texts are not candidates"""
+        modified = self.text.replace("word10 ", "changed ").replace("word200 ", "")
+        self.assertEqual(self.index.query(modified), set(["text"]))
+        self.assertEqual(self.index.query("nothing in common with the indexed texts"), set())
+
+    def test_sync(self):
+        """sync removes the texts that are gone and re-indexes the changed ones"""
+        self.index.sync({"text": "a new text"})
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.query("a new text"), set(["text"]))
+        self.assertEqual(self.index.query(self.text), set())
+
+
+class LicenseListMirrorTestCase(TestCase):
+
+    def setUp(self):
+        self.mirror = tempfile.mkdtemp()
+        self.settings = override_settings(LICENSE_LIST_DIR=self.mirror)
+        self.settings.enable()
+        for name in ["3.5_20190101000000", "3.6_20190601000000"]:
+            snapshot = os.path.join(self.mirror, "snapshots", name)
+            os.makedirs(os.path.join(snapshot, "xml", "exceptions"))
+            with open(os.path.join(snapshot, "licenses.json"), "w") as f:
+                json.dump({"licenseListVersion": name[:3], "licenses": []}, f)
+            with open(os.path.join(snapshot, "manifest.json"), "w") as f:
+                json.dump({"licenseListVersion": name[:3]}, f)
+            with open(os.path.join(snapshot, "xml", "MIT.xml"), "w") as f:
+                f.write("<SPDXLicenseCollection/>")
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.mirror)
+
+    def test_not_synced(self):
+        """Without a current snapshot the readers return None"""
+        self.assertFalse(licenselist.isSynced())
+        self.assertIsNone(licenselist.getLicenses())
+        self.assertIsNone(licenselist.getSchemaPath())
+
+    def test_snapshots(self):
+        licenselist.activate("3.6_20190601000000")
+        self.assertEqual(licenselist.getVersion(), "3.6")
+        self.assertEqual(licenselist.getLicenseXml("MIT"), "<SPDXLicenseCollection/>")
+        self.assertIsNone(licenselist.getLicenseXml("MIT", exception=True))
+        """ Going back to a previous snapshot"""
+        licenselist.activate("3.5_20190101000000")
+        self.assertEqual(licenselist.getLicenses()["licenseListVersion"], "3.5")
+        """ The current snapshot is never pruned"""
+        licenselist.prune(0)
+        self.assertEqual(licenselist.listSnapshots(), ["3.5_20190101000000"])
+
+    def test_archive_paths(self):
+        self.assertEqual(licenselist.targetPath("src/exceptions/GCC.xml", licenselist.XML_FILES), "xml/exceptions/GCC.xml")
+        self.assertEqual(licenselist.targetPath("src/MIT.xml", licenselist.XML_FILES), "xml/MIT.xml")
+        self.assertIsNone(licenselist.targetPath("test/simpleTestForGenerator/MIT.txt", licenselist.XML_FILES))
+        self.assertEqual(licenselist.targetPath("text/MIT.txt", licenselist.DATA_FILES), "texts/MIT.txt")
+
+
+class LicenseIndexTestCase(TestCase):
+
+    def setUp(self):
+        self.index = licenseindex.LicenseIndex({
+            "licenseListVersion": "3.6",
+            "licenses": [
+                {"licenseId": "MIT", "name": "MIT License", "referenceNumber": "256", "isDeprecatedLicenseId": False},
+                {"licenseId": "GPL-2.0", "name": "GNU General Public License v2.0 only", "referenceNumber": "99", "isDeprecatedLicenseId": True},
+            ]}, {
+            "licenseListVersion": "3.6",
+            "exceptions": [
+                {"licenseExceptionId": "Classpath-exception-2.0", "name": "Classpath exception 2.0"},
+            ]})
+
+    def tearDown(self):
+        licenseindex.reset()
+
+    def test_find(self):
+        self.assertEqual(self.index.find("MIT").licenseId, "MIT")
+        self.assertEqual(self.index.find("MIT License").licenseId, "MIT")
+        self.assertEqual(self.index.find("mit license").licenseId, "MIT")
+        entry = self.index.find("Classpath exception 2.0")
+        self.assertTrue(entry.isException)
+        self.assertEqual(entry.licenseId, "Classpath-exception-2.0")
+        self.assertIsNone(self.index.find("Not a license"))
+        self.assertIsNone(self.index.find(""))
+
+    def test_utils(self):
+        """check_license_name and licenseInList answer from the index"""
+        licenseindex._index = self.index
+        licenseindex._fetched = time.time()
+        self.assertEqual(utils.check_license_name("mit"), [utils.LICENSE_XML_URL + "MIT", "MIT"])
+        self.assertEqual(utils.check_license_name("Classpath-exception-2.0"),
+            [utils.EXCEPTION_XML_URL + "Classpath-exception-2.0", "Classpath-exception-2.0"])
+        self.assertEqual(utils.check_license_name("Not a license"), [False])
+        licenseInList = utils.licenseInList("GNU General Public License v2.0 only", "", "token")
+        self.assertTrue(licenseInList["exists"])
+        self.assertEqual(licenseInList["licenseId"], "GPL-2.0")
+        self.assertTrue(licenseInList["isDeprecatedLicenseId"])
+        self.assertFalse(utils.licenseInList("Other", "Other", "token")["exists"])
+
+
+
+class LicenseNamesTestCase(TestCase):
+
+    def setUp(self):
+        self.index = licensenames.NameIndex(["MIT License", "MIT", "MIT-0", "Apache License 2.0", "Apache-2.0",
+            "GNU General Public License v2.0 only", "GPL-2.0", "Classpath exception 2.0", "MIT", ""])
+        self.mirror = tempfile.mkdtemp()
+
+    def tearDown(self):
+        licensenames.reset()
+        shutil.rmtree(self.mirror)
+
+    def test_search(self):
+        self.assertEqual(len(self.index), 8)
+        self.assertEqual(self.index.search("mit", 10), ["MIT", "MIT-0", "MIT License"])
+        self.assertEqual(self.index.search("MIT", 2), ["MIT", "MIT-0"])
+        """ Word prefixes, after the names starting with the term """
+        self.assertEqual(self.index.search("apache", 10), ["Apache-2.0", "Apache License 2.0"])
+        self.assertEqual(self.index.search("license 2", 10)[0], "Apache License 2.0")
+        self.assertEqual(self.index.search("general public license v2", 10), ["GNU General Public License v2.0 only"])
+        """ Inside a word and misspelt, by trigrams """
+        self.assertIn("Classpath exception 2.0", self.index.search("exeption", 10))
+        self.assertIn("Classpath exception 2.0", self.index.search("path", 10))
+        self.assertEqual(self.index.search("zzzz", 10), [])
+        self.assertEqual(self.index.search(" ", 10), [])
+
+    def test_search_inside_words(self):
+        """ Short terms find the names containing them, after the names starting with them """
+        index = licensenames.NameIndex(["GPL-2.0", "LGPL-2.1", "AGPL-3.0", "MIT"])
+        self.assertEqual(index.search("gpl", 10), ["GPL-2.0", "AGPL-3.0", "LGPL-2.1"])
+        self.assertEqual(index.search("gpl", 2), ["GPL-2.0", "AGPL-3.0"])
+        self.assertEqual(index.search("pl", 10), ["GPL-2.0", "AGPL-3.0", "LGPL-2.1"])
+        self.assertEqual(index.search("gpl-2", 10), ["GPL-2.0", "LGPL-2.1"])
+
+    def test_autocomplete(self):
+        with override_settings(LICENSE_LIST_DIR=self.mirror):
+            LicenseNames.objects.create(name="MIT License")
+            LicenseNames.objects.create(name="MIT")
+            resp = self.client.get(reverse("autocompleteModel"), {"term": "mi"})
+            self.assertEqual(json.loads(resp.content), ["MIT", "MIT License"])
+            resp = self.client.get(reverse("autocompleteModel"), {"term": "mi", "limit": 1})
+            self.assertEqual(json.loads(resp.content), ["MIT"])
+            resp = self.client.get(reverse("autocompleteModel"), {"terms": ["mit", "lic"]})
+            self.assertEqual(json.loads(resp.content), {"mit": ["MIT", "MIT License"], "lic": ["MIT License"]})
+            self.assertEqual(self.client.get(reverse("autocompleteModel"), {"term": "mi", "limit": "all"}).status_code, 400)
+            """ New names are indexed once the refresh interval is over """
+            LicenseNames.objects.create(name="MirOS")
+            self.assertEqual(licensenames.search("miro"), [])
+            licensenames._checked = 0
+            self.assertEqual(licensenames.search("miro"), ["MirOS"])
+
+    def test_store(self):
+        LicenseNames.objects.create(name="Old License")
+        self.assertEqual(licensenames.store(["MIT License", "MIT", " MIT ", ""]), (2, 0))
+        self.assertEqual(licensenames.store(["MIT License", "MIT"]), (0, 0))
+        self.assertEqual(licensenames.store(["MIT License", "MIT", "0BSD"], rebuild=True), (1, 1))
+        self.assertEqual(sorted(LicenseNames.objects.values_list("name", flat=True)), ["0BSD", "MIT", "MIT License"])
+
+    def test_command(self):
+        snapshot = os.path.join(self.mirror, "snapshots", "3.6_20190601000000")
+        os.makedirs(snapshot)
+        with open(os.path.join(snapshot, "licenses.json"), "w") as f:
+            json.dump({"licenseListVersion": "3.6", "licenses": [{"licenseId": "MIT", "name": "MIT License"}]}, f)
+        with open(os.path.join(snapshot, "exceptions.json"), "w") as f:
+            json.dump({"licenseListVersion": "3.6",
+                "exceptions": [{"licenseExceptionId": "Classpath-exception-2.0", "name": "Classpath exception 2.0"}]}, f)
+        LicenseNames.objects.create(name="Old License")
+        out = six.StringIO()
+        with override_settings(LICENSE_LIST_DIR=self.mirror):
+            licenselist.activate("3.6_20190601000000")
+            call_command("populate_license_names", "--rebuild", stdout=out)
+            self.assertEqual(licensenames.search("class"), ["Classpath exception 2.0", "Classpath-exception-2.0"])
+        self.assertIn("License list 3.6: 4 names read", out.getvalue())
+        self.assertIn("4 names added, 1 removed", out.getvalue())
+        self.assertFalse(LicenseNames.objects.filter(name="Old License").exists())
+
+
 class CompareViewsTestCase(TestCase):
 
     def initialise(self):
@@ -647,6 +958,346 @@ class ValidateXMLViewsTestCase(TestCase):
         self.client.logout()
 
 
+class SchemaCacheTestCase(TestCase):
+
+    def setUp(self):
+        """ Mirror holding the schema of the examples folder """
+        self.mirror = tempfile.mkdtemp()
+        self.settings = override_settings(LICENSE_LIST_DIR=self.mirror)
+        self.settings.enable()
+        os.makedirs(os.path.join(self.mirror, "snapshots", "3.6_20190601000000"))
+        shutil.copyfile("examples/xml-schema.xsd",
+            os.path.join(self.mirror, "snapshots", "3.6_20190601000000", licenselist.SCHEMA_FILE))
+        licenselist.activate("3.6_20190601000000")
+        schemacache.reset()
+
+    def tearDown(self):
+        schemacache.reset()
+        self.settings.disable()
+        shutil.rmtree(self.mirror)
+
+    def test_compiled_once(self):
+        schema = schemacache.getSchema()
+        self.assertIs(schemacache.getSchema(), schema)
+        self.assertEqual(schemacache.getSource().origin, licenselist.getSchemaPath())
+
+    def test_validate(self):
+        with open("examples/Adobe-Glyph.xml", "rb") as f:
+            schemacache.validate(f.read())
+        with open("examples/invalid_license.xml", "rb") as f:
+            self.assertRaises(etree.DocumentInvalid, schemacache.validate, f.read())
+        self.assertRaises(etree.XMLSyntaxError, schemacache.validate, b"<SPDXLicenseCollection>")
+
+
+class BeautifyViewsTestCase(TestCase):
+
+    def test_beautify(self):
+        """POST Request for beautifying an XML text"""
+        xml_text = open("examples/Adobe-Glyph.xml").read()
+        resp = self.client.post(reverse("beautify"),{'xml': xml_text},HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(resp.status_code,200)
+        data = json.loads(resp.content)
+        self.assertEqual(data["type"], "success")
+        self.assertTrue(data["data"].startswith('<?xml version="1.0" encoding="UTF-8"?>\n<SPDXLicenseCollection'))
+        self.assertIn('\n   <license isOsiApproved="false" licenseId="Adobe-Glyph"\n', data["data"])
+        self.assertFalse(os.path.exists("test.xml"))
+
+    def test_beautify_invalid_xml(self):
+        """POST Request for beautifying a text which is not XML"""
+        resp = self.client.post(reverse("beautify"),{'xml': '<license><p>'},HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(resp.status_code,500)
+        self.assertEqual(json.loads(resp.content)["data"], "Invalid XML cannot be beautified.")
+
+
+class LicenseXmlTestCase(TestCase):
+
+    def setUp(self):
+        licensexml.clearCache()
+        self.xml = generateLicenseXml("Approved", "0BSD", "BSD Zero Clause License", "3.6",
+            ["http://landley.net/toybox/license.html"], "header", "notes",
+            "Permission to use.\n\n1. first\n\n2. second")
+
+    def test_extract(self):
+        data = licensexml.extract(self.xml)
+        self.assertEqual(data.osiApproved, "true")
+        self.assertEqual(data.crossRefs, ("http://landley.net/toybox/license.html",))
+        self.assertEqual(data.notes, "notes")
+        self.assertEqual(data.standardLicenseHeader, "header")
+        self.assertTrue(data.text.startswith("<p>Permission to use.</p><list><item><bullet>1.</bullet>"))
+        self.assertEqual(data.plainText, "Permission to use.1.first2.second")
+        self.assertEqual(utils.parseXmlString(self.xml)["crossRefs"], ["http://landley.net/toybox/license.html"])
+
+    def test_missing_fields(self):
+        data = licensexml.extract('<SPDXLicenseCollection xmlns="http://www.spdx.org/license"><license/></SPDXLicenseCollection>')
+        self.assertEqual(data, licensexml.LicenseXml("-", (), "", "", "", ""))
+
+    def test_parse_memoized(self):
+        self.assertIs(licensexml.parse(self.xml), licensexml.parse(self.xml.decode("utf-8")))
+
+    def test_text_fields_on_save(self):
+        licenseRequest = LicenseRequest.objects.create(fullname="BSD Zero Clause License",
+            shortIdentifier="0BSD", userEmail="test@example.com", xml=self.xml)
+        self.assertEqual(licenseRequest.plainText, "Permission to use.1.first2.second")
+        self.assertEqual(licenseRequest.xmlHash, licensexml.xmlHash(self.xml))
+        self.assertEqual(len(minhash.fromFingerprint(licenseRequest.fingerprint)), minhash.NUM_PERM)
+        self.assertFalse(licenseRequest.updateTextFields())
+        licenseRequest.xml = self.xml.replace("Permission to use.", "Permission to copy.")
+        licenseRequest.save(update_fields=["xml"])
+        licenseRequest = LicenseRequest.objects.get(pk=licenseRequest.pk)
+        self.assertEqual(licenseRequest.plainText, "Permission to copy.1.first2.second")
+
+    def test_backfill(self):
+        licenseRequest = LicenseRequest.objects.create(fullname="BSD Zero Clause License",
+            shortIdentifier="0BSD", userEmail="test@example.com", xml=self.xml)
+        LicenseRequest.objects.filter(pk=licenseRequest.pk).update(plainText="", xmlHash="", fingerprint="")
+        self.assertEqual(licensexml.backfill(LicenseRequest), 1)
+        self.assertEqual(LicenseRequest.objects.get(pk=licenseRequest.pk).plainText, "Permission to use.1.first2.second")
+        self.assertEqual(licensexml.backfill(LicenseRequest), 0)
+
+
+def githubIssue(number, title, state, labels, updated="2020-01-01T00:00:00Z", body="", **fields):
+    issue = {"number": number, "title": title, "state": state, "body": body, "updated_at": updated,
+        "html_url": "https://github.com/spdx/license-list-XML/issues/{0}".format(number),
+        "labels": [{"name": label} for label in labels]}
+    issue.update(fields)
+    return issue
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET="secret")
+class LicenseIssuesTestCase(TestCase):
+
+    repository = "spdx/license-list-XML"
+
+    def setUp(self):
+        LicenseIssueSync.objects.create(repository=self.repository, synced=timezone.now())
+
+    def test_store(self):
+        issue = licenseissues.store(self.repository, githubIssue(1, "New license request: 0BSD [SPDX-Online-Tools]",
+            "open", [licenseissues.PENDING_LABEL], body="**2.** Short identifier: 0BSD\n"))
+        self.assertEqual(issue.shortIdentifier, "0BSD")
+        self.assertEqual(issue.labelNames(), [licenseissues.PENDING_LABEL])
+        self.assertIsNone(licenseissues.store(self.repository, githubIssue(2, "Pull request", "open", [], pull_request={})))
+        """ An older event does not overwrite the issue """
+        licenseissues.store(self.repository, githubIssue(1, "Renamed", "closed", [], updated="2019-01-01T00:00:00Z"))
+        self.assertEqual(LicenseRequestIssue.objects.get(number=1).state, "open")
+        self.assertEqual(licenseissues.store(self.repository, githubIssue(1, "Renamed", "closed", [],
+            updated="2020-02-01T00:00:00Z")).shortIdentifier, "")
+
+    def test_request_issues(self):
+        body = "**2.** Short identifier: {0}\n"
+        licenseissues.store(self.repository, githubIssue(1, "[SPDX-Online-Tools]", "closed",
+            [licenseissues.REJECTED_LABEL], body=body.format("Rejected")))
+        licenseissues.store(self.repository, githubIssue(2, "[SPDX-Online-Tools]", "open",
+            [licenseissues.PENDING_LABEL], body=body.format("Pending")))
+        licenseissues.store(self.repository, githubIssue(3, "[SPDX-Online-Tools]", "open",
+            [licenseissues.PENDING_LABEL, licenseissues.ACCEPTED_LABEL], body=body.format("Accepted")))
+        licenseissues.store(self.repository, githubIssue(4, "[SPDX-Online-Tools]", "closed",
+            [licenseissues.PENDING_LABEL], body=body.format("Closed")))
+        licenseissues.store(self.repository, githubIssue(5, "Other issue", "open", [licenseissues.PENDING_LABEL]))
+        issues = utils.get_request_issues(utils.PROD)
+        self.assertEqual(list(issues.values_list("shortIdentifier", flat=True)), ["Rejected", "Pending"])
+
+    def test_request_issues_never_sync(self):
+        """ The license request check only reads the index """
+        LicenseIssueSync.objects.all().delete()
+        self.assertEqual(list(utils.get_request_issues(utils.PROD)), [])
+        self.assertFalse(LicenseIssueSync.objects.exists())
+
+    def test_webhook(self):
+        payload = json.dumps({"action": "opened", "repository": {"full_name": self.repository},
+            "issue": githubIssue(7, "New license request: 0BSD [SPDX-Online-Tools]", "open", [])}).encode("utf-8")
+        signature = "sha256=" + hmac.new(b"secret", payload, hashlib.sha256).hexdigest()
+        resp = self.client.post(reverse("github-webhook"), payload, content_type="application/json",
+            HTTP_X_GITHUB_EVENT="issues", HTTP_X_HUB_SIGNATURE_256="sha256=0")
+        self.assertEqual(resp.status_code, 403)
+        resp = self.client.post(reverse("github-webhook"), payload, content_type="application/json",
+            HTTP_X_GITHUB_EVENT="issues", HTTP_X_HUB_SIGNATURE_256=signature)
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(LicenseRequestIssue.objects.get(repository=self.repository, number=7).state, "open")
+
+
+class GithubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Serves /data with an ETag and the rate limit of the test case """
+
+    def do_GET(self):
+        server = self.server
+        if self.path.startswith("/pages/"):
+            return self.sendPage(int(self.path.rsplit("/", 1)[-1]))
+        server.conditional.append(self.headers.get("If-None-Match"))
+        self.send_response(304 if self.headers.get("If-None-Match") == '"v1"' else 200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-RateLimit-Limit", "60")
+        self.send_header("X-RateLimit-Remaining", str(server.remaining))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        self.end_headers()
+        if self.headers.get("If-None-Match") != '"v1"':
+            self.wfile.write(b'{"licenses": []}')
+
+    def sendPage(self, number):
+        """ /pages/<number> of 5 pages, with the anonymous rate limit """
+        self.server.remaining -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-RateLimit-Limit", "60")
+        self.send_header("X-RateLimit-Remaining", str(self.server.remaining))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        if number < 5:
+            self.send_header("Link", '<http://127.0.0.1:{0}/pages/{1}>; rel="next"'.format(
+                self.server.server_port, number + 1))
+        self.end_headers()
+        self.wfile.write(json.dumps([number]).encode("utf-8"))
+
+    def do_POST(self):
+        """ Creates the refs of /repo/git/refs unless they exist """
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length"))))
+        exists = body["ref"] in self.server.refs
+        self.send_response(422 if exists else 201)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.server.refs.append(body["ref"])
+        self.wfile.write(json.dumps({"message": "Reference already exists"} if exists else body).encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+class GithubClientTestCase(TestCase):
+
+    def setUp(self):
+        self.cacheDir = tempfile.mkdtemp()
+        self.settings = override_settings(GITHUB_CACHE_DIR=self.cacheDir, GITHUB_RATE_LIMIT_RESERVE=5)
+        self.settings.enable()
+        self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), GithubHandler)
+        self.server.conditional = []
+        self.server.remaining = 50
+        self.server.refs = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = "http://127.0.0.1:{0}/data".format(self.server.server_port)
+        self.github = githubclient.GithubClient()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.settings.disable()
+        shutil.rmtree(self.cacheDir)
+
+    def test_etag_cache(self):
+        response = self.github.get(self.url, token="token")
+        self.assertEqual(response.json(), {"licenses": []})
+        response = self.github.get(self.url, token="token")
+        self.assertTrue(response.fromCache)
+        self.assertEqual(response.json(), {"licenses": []})
+        self.assertEqual(self.server.conditional, [None, '"v1"'])
+        """ The entries are kept per token """
+        self.github.get(self.url, token="other")
+        self.assertEqual(self.server.conditional[-1], None)
+
+    @override_settings(GITHUB_RATE_LIMIT_RESERVE=100)
+    def test_anonymous_background_pages(self):
+        """ The reserve is scaled to the anonymous limit of 60 """
+        self.server.remaining = 59
+        url = "http://127.0.0.1:{0}/pages/1".format(self.server.server_port)
+        pages = []
+        while url:
+            response = self.github.get(url, background=True, cache=False)
+            pages.extend(response.json())
+            url = response.links.get("next", {}).get("url")
+        self.assertEqual(pages, [1, 2, 3, 4, 5])
+        """ Until a quarter of the limit is left """
+        self.server.remaining = 16
+        self.github.get("http://127.0.0.1:{0}/pages/5".format(self.server.server_port), background=True)
+        self.assertRaises(githubclient.RateLimitError, self.github.get, self.url, background=True)
+
+    def test_rate_limit(self):
+        self.server.remaining = 5
+        self.github.get(self.url, token="token")
+        self.assertEqual(self.github.rateLimit("token").remaining, 5)
+        self.assertRaises(githubclient.RateLimitError, self.github.get, self.url, token="token", background=True)
+        self.github.get(self.url, token="token")
+        self.server.remaining = 0
+        self.github.get(self.url, token="token")
+        self.assertRaises(githubclient.RateLimitError, self.github.get, self.url, token="token")
+        """ Another token has its own limit """
+        self.github.get(self.url, token="other")
+
+    def test_concurrently(self):
+        self.assertEqual(githubclient.concurrently(lambda: 1, lambda: 2), [1, 2])
+
+    def test_create_branch(self):
+        """ A taken branch name gets a number instead of listing the branches """
+        forkUrl = "http://127.0.0.1:{0}/repo".format(self.server.server_port)
+        self.server.refs = ["refs/heads/MIT", "refs/heads/MIT1"]
+        response, name = utils.createBranch(forkUrl, "token", {}, "MIT", "abc")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(name, "MIT2")
+
+
+class GenerateXmlTestCase(TestCase):
+
+    def test_match_bullet(self):
+        self.assertEqual(generateXml.matchBullet("(a) text"), generateXml.Bullet("(a)", "letter"))
+        self.assertEqual(generateXml.matchBullet("  1.2 text"), generateXml.Bullet("1.2", "number"))
+        self.assertEqual(generateXml.matchBullet("* text"), generateXml.Bullet("*", "symbol"))
+        self.assertIsNone(generateXml.matchBullet("v. text"))
+        self.assertIsNone(generateXml.matchBullet("text"))
+
+    def test_group_lines(self):
+        """The bullet found when grouping the lines is carried to the item"""
+        points = generateXml.insertOls(generateXml.groupLines(["Intro", "1. first", "more", "\t(a) nested", "2. second"]))
+        self.assertEqual([point.get('depth') for point in points if point['tagType'] == 'item'], [0, 1, 0])
+        text = generateXml.getTextElement(points)
+        self.assertEqual([bullet.text for bullet in text.iter("bullet")], ["1.", "(a)", "2."])
+        """ The paragraph and the nested list go in the last item """
+        self.assertEqual([child.tag for child in text.find("list/item")], ["bullet", "p", "p", "list"])
+        self.assertEqual(text.find("list/item/list/item/p").text, "nested")
+
+
+class FormatXmlTestCase(TestCase):
+
+    def test_to_lines(self):
+        self.assertEqual(formatxml.to_lines("", 10), [])
+        self.assertEqual(formatxml.to_lines("a  short\ntext", 12), ["a short text"])
+        """ Balanced lines rather than filling the first ones """
+        self.assertEqual(formatxml.to_lines("aaa bb cc ddddd", 9), ["aaa bb", "cc ddddd"])
+        """ A word longer than the width keeps the text on one line """
+        self.assertEqual(formatxml.to_lines("a verylongword b", 5), ["a verylongword b"])
+
+    def test_format_xml(self):
+        """Formatting an element does not change it"""
+        tree = formatxml.et.parse("examples/Adobe-Glyph.xml").getroot()
+        before = formatxml.et.tostring(tree)
+        ser = formatxml.format_xml(tree, formatxml.make_config(indent=3))
+        self.assertEqual(formatxml.et.tostring(tree), before)
+        self.assertEqual(ser, formatxml.format_xml(before, formatxml.make_config(indent=3)))
+
+    def test_process_all(self):
+        """Bulk mode over a directory, checking then reformatting"""
+        tree = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(tree, "src", "exceptions"))
+            shutil.copyfile("examples/Adobe-Glyph.xml", os.path.join(tree, "src", "Adobe-Glyph.xml"))
+            shutil.copyfile("examples/Adobe-Glyph.xml", os.path.join(tree, "src", "exceptions", "Other.xml"))
+            with open(os.path.join(tree, "src", "bad.xml"), "w") as f:
+                f.write("<license>")
+            fnames = list(formatxml.xml_files([tree]))
+            self.assertEqual([os.path.relpath(fname, tree) for fname in fnames],
+                ["src/Adobe-Glyph.xml", "src/bad.xml", "src/exceptions/Other.xml"])
+            config = formatxml.make_config(indent=3)
+            results = sorted(formatxml.process_all(fnames, config, check=True, jobs=1))
+            self.assertEqual([(changed, error is None) for fname, changed, error, seconds in results],
+                [(True, True), (False, False), (True, True)])
+            with open(fnames[0], "rb") as f:
+                self.assertEqual(f.read(), open("examples/Adobe-Glyph.xml", "rb").read())
+            list(formatxml.process_all(fnames, config, jobs=1))
+            results = formatxml.process_all(fnames, config, check=True, jobs=1)
+            self.assertFalse(any(changed for fname, changed, error, seconds in results))
+        finally:
+            shutil.rmtree(tree)
+
+
 class LicenseXMLEditorTestCase(StaticLiveServerTestCase):
 
     def setUp(self):
@@ -978,6 +1629,121 @@ class RootViewsTestCase(TestCase):
         self.assertIn(settings.HOME_URL, (i[0] for i in resp.redirect_chain))
 
 
+class RequestListQueriesTestCase(TestCase):
+    """ The request lists read their rows in one query whatever their number """
+
+    def setUp(self):
+        xml = generateLicenseXml('', "0BSD", "BSD Zero Clause License-00",
+            '', ["http://wwww.spdx.org"], '', '', '')
+        for number in range(3):
+            for flag in (False, True):
+                LicenseRequest.objects.create(fullname="License {0}".format(number), licenseAuthorName="John Doe",
+                    shortIdentifier="ID-{0}".format(number), userEmail="johndoe@gmail.com", archive=flag, xml=xml)
+                LicenseNamespace.objects.create(fullname="License {0}".format(number), licenseAuthorName="John Doe",
+                    shortIdentifier="ID-{0}".format(number), userEmail="johndoe@gmail.com", archive=flag,
+                    promoted=flag, url="http://wwww.spdx.org", description="Description",
+                    namespace="namespace-{0}".format(number), license_list_url="http://wwww.spdx.org",
+                    github_repo_url="http://wwww.spdx.org", xml=xml)
+
+    def assertListQueries(self, urlName, listName):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse(urlName))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context[listName]), 3)
+        self.assertEqual(len(queries), 1, [query["sql"] for query in queries])
+        self.assertNotIn('"xml"', queries[0]["sql"])
+
+    def test_license_requests(self):
+        self.assertListQueries("license-requests", "licenseRequests")
+
+    def test_archive_requests(self):
+        self.assertListQueries("archive-license-xml", "archiveRequests")
+
+    def test_license_namespace_requests(self):
+        self.assertListQueries("license-namespace-requests", "licenseNamespaceRequests")
+
+    def test_archive_namespace_requests(self):
+        self.assertListQueries("archive-license-namespace-xml", "archiveRequests")
+
+    def test_promoted_namespace_requests(self):
+        self.assertListQueries("promoted-license-namespace-xml", "promotedRequests")
+
+    def queryPlan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return " ".join(str(row[-1]) for row in cursor.fetchall())
+
+    @skipIf(connection.vendor != "sqlite", "SQLite query plan")
+    def test_query_plan(self):
+        """ The pages are read in the order of the indexes, without sorting """
+        cursor = requestlist.encodeCursor(LicenseRequest.objects.order_by("pk").first())
+        for listName, index in [("license_requests", "app_licreq_archive_idx"),
+                ("archive_namespace_requests", "app_licns_archive_idx"),
+                ("promoted_namespace_requests", "app_licns_promoted_idx")]:
+            for params in [{}, {"cursor": cursor}]:
+                plan = self.queryPlan(requestlist.pageQuery(listName, params, 51))
+                self.assertIn(index, plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+
+
+class RequestListPagesTestCase(TestCase):
+    """ Keyset pages and filters of the request lists """
+
+    def setUp(self):
+        xml = generateLicenseXml('', "0BSD", "BSD Zero Clause License-00",
+            '', ["http://wwww.spdx.org"], '', '', '')
+        for number in range(5):
+            LicenseRequest.objects.create(fullname="License {0}".format(number),
+                licenseAuthorName="Author {0}".format(number % 2), shortIdentifier="ID-{0}".format(number),
+                userEmail="johndoe@gmail.com", xml=xml)
+
+    @override_settings(REQUEST_LIST_PAGE_SIZE=2)
+    def test_pages(self):
+        page = requestlist.getPage("license_requests", {})
+        identifiers = [row.shortIdentifier for row in page.rows]
+        while page.next:
+            page = requestlist.getPage("license_requests", {"cursor": page.next})
+            identifiers.extend(row.shortIdentifier for row in page.rows)
+        self.assertEqual(identifiers, ["ID-4", "ID-3", "ID-2", "ID-1", "ID-0"])
+
+    def test_filters(self):
+        page = requestlist.getPage("license_requests", {"author": "author 1", "identifier": ""})
+        self.assertEqual([row.shortIdentifier for row in page.rows], ["ID-3", "ID-1"])
+        self.assertEqual(page.filters, {"author": "author 1"})
+        today = timezone.localtime(timezone.now()).date()
+        self.assertEqual(len(requestlist.getPage("license_requests", {"to": str(today)}).rows), 5)
+        self.assertEqual(len(requestlist.getPage("license_requests", {"from": str(today + datetime.timedelta(days=1))}).rows), 0)
+        with self.assertRaises(ValueError):
+            requestlist.getPage("license_requests", {"from": "yesterday"})
+        with self.assertRaises(ValueError):
+            requestlist.getPage("license_requests", {"cursor": "not a cursor"})
+
+    def test_request_rows(self):
+        resp = self.client.get(reverse("request-rows", args=["license_requests"]), {"limit": 3, "author": "Author"})
+        self.assertEqual(resp.status_code, 200)
+        data = json.loads(resp.content)
+        self.assertEqual([row["shortIdentifier"] for row in data["rows"]], ["ID-4", "ID-3", "ID-2"])
+        self.assertEqual(data["html"].count("<tr"), 3)
+        resp = self.client.get(reverse("request-rows", args=["license_requests"]), {"cursor": data["next"]})
+        data = json.loads(resp.content)
+        self.assertEqual([row["shortIdentifier"] for row in data["rows"]], ["ID-1", "ID-0"])
+        self.assertIsNone(data["next"])
+        resp = self.client.get(reverse("request-rows", args=["license_requests"]), {"cursor": "!"})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get(reverse("request-rows", args=["unknown"]))
+        self.assertEqual(resp.status_code, 404)
+
+    @override_settings(REQUEST_LIST_PAGE_SIZE=2)
+    def test_license_requests_page(self):
+        resp = self.client.get(reverse("license-requests"), {"author": "Author 0"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context["licenseRequests"]), 2)
+        self.assertTrue(resp.context["nextCursor"])
+        self.assertIn("author=Author+0", resp.context["rowsUrl"])
+
+
 class ProfileViewsTestCase(TestCase):
 
     def initialise(self):
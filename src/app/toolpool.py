@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Runs the SPDX java tools out of the web process.
+
+With settings.SPDX_TOOL_WORKERS > 0 the calls are queued to a pool of long
+lived worker processes, each owning its own JVM. A worker that dies (e.g. a
+JVM crash) is replaced by the pool and the job it was running fails with
+ToolFailure instead of taking the web process down: the workers report the
+job they start, and the callers waiting on a job check every WATCH_INTERVAL
+seconds that its worker is still alive.
+With SPDX_TOOL_WORKERS = 0 the calls run in the calling thread through the
+in-process JVM bridge (app.jvm).
+
+The views use the same syntax in both modes::
+
+    tools = toolpool.getTools()
+    retval = tools.Verify.verify(path)
+
+or submit a job and poll it::
+
+    job = toolpool.submit("Verify", "verify", path)
+    if job.ready():
+        retval = job.get()
+"""
+
+from __future__ import unicode_literals
+
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing.queues import SimpleQueue
+from traceback import format_exc
+
+import jpype
+from django.conf import settings
+
+from app import jvm
+
+OK = "ok"
+ERROR = "error"
+FAILED = "failed"
+
+""" Seconds between two checks of the worker running a job """
+WATCH_INTERVAL = 1.0
+
+
+class ToolError(Exception):
+    """ Raised when a tool call fails. message holds the java exception
+    message, or the reason the job could not be completed.
+    """
+
+    def __init__(self, message):
+        Exception.__init__(self, message)
+        self.message = message
+
+
+class ToolTimeout(ToolError):
+    """ Raised when a tool call did not finish in time, unlike the other
+    errors it says nothing about the document
+    """
+
+
+class ToolFailure(ToolError):
+    """ Raised when the tool could not be run (JVM attach failure, error
+    outside of the java code), like a timeout it says nothing about the
+    document
+    """
+
+
+class ToolMessages(list):
+    """ List of the warnings returned by a tool, printed like the java
+    List it was converted from so that the messages shown to the users
+    do not change.
+    """
+
+    def __unicode__(self):
+        return "[" + ", ".join(self) + "]"
+
+    def __str__(self):
+        return self.__unicode__().encode("utf-8")
+
+
+def toPython(value):
+    """ Convert a value returned by the JVM to a picklable python value """
+    if value is None:
+        return None
+    if isinstance(value, (bytes, unicode)):
+        return unicode(value)
+    try:
+        return ToolMessages(unicode(item) for item in value)
+    except TypeError:
+        return unicode(value)
+
+
+def jobStarted(token):
+    """ Tell the parent which worker runs the job token, runs inside the worker """
+    if _startQueue is not None and token is not None:
+        _startQueue.put((token, os.getpid()))
+
+
+def runTool(className, methodName, args, token=None):
+    """ Call a static method of one of the tool classes.
+    Runs inside the worker process, so it never raises: it returns
+    (OK, value), (ERROR, message) for a java exception or (FAILED, traceback)
+    for any other error.
+    """
+    jobStarted(token)
+    try:
+        jvm.attach()
+        toolClass = jvm.getClass(className)
+        return (OK, toPython(getattr(toolClass, methodName)(*args)))
+    except jpype.JavaException as ex:
+        return (ERROR, jpype.JavaException.message(ex))
+    except Exception:
+        return (FAILED, format_exc())
+
+
+def unwrap(outcome):
+    state, value = outcome
+    if state == ERROR:
+        raise ToolError(value)
+    if state == FAILED:
+        raise ToolFailure(value)
+    return value
+
+
+def initWorker(startQueue):
+    """ Pay the JVM startup when the worker is spawned, not on its first job """
+    global _startQueue
+    _startQueue = startQueue
+    jvm.startJVM()
+
+
+_pool = None
+_poolLock = threading.Lock()
+""" (token, pid) sent by the workers when they start a job, written
+synchronously so that it is not lost when the worker dies right after
+"""
+_startQueue = None
+_tokens = itertools.count(1)
+""" Tokens of the jobs submitted to the pool and not collected yet, and the
+pid of the worker running the started ones
+"""
+_pending = set()
+_started = {}
+_startedLock = threading.Lock()
+
+
+def getPool():
+    """ Returns the worker pool, creating it on first use """
+    global _pool, _startQueue
+    if _pool is None:
+        with _poolLock:
+            if _pool is None:
+                if jpype.isJVMStarted():
+                    raise RuntimeError("The JVM is already running in this process, "
+                        "the tool workers must be started before it.")
+                _startQueue = SimpleQueue()
+                _pool = multiprocessing.Pool(
+                    processes=settings.SPDX_TOOL_WORKERS,
+                    initializer=initWorker,
+                    initargs=(_startQueue,),
+                    maxtasksperchild=settings.SPDX_TOOL_MAX_TASKS_PER_WORKER,
+                    )
+    return _pool
+
+
+def workerPid(token):
+    """ Pid of the worker running the job token, None while it is queued """
+    with _startedLock:
+        while not _startQueue.empty():
+            started, pid = _startQueue.get()
+            if started in _pending:
+                _started[started] = pid
+        return _started.get(token)
+
+
+def workerDied(token):
+    """ True when the worker which started the job token is gone """
+    pid = workerPid(token)
+    if pid is None:
+        return False
+    """ The pool drops the exited workers from its list when it replaces them """
+    return not any(worker.pid == pid and worker.exitcode is None for worker in _pool._pool)
+
+
+def forget(token):
+    with _startedLock:
+        _pending.discard(token)
+        _started.pop(token, None)
+
+
+def usePool():
+    return settings.SPDX_TOOL_WORKERS > 0
+
+
+def prewarm():
+    """ Start the worker pool, or the in-process JVM when no workers are configured """
+    if usePool():
+        getPool()
+    else:
+        jvm.startJVM()
+
+
+class ToolJob(object):
+    """ Handle on a submitted tool call """
+
+    def __init__(self, asyncResult=None, outcome=None, token=None):
+        self.asyncResult = asyncResult
+        self.outcome = outcome
+        self.token = token
+
+    def ready(self):
+        if self.asyncResult is None:
+            return True
+        return self.asyncResult.ready()
+
+    def get(self, timeout=None):
+        """ Wait for the job and return the tool result.
+        Raises ToolError if the tool failed, ToolTimeout if it did not answer
+        within timeout seconds and ToolFailure if its worker died.
+        """
+        if self.asyncResult is not None:
+            if timeout is None:
+                timeout = settings.SPDX_TOOL_TIMEOUT
+            try:
+                self.outcome = self.wait(timeout)
+            finally:
+                forget(self.token)
+        return unwrap(self.outcome)
+
+    def wait(self, timeout):
+        deadline = time.time() + timeout
+        while not self.asyncResult.ready():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise ToolTimeout("The SPDX tool did not finish within {0} seconds.".format(timeout))
+            self.asyncResult.wait(min(remaining, WATCH_INTERVAL))
+            if not self.asyncResult.ready() and workerDied(self.token):
+                """ A worker recycled after its last job exits right after sending
+                the result, give the result a moment to arrive
+                """
+                self.asyncResult.wait(WATCH_INTERVAL)
+                if not self.asyncResult.ready():
+                    raise ToolFailure("The SPDX tool worker running the job died.")
+        return self.asyncResult.get(0)
+
+
+def submit(className, methodName, *args):
+    """ Queue a tool call and return a ToolJob.
+    Without a worker pool the call runs before submit returns.
+    """
+    if usePool():
+        pool = getPool()
+        token = next(_tokens)
+        with _startedLock:
+            _pending.add(token)
+        return ToolJob(asyncResult=pool.apply_async(runTool, (className, methodName, args, token)), token=token)
+    return ToolJob(outcome=runTool(className, methodName, args))
+
+
+def call(className, methodName, *args, **kwargs):
+    """ Run a tool call and wait for its result """
+    return submit(className, methodName, *args).get(kwargs.get("timeout"))
+
+
+class ToolMethod(object):
+
+    def __init__(self, className, methodName):
+        self.className = className
+        self.methodName = methodName
+
+    def __call__(self, *args):
+        return call(self.className, self.methodName, *args)
+
+
+class ToolClass(object):
+
+    def __init__(self, className):
+        self.className = className
+
+    def __getattr__(self, methodName):
+        return ToolMethod(self.className, methodName)
+
+
+class ToolsProxy(object):
+    """ Same interface as the app.jvm handle, tools.Verify.verify(path),
+    but the calls go through call()
+    """
+
+    def __getattr__(self, name):
+        if name not in jvm.TOOL_CLASSES:
+            raise AttributeError(name)
+        return ToolClass(name)
+
+
+_tools = ToolsProxy()
+
+
+def getTools():
+    return _tools
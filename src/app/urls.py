@@ -46,9 +46,11 @@ urlpatterns = [
     url(r'^make_pr/$', views.pull_request, name='pull-request'),
     url(r'^beautify/$', views.beautify, name='beautify'),
     url(r'^update_session/$',views.update_session_variables, name='update-session-variables'),
+    url(r'^github_webhook/$', views.githubWebhook, name='github-webhook'),
     url(r'^submit_new_license/$', views.submitNewLicense, name='submit-new-license'),
     url(r'^submit_new_license_namespace/$', views.submitNewLicenseNamespace, name='submit-new-license-namespace'),
     url(r'^license_requests/$', views.licenseRequests, name='license-requests'),
+    url(r'^request_rows/(?P<listName>[a-z_]+)/$', views.requestRows, name='request-rows'),
     url(r'^license_requests/(?P<licenseId>\d+)/$', views.licenseInformation, name='license-information'),
     url(r'^archive_requests/$', views.archiveRequests, name='archive-license-xml'),
     url(r'^archive_requests/(?P<licenseId>\d+)/$', views.licenseInformation, name='archived-license-information'),
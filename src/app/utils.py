@@ -11,24 +11,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import base64
 import json
 import logging
-import re
 import socket
-import xml.etree.cElementTree as ET
+import time
 
-import redis
-import requests
 from django.conf import settings
-from spdx_license_matcher.build_licenses import build_spdx_licenses
 from spdx_license_matcher.computation import (checkTextStandardLicense,
                                               get_close_matches,
                                               getListedLicense)
 from spdx_license_matcher.difference import get_similarity_percent
 from spdx_license_matcher.utils import get_spdx_license_text
 
-from app.models import User, UserID
+from app import githubclient, licensecorpus, licenseindex, licenseissues, licenselist, licensexml
+from app.models import LicenseRequest, User, UserID
 
 NORMAL = "normal"
 TESTS = "tests"
@@ -52,7 +48,35 @@ def licenseNamespaceUtils():
     "internetConnectionUrl": "www.google.com",
     }
 
+""" Attempts at a free branch name, branchName then branchName1, branchName2... """
+BRANCH_NAME_ATTEMPTS = 50
+""" Seconds waited for a new fork before committing to it """
+FORK_WAIT_ATTEMPTS = 10
+
+
+def createBranch(forkUrl, token, headers, branchName, sha):
+    """ Create the branch pointing at sha in the fork, adding a number to its
+    name while a branch of that name exists.
+    Returns the response of the last attempt and the branch name.
+    """
+    for count in range(BRANCH_NAME_ATTEMPTS):
+        name = branchName + str(count) if count else branchName
+        body = {
+            "ref":"refs/heads/{0}".format(name),
+            "sha":sha,
+        }
+        response = githubclient.post(forkUrl + "/git/refs", token=token, headers=headers, data=json.dumps(body))
+        if response.status_code != 422 or "already exists" not in response.text:
+            break
+    return response, name
+
+
 def makePullRequest(username, token, branchName, updateUpstream, fileName, commitMessage, prTitle, prBody, xmlText, is_ns):
+    """ Commit the xml text to src/<fileName>.xml of a new branch of the
+    user's fork, forking the repo if needed, and open a pull request of it.
+    The lookups are made concurrently and the commit is made with the git
+    data API (one tree and one commit) on the branch created with it.
+    """
     logging.basicConfig(filename="error.log", format="%(levelname)s : %(asctime)s : %(message)s")
     logger = logging.getLogger()
 
@@ -62,135 +86,111 @@ def makePullRequest(username, token, branchName, updateUpstream, fileName, commi
             "type":"error",
             "message":"Some error occurred while getting the xml text."
         }
-    url = "https://api.github.com/"
     headers = {
         "Accept":"application/vnd.github.machine-man-preview+json",
-        "Authorization":"bearer "+token,
         "Content-Type":"application/json",
     }
-
-    """ Making a fork """
-
-    fork_url = "{0}/forks".format(TYPE_TO_URL_NAMESPACE[NORMAL] if is_ns else TYPE_TO_URL_LICENSE[NORMAL])
-    response = requests.get(fork_url, headers=headers)
-    data = json.loads(response.text)
-    forks = [fork["owner"]["login"] for fork in data]
-    if not username in forks:
+    upstreamUrl = TYPE_TO_URL_NAMESPACE[NORMAL] if is_ns else TYPE_TO_URL_LICENSE[NORMAL]
+    forkUrl = "{0}repos/{1}/{2}".format(githubclient.API_URL, username, upstreamUrl.rstrip("/").rsplit("/", 1)[-1])
+
+    """ The fork, its master and the upstream master at once """
+    forkResponse, forkHead, upstreamHead = githubclient.concurrently(
+        lambda: githubclient.get(forkUrl, token=token, headers=headers),
+        lambda: githubclient.get(forkUrl + "/commits/master", token=token, headers=headers),
+        lambda: githubclient.get(upstreamUrl + "/commits/master", token=token, headers=headers),
+    )
+    hasFork = forkResponse.status_code == 200 and forkResponse.json().get("fork")
+    if not hasFork or updateUpstream == "true":
+        """ The branch starts from the upstream master """
+        if upstreamHead.status_code != 200:
+            logger.error("[Pull Request] Error occured while getting ref of upstream master branch, for {0} user. {1}".format(username, upstreamHead.text))
+            return {
+                "type":"error",
+                "message":"Some error occured while getting the ref of master branch. Please try again later or contact the SPDX Team."
+            }
+        head = upstreamHead.json()
+    if not hasFork:
         """ If user has not forked the repo """
-        response = requests.post(fork_url, headers=headers)
+        response = githubclient.post(upstreamUrl + "/forks", token=token, headers=headers)
         if response.status_code != 202:
             logger.error("[Pull Request] Error occured while creating fork, for {0} user. {1}".format(username, response.text))
             return {
                 "type":"error",
                 "message":"Error occured while creating a fork of the repo. Please try again later or contact the SPDX Team."
             }
+    elif updateUpstream == "true":
+        """ If user wants to update the forked repo with upstream master """
+        body = {
+            "sha":head["sha"],
+            "force": True
+        }
+        response = githubclient.patch(forkUrl + "/git/refs/heads/master", token=token, headers=headers, data=json.dumps(body))
+        if response.status_code != 200:
+            logger.error("[Pull Request] Error occured while updating fork, for {0} user. {1}".format(username, response.text))
+            return {
+                "type":"error",
+                "message":"Error occured while updating fork with the upstream master. Please try again later or contact the SPDX Team."
+            }
     else:
-        if(updateUpstream=="true"):
-            """ If user wants to update the forked repo with upstream master """
-            update_url = "{0}/git/refs/heads/master".format(TYPE_TO_URL_NAMESPACE[NORMAL] if is_ns else TYPE_TO_URL_LICENSE[NORMAL])
-            response = requests.get(update_url, headers=headers)
-            data = json.loads(response.text)
-            sha = data["object"]["sha"]
-            body = {
-                "sha":sha,
-                "force": True
+        if forkHead.status_code != 200:
+            logger.error("[Pull Request] Error occured while getting ref of master branch, for {0} user. {1}".format(username, forkHead.text))
+            return {
+                "type":"error",
+                "message":"Some error occured while getting the ref of master branch. Please try again later or contact the SPDX Team."
             }
-            update_url = "{0}repos/{1}/{2}/git/refs/heads/master".format(url, username, settings.NAMESPACE_REPO_NAME if is_ns else settings.LICENSE_TEST_REPO_NAME)
-            response = requests.patch(update_url, headers=headers, data=json.dumps(body))
-            if response.status_code!=200:
-                logger.error("[Pull Request] Error occured while updating fork, for {0} user. {1}".format(username, response.text))
-                return {
-                    "type":"error",
-                    "message":"Error occured while updating fork with the upstream master. Please try again later or contact the SPDX Team."
-                }
-
-
-    """ Getting ref of master branch """
-    ref_url = "{0}repos/{1}/{2}/git/refs/heads/master".format(url, username, settings.NAMESPACE_REPO_NAME if is_ns else settings.LICENSE_TEST_REPO_NAME)
-    response = requests.get(ref_url, headers=headers)
-    if response.status_code != 200:
-        logger.error("[Pull Request] Error occured while getting ref of master branch, for {0} user. {1}".format(username, response.text))
-        return {
-            "type":"error",
-            "message":"Some error occured while getting the ref of master branch. Please try again later or contact the SPDX Team."
-        }
-    data = json.loads(response.text)
-    sha = str(data["object"]["sha"])
+        head = forkHead.json()
 
-    """ Getting names of all branches """
-    branch_url = url + "repos/{0}/{1}/branches".format(username, settings.NAMESPACE_REPO_NAME if is_ns else settings.LICENSE_TEST_REPO_NAME)
-    response = requests.get(branch_url, headers=headers)
-    if response.status_code != 200:
-        logger.error("[Pull Request] Error occured while getting branch names, for {0} user. {1}".format(username, response.text))
-        return {
-            "type":"error",
-            "message":"Some error occured while getting branch names. Please try again later or contact the SPDX Team."
-        }
-    data = json.loads(response.text)
-    branch_names = [i["name"] for i in data]
-
-    """ Creating branch """
-    if branchName in branch_names:
-        count=1
-        while True:
-            if((branchName+str(count)) in branch_names):
-                count+=1
-            else:
-                branchName = branchName+str(count)
-                break
-    create_branch_url = "{0}repos/{1}/{2}/git/refs".format(url, username, settings.NAMESPACE_REPO_NAME if is_ns else settings.LICENSE_TEST_REPO_NAME)
-    body = {
-        "ref":"refs/heads/{0}".format(branchName),
-        "sha":sha,
-    }
-    response = requests.post(create_branch_url, headers=headers, data=json.dumps(body))
-    if response.status_code != 201:
-        logger.error("[Pull Request] Error occured while creating branch, for {0} user. {1}".format(username, response.text))
-        return {
-            "type":"error",
-            "message":"Some error occured while creating the branch. Please try again later or contact the SPDX Team."
-        }
-    data = json.loads(response.text)
-    branch_sha = data["object"]["sha"]
-
-    """ Creating Commit """
+    """ Creating Commit: a tree holding the file on top of the master tree, and its commit """
     if fileName[-4:] == ".xml":
         fileName = fileName[:-4]
     fileName += ".xml"
-    commit_url = "{0}repos/{1}/{2}/contents/src/{3}".format(url, username, settings.NAMESPACE_REPO_NAME if is_ns else settings.LICENSE_TEST_REPO_NAME, fileName)
-    xmlText = xmlText.encode('utf-8')
-    fileContent = base64.b64encode(xmlText)
     body = {
-        "path":"src/"+fileName,
-        "message":commitMessage,
-        "content":fileContent,
-        "branch":branchName,
+        "base_tree":head["commit"]["tree"]["sha"],
+        "tree":[{
+            "path":"src/"+fileName,
+            "mode":"100644",
+            "type":"blob",
+            "content":xmlText,
+        }],
     }
-    """ Check if file already exists """
-    file_url = "{0}/contents/src/{1}".format(TYPE_TO_URL_NAMESPACE[NORMAL] if is_ns else TYPE_TO_URL_LICENSE[NORMAL], fileName)
-    response = requests.get(file_url, headers=headers)
-    if response.status_code == 200:
-        """ Creating Commit by updating the file """
-        data = json.loads(response.text)
-        file_sha = data["sha"]
-        body["sha"] = file_sha
-    response = requests.put(commit_url, headers=headers, data=json.dumps(body))
-    if not (response.status_code==201 or response.status_code==200):
+    for attempt in range(FORK_WAIT_ATTEMPTS):
+        response = githubclient.post(forkUrl + "/git/trees", token=token, headers=headers, data=json.dumps(body))
+        if hasFork or response.status_code not in (404, 409):
+            break
+        """ GitHub creates the fork in the background """
+        time.sleep(1)
+    if response.status_code == 201:
+        body = {
+            "message":commitMessage,
+            "tree":response.json()["sha"],
+            "parents":[head["sha"]],
+        }
+        response = githubclient.post(forkUrl + "/git/commits", token=token, headers=headers, data=json.dumps(body))
+    if response.status_code != 201:
         logger.error("[Pull Request] Error occured while making commit, for {0} user. {1}".format(username, response.text))
         return {
             "type":"error",
             "message":"Some error occured while making commit. Please try again later or contact the SPDX Team."
             }
 
+    """ Creating branch """
+    response, branchName = createBranch(forkUrl, token, headers, branchName, response.json()["sha"])
+    if response.status_code != 201:
+        logger.error("[Pull Request] Error occured while creating branch, for {0} user. {1}".format(username, response.text))
+        return {
+            "type":"error",
+            "message":"Some error occured while creating the branch. Please try again later or contact the SPDX Team."
+        }
+
     """ Making Pull Request """
-    pr_url = "{0}/pulls".format(TYPE_TO_URL_NAMESPACE[NORMAL] if is_ns else TYPE_TO_URL_LICENSE[NORMAL])
+    pr_url = "{0}/pulls".format(upstreamUrl)
     body = {
         "title": prTitle,
         "body": prBody,
         "head": "%s:%s"%(username, branchName),
         "base": "master",
     }
-    response = requests.post(pr_url, headers=headers, data=json.dumps(body))
+    response = githubclient.post(pr_url, token=token, headers=headers, data=json.dumps(body))
     if response.status_code != 201:
         logger.error("[Pull Request] Error occured while making pull request, for {0} user. {1}".format(username, response.text))
         return {
@@ -216,34 +216,32 @@ def save_profile(backend, user, response, *args, **kwargs):
         except:
             pass
 
+LICENSE_XML_URL = "https://raw.githubusercontent.com/spdx/license-list-XML/master/src/"
+EXCEPTION_XML_URL = LICENSE_XML_URL + "exceptions/"
+
 def check_license_name(name):
-    """ Check if a license name exists """
-    license_json = "https://raw.githubusercontent.com/spdx/license-list-data/master/json/licenses.json"
-    data = requests.get(license_json).text
-    data = json.loads(data)
-    url= "https://raw.githubusercontent.com/spdx/license-list-XML/master/src/"
-    for license in data["licenses"]:
-        if(license["licenseId"] == name):
-            url+=name
-            return [url, name]
-        elif(license["name"] == name):
-            url+=license["licenseId"]
-            return [url, license["licenseId"]]
-
-    """ Check if an exception name exists """
-    exceptions_json = "https://raw.githubusercontent.com/spdx/license-list-data/master/json/exceptions.json"
-    data = requests.get(exceptions_json).text
-    data = json.loads(data)
-    url= "https://raw.githubusercontent.com/spdx/license-list-XML/master/src/exceptions/"
-    for exception in data["exceptions"]:
-        if(exception["licenseExceptionId"] == name):
-            url += name
-            return [url, name]
-        elif(exception["name"] == name):
-            url += exception["licenseExceptionId"]
-            return [url, exception["licenseExceptionId"]]
-
-    return [False]
+    """ Check if a license or exception id or name exists.
+    Returns [url of its XML source, its id], [False] if it does not exist.
+    """
+    entry = licenseindex.getIndex().find(name)
+    if entry is None:
+        return [False]
+    url = EXCEPTION_XML_URL if entry.isException else LICENSE_XML_URL
+    return [url + entry.licenseId, entry.licenseId]
+
+
+def get_license_xml(url, licenseId):
+    """ XML source of the license or exception found by check_license_name,
+    from the local mirror or from its url on GitHub.
+    Returns None if it could not be fetched.
+    """
+    xmlText = licenselist.getLicenseXml(licenseId, exception=url.startswith(EXCEPTION_XML_URL))
+    if xmlText is not None:
+        return xmlText
+    response = githubclient.get(url + ".xml")
+    if response.status_code == 200:
+        return response.text
+    return None
 
 
 def isConnected():
@@ -255,38 +253,26 @@ def isConnected():
         return False
 
 
-def getLicenseList(token):
-    url = "https://api.github.com/"
-    headers = {
-        "Accept":"application/vnd.github.v3.raw+json",
-        "Authorization":"bearer "+token,
-        "Content-Type":"application/json",
-    }
-    license_list_url = "{0}repos/spdx/license-list-data/contents/json/licenses.json".format(url)
-    response = requests.get(license_list_url, headers=headers)
-    data = json.loads(response.text)
-    return data
-
-
 def licenseInList(namespace, namespaceId, token):
-    license_list = getLicenseList(token)
     return_dict = {
     "exists": False
     }
-    for license in license_list["licenses"]:
-        if namespaceId == license["licenseId"] or namespace == license["name"]:
-            return_dict["licenseId"] = license["licenseId"]
-            return_dict["name"] = license["name"]
-            return_dict["referenceNumber"] = license["referenceNumber"]
-            return_dict["isDeprecatedLicenseId"] = license["isDeprecatedLicenseId"]
-            return_dict["exists"] = True
+    licenses = licenseindex.getIndex().licenses
+    entry = licenses.find(namespaceId, ignoreCase=False) or licenses.find(namespace, ignoreCase=False)
+    if entry is not None:
+        license = entry.data
+        return_dict["licenseId"] = license["licenseId"]
+        return_dict["name"] = license["name"]
+        return_dict["referenceNumber"] = license["referenceNumber"]
+        return_dict["isDeprecatedLicenseId"] = license["isDeprecatedLicenseId"]
+        return_dict["exists"] = True
     return return_dict
 
 
 def licenseExists(namespace, namespaceId, token):
     # Check if a license exists on the SPDX license list
-    # check internet connection
-    if isConnected():
+    # check internet connection, not needed once the license list is indexed
+    if licenselist.isSynced() or licenseindex.isLoaded() or isConnected():
         licenseInListDict = licenseInList(namespace, namespaceId, token)
         return licenseInListDict
     return {"exists": False}
@@ -299,9 +285,8 @@ def createLicenseNamespaceIssue(licenseNamespace, token, urlType):
     body = "**1.** License Namespace: {0}\n**2.** Short identifier: {1}\n **3.** License Author or steward: {2}\n**4.** Description: {3}\n **5.** Submitter name: {4}\n **6.** SPDX doc URL:  {5}\n **7.** Submitter email: {6}\n **8.** License list URL: {7}\n **9.** Github repo URL: {8}".format(licenseNamespace.namespace, licenseNamespace.shortIdentifier, licenseNamespace.licenseAuthorName, licenseNamespace.description, licenseNamespace.fullname, licenseNamespace.url, licenseNamespace.userEmail, licenseNamespace.license_list_url, licenseNamespace.github_repo_url)
     title = "New license namespace request: {0} [SPDX-Online-Tools]".format(licenseNamespace.shortIdentifier)
     payload = {'title' : title, 'body': body, 'labels': ['new license namespace/exception request']}
-    headers = {'Authorization': 'token ' + token}
     url = "{0}/issues".format(TYPE_TO_URL_NAMESPACE[urlType])
-    r = requests.post(url, data=json.dumps(payload), headers=headers)
+    r = githubclient.post(url, token=token, data=json.dumps(payload))
     return r.status_code
 
 
@@ -324,9 +309,11 @@ def createIssue(licenseAuthorName, licenseName, licenseIdentifier, licenseCommen
     else:
         title = "New license request: {0} [SPDX-Online-Tools]".format(licenseIdentifier)
     payload = {'title' : title, 'body': body, 'labels': ['new license/exception request']}
-    headers = {'Authorization': 'token ' + token}
     url = "{0}/issues".format(TYPE_TO_URL_LICENSE[urlType])
-    r = requests.post(url, data=json.dumps(payload), headers=headers)
+    r = githubclient.post(url, token=token, data=json.dumps(payload))
+    if r.status_code == 201:
+        """ In the index right away, without waiting for the webhook """
+        licenseissues.store(licenseissues.repositoryName(TYPE_TO_URL_LICENSE[urlType]), r.json())
     return r.status_code
 
 
@@ -334,119 +321,26 @@ def parseXmlString(xmlString):
     """ View for generating a spdx license xml
     returns a dictionary with the xmlString license fields values
     """
-    data = {}
-    tree = ET.ElementTree(ET.fromstring(xmlString))
-    try:
-        root = tree.getroot()
-    except Exception as e:
-        return
-    try:
-        if(len(root) > 0 and 'isOsiApproved' in root[0].attrib):
-            data['osiApproved'] = root[0].attrib['isOsiApproved']
-        else:
-            data['osiApproved'] = '-'
-    except Exception as e:
-        data['osiApproved'] = '-'
-    data['crossRefs'] = []
-    try:
-        if(len(('{http://www.spdx.org/license}license/{http://www.spdx.org/license}crossRefs')) > 0):
-            crossRefs = tree.findall('{http://www.spdx.org/license}license/{http://www.spdx.org/license}crossRefs')[0]
-            for crossRef in crossRefs:
-                data['crossRefs'].append(crossRef.text)
-    except Exception as e:
-        data['crossRefs'] = []
-    try:
-        if(len(tree.findall('{http://www.spdx.org/license}license/{http://www.spdx.org/license}notes')) > 0):
-            data['notes'] = tree.findall('{http://www.spdx.org/license}license/{http://www.spdx.org/license}notes')[0].text
-        else:
-            data['notes'] = ''
-    except Exception as e:
-        data['notes'] = ''
-    try:
-        if(len(tree.findall('{http://www.spdx.org/license}license/{http://www.spdx.org/license}standardLicenseHeader')) > 0):
-            data['standardLicenseHeader'] = tree.findall('{http://www.spdx.org/license}license/{http://www.spdx.org/license}standardLicenseHeader')[0].text
-        else:
-            data['standardLicenseHeader'] = ''
-    except Exception as e:
-        data['standardLicenseHeader'] = ''
-    try:
-        if(len(tree.findall('{http://www.spdx.org/license}license/{http://www.spdx.org/license}text')) > 0):
-            textElem = tree.findall('{http://www.spdx.org/license}license/{http://www.spdx.org/license}text')[0]
-            ET.register_namespace('', "http://www.spdx.org/license")
-            textStr = ET.tostring(textElem).strip()
-            if(len(textStr) >= 49 and textStr[:42] == '<text xmlns="http://www.spdx.org/license">' and textStr[-7:] == '</text>'):
-                textStr = textStr[42:]
-                textStr = textStr[:-7].strip().replace('&lt;', '<').replace('&gt;', '>').strip()
-            data['text'] = textStr.strip()
-        else:
-            data['text'] = ''
-    except Exception as e:
-        data['text'] = ''
-    return data
-
-
-def clean(text):
-    """ Clean the XML tags from license text after parsing the XML string.
-    """
-    tags = re.compile('<.*?>')
-    cleanedText = re.sub(tags, '', text)
-    return cleanedText
-
-
-def get_rejected_licenses_issues(urlType):
-    """ Get all the issues that are already rejected by the legal team.
-    """
-    payload = {'state': 'closed', 'labels': 'new license/exception: Not Accepted'}
-    url = TYPE_TO_URL_LICENSE[urlType] + '/issues'
-    res = requests.get(url, params=payload)
-    issues = res.json()
-    return issues
-
-
-def get_yet_not_approved_licenses_issues(urlType):
-    """ Get all the issues that are yet to be approved by the legal team by sorting them with labels.
-    """
-    payload = {'state': 'open', 'labels': 'new license/exception request'}
-    url = TYPE_TO_URL_LICENSE[urlType] + '/issues'
-    response = requests.get(url, params=payload)
-    issues = response.json()
-    newRequestIssues = []
-    # Remove issues with Accepted labels
-    for issue in issues:
-        for label in issue.get('labels'):
-            if "new license/exception: Accepted" in label.get('name'):
-                break
-        else:
-            newRequestIssues.append(issue)
-    return newRequestIssues
+    data = licensexml.parse(xmlString)
+    return {
+        'osiApproved': data.osiApproved,
+        'crossRefs': list(data.crossRefs),
+        'notes': data.notes,
+        'standardLicenseHeader': data.standardLicenseHeader,
+        'text': data.text,
+    }
 
 
-def get_license_data(issues):
-    """ Get license data returns a dictionary with key as license IDs and value as the
-    corresponding license text of these IDs.
+def get_request_issues(urlType):
+    """ Issues of the rejected and of the not yet approved license requests,
+    read from the local index of the issues (app.licenseissues), which is
+    kept current by the sync_license_issues command and the webhook.
     """
-    licenseIds = []
-    licenseTexts = []
-    for issue in issues:
-        if not issue.get('pull_request'):
-            licenseInfo = issue.get('body')
-            if '[SPDX-Online-Tools]' in issue.get('title'):
-                licenseIdentifier = re.search(r'(?im)short identifier:\s([a-zA-Z0-9|.|-]+)', licenseInfo).group(1)
-                licenseIds.append(licenseIdentifier)
-                try:
-                    licenseXml = str(LicenseRequest.objects.get(shortIdentifier=licenseIdentifier).xml)
-                    licenseText = parseXmlString(licenseXml)['text']
-                    licenseTexts.append(clean(licenseText))
-                except LicenseRequest.DoesNotExist:
-                    pass
-    licenseData = dict(zip(licenseIds, licenseTexts))
-    return licenseData
-
-
-def get_issue_url_by_id(licenseId, issues):
-    """ Get the github issue url of the license by license ID and the issues instance.
-    """
-    return [issue.get('html_url') for issue in issues if issue.get('pull_request') is None if licenseId in issue.get('title')][0]
+    repository = licenseissues.repositoryName(TYPE_TO_URL_LICENSE[urlType])
+    if not licenseissues.isSynced(repository):
+        logger = logging.getLogger()
+        logger.warning("The issues of %s were never synced, run manage.py sync_license_issues", repository)
+    return licenseissues.requestIssues(repository)
 
 
 def check_new_licenses_and_rejected_licenses(inputLicenseText, urlType):
@@ -454,38 +348,51 @@ def check_new_licenses_and_rejected_licenses(inputLicenseText, urlType):
     a not yet approved license or a rejected license.
     returns the close matches of license text along with the license issue URL.
     """
-    issues = get_rejected_licenses_issues(urlType)
-    issues.extend(get_yet_not_approved_licenses_issues(urlType))
-    licenseData = get_license_data(issues)
-    matches = get_close_matches(inputLicenseText, licenseData)
+    issues = get_request_issues(urlType)
+    issueUrls = {}
+    for licenseId, url in issues.values_list('shortIdentifier', 'url'):
+        issueUrls.setdefault(licenseId, url)
+    """ The license requests of the issues, the latest one of an identifier wins """
+    licenseRows = dict((licenseId, (plainText, fingerprint)) for licenseId, plainText, fingerprint in
+        LicenseRequest.objects.filter(shortIdentifier__in=issues.values('shortIdentifier'))
+        .order_by('pk').values_list('shortIdentifier', 'plainText', 'fingerprint'))
+    licenseData = dict((licenseId, row[0]) for licenseId, row in licenseRows.items())
+    fingerprints = dict((licenseId, row[1]) for licenseId, row in licenseRows.items())
+    matches = get_close_matches(inputLicenseText, licensecorpus.requestCandidates(inputLicenseText, licenseData, fingerprints))
     matches = matches.keys()
     if not matches:
         return matches, ''
-    issueUrl = get_issue_url_by_id(matches[0], issues)
-    return matches, issueUrl
+    return matches, issueUrls[matches[0]]
 
 
 def check_spdx_license(licenseText):
     """Check the license text against the spdx license list.
     """
     licenseText = unicode(licenseText.decode('string_escape'), 'utf-8')
-    r = redis.StrictRedis(host='localhost', port=6379, db=0)
-    
-    # if redis is empty build the spdx license list in the redis database
-    if r.keys('*') == []:
-        build_spdx_licenses()
-    spdxLicenseIds = r.keys()
-    spdxLicenseTexts = r.mget(spdxLicenseIds)
-    licenseData = dict(zip(spdxLicenseIds, spdxLicenseTexts))
-    matches = get_close_matches(licenseText, licenseData)
+    matchedLicenseIds, matchType, score = match_spdx_license(licenseText)
+    return matchedLicenseIds, matchType
+
+
+def match_spdx_license(licenseText):
+    """Match a unicode license text against the spdx license list.
+    returns the matched license ID(s), the match type and the similarity score.
+    """
+    corpus = licensecorpus.getCorpus()
+
+    exactMatches = corpus.exactMatches(licenseText)
+    if exactMatches:
+        return exactMatches, 'Perfect match', 1.0
+    matches = get_close_matches(licenseText, corpus.candidates(licenseText))
 
     if not matches:
         matchedLicenseIds = None
         matchType = 'No match'
+        score = 0.0
     
     elif 1.0 in matches.values() or all(0.99 < score for score in matches.values()):
         matchedLicenseIds = matches.keys()
         matchType = 'Perfect match'
+        score = max(matches.values())
     
     else:
         for licenseID in matches:
@@ -497,4 +404,5 @@ def check_spdx_license(licenseText):
         else:
             matchedLicenseIds = max(matches, key=matches.get)
             matchType = 'Close match'
-    return matchedLicenseIds, matchType
+        score = matches[matchedLicenseIds]
+    return matchedLicenseIds, matchType, score
@@ -25,10 +25,11 @@ from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth.models import User
 from django.utils.datastructures import MultiValueDictKeyError
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
 
-import codecs
-import jpype
 import requests
 from lxml import etree
 import re
@@ -45,12 +46,12 @@ except ImportError:
 import datetime
 from wsgiref.util import FileWrapper
 import os
-import subprocess
 
 from social_django.models import UserSocialAuth
-from app.models import UserID, LicenseNames
+from app.models import UserID
 from app.forms import UserRegisterForm,UserProfileForm,InfoForm,OrgInfoForm
 import app.utils as utils
+from app import formatxml, licensecorpus, licenseissues, licensenames, requestlist, schemacache, toolpool
 from django.forms import model_to_dict
 from app.generateXml import generateLicenseXml
 
@@ -135,7 +136,10 @@ def submitNewLicense(request):
                             data['inputLicenseText'] = licenseText
                             data['xml'] = generateLicenseXml(licenseOsi, licenseIdentifier, licenseName,
                                 listVersionAdded, licenseSourceUrls, licenseHeader, licenseNotes, licenseText)
-                            originalLicenseText = get_spdx_license_text(matchingIds)
+                            """ The matched text is already in the license corpus """
+                            originalLicenseText = licensecorpus.getCorpus().getText(matchingIds)
+                            if originalLicenseText is None:
+                                originalLicenseText = get_spdx_license_text(matchingIds)
                             data['originalLicenseText'] = originalLicenseText
                             data['licenseOsi'] = licenseOsi
                             data['licenseIdentifier'] = licenseIdentifier
@@ -440,14 +444,9 @@ def validate(request):
     if request.user.is_authenticated() or settings.ANONYMOUS_LOGIN_ENABLED:
         context_dict={}
         if request.method == 'POST':
-            if (jpype.isJVMStarted()==0):
-                """ If JVM not already started, start it."""
-                classpath = settings.JAR_ABSOLUTE_PATH
-                jpype.startJVM(jpype.getDefaultJVMPath(),"-ea","-Djava.class.path=%s"%classpath)
-            """ Attach a Thread and start processing the request. """
-            jpype.attachThreadToJVM()
-            package = jpype.JPackage("org.spdx.tools")
-            verifyclass = package.Verify
+            """ Get the tool classes, the calls run in the tool workers """
+            tools = toolpool.getTools()
+            verifyclass = tools.Verify
             ajaxdict=dict()
             try :
                 if request.FILES["file"]:
@@ -467,10 +466,8 @@ def validate(request):
                             ajaxdict["type"] = "warning"
                             ajaxdict["data"] = "The following warning(s) were raised: " + str(retval)
                             response = dumps(ajaxdict)
-                            jpype.detachThreadFromJVM()
                             return HttpResponse(response,status=400)
                         context_dict["error"] = retval
-                        jpype.detachThreadFromJVM()
                         return render(request,
                             'app/validate.html',context_dict,status=400
                             )
@@ -478,9 +475,7 @@ def validate(request):
                         """ Valid SPDX Document """
                         ajaxdict["data"] = "This SPDX Document is valid."
                         response = dumps(ajaxdict)
-                        jpype.detachThreadFromJVM()
                         return HttpResponse(response,status=200)
-                    jpype.detachThreadFromJVM()
                     return HttpResponse("This SPDX Document is valid.",status=200)
                 else :
                     """ If no file uploaded."""
@@ -489,24 +484,20 @@ def validate(request):
                         ajaxdict["type"] = "error"
                         ajaxdict["data"] = "No file uploaded"
                         response = dumps(ajaxdict)
-                        jpype.detachThreadFromJVM()
                         return HttpResponse(response,status=404)
                     context_dict["error"] = "No file uploaded"
-                    jpype.detachThreadFromJVM()
                     return render(request,
                         'app/validate.html',context_dict,status=404
                         )
-            except jpype.JavaException as ex :
+            except toolpool.ToolError as ex :
                 """ Error raised by verifyclass.verify without exiting the application"""
                 if (request.is_ajax()):
                     ajaxdict=dict()
                     ajaxdict["type"] = "error"
-                    ajaxdict["data"] = jpype.JavaException.message(ex)
+                    ajaxdict["data"] = ex.message
                     response = dumps(ajaxdict)
-                    jpype.detachThreadFromJVM()
                     return HttpResponse(response,status=400)
-                context_dict["error"] = jpype.JavaException.message(ex)
-                jpype.detachThreadFromJVM()
+                context_dict["error"] = ex.message
                 return render(request,
                     'app/validate.html',context_dict,status=400
                     )
@@ -517,10 +508,8 @@ def validate(request):
                     ajaxdict["type"] = "error"
                     ajaxdict["data"] = "No files selected."
                     response = dumps(ajaxdict)
-                    jpype.detachThreadFromJVM()
                     return HttpResponse(response,status=404)
                 context_dict["error"] = "No files selected."
-                jpype.detachThreadFromJVM()
                 return render(request,
                  'app/validate.html',context_dict,status=404
                  )
@@ -531,10 +520,8 @@ def validate(request):
                     ajaxdict["type"] = "error"
                     ajaxdict["data"] = format_exc()
                     response = dumps(ajaxdict)
-                    jpype.detachThreadFromJVM()
                     return HttpResponse(response,status=400)
                 context_dict["error"] = format_exc()
-                jpype.detachThreadFromJVM()
                 return render(request,
                     'app/validate.html',context_dict,status=400
                     )
@@ -555,32 +542,11 @@ def validate_xml(request):
             ajaxdict=dict()
             try :
                 if "xmlText" in request.POST:
-                    """ Saving file to the media directory """
                     xmlText = request.POST['xmlText']
                     xmlText = xmlText.encode('utf-8')
-                    folder = str(request.user) + "/" + str(int(time()))
-                    if not os.path.isdir(str(settings.MEDIA_ROOT +"/"+ folder)):
-                        os.makedirs(str(settings.MEDIA_ROOT +"/"+ folder))
-                    uploaded_file_url = settings.MEDIA_ROOT + '/' + folder + '/' + 'xmlFile.xml'
-                    with open(uploaded_file_url,'w') as f:
-                        f.write(xmlText)
-                    """ Get schema text from GitHub,
-                    if it fails use the file in examples folder """
-                    try:
-                        schema_url = 'https://raw.githubusercontent.com/spdx/license-list-XML/master/schema/ListedLicense.xsd'
-                        schema_text = requests.get(schema_url, timeout=5).text
-                        xmlschema_doc = etree.fromstring(schema_text)
-                    except:
-                        schema_url = settings.BASE_DIR + "/examples/xml-schema.xsd"
-                        with open(schema_url) as f:
-                            xmlschema_doc = etree.parse(f)
-                    """ Using the lxml etree functions """
-                    xmlschema = etree.XMLSchema(xmlschema_doc)
-                    with open(uploaded_file_url) as f:
-                        xml_input = etree.parse(f)
-
+                    """ Validated in memory against the cached schema, see app.schemacache """
                     try:
-                        xmlschema.assertValid(xml_input)
+                        schemacache.validate(xmlText)
                         """ If the xml is valid """
                         if (request.is_ajax()):
                             ajaxdict["type"] = "valid"
@@ -588,7 +554,7 @@ def validate_xml(request):
                             response = dumps(ajaxdict)
                             return HttpResponse(response,status=200)
                         return HttpResponse("This XML is valid against SPDX License Schema.",status=200)
-                    except Exception as e:
+                    except etree.DocumentInvalid as e:
                         if (request.is_ajax()):
                             ajaxdict["type"] = "invalid"
                             ajaxdict["data"] = "This XML is not valid against SPDX License Schema.\n"+str(e)
@@ -633,15 +599,10 @@ def compare(request):
     if request.user.is_authenticated() or settings.ANONYMOUS_LOGIN_ENABLED:
         context_dict={}
         if request.method == 'POST':
-            if (jpype.isJVMStarted()==0):
-                """ If JVM not already started, start it, attach a Thread and start processing the request """
-                classpath =settings.JAR_ABSOLUTE_PATH
-                jpype.startJVM(jpype.getDefaultJVMPath(),"-ea","-Djava.class.path=%s"%classpath)
-            """ Attach a Thread and start processing the request """
-            jpype.attachThreadToJVM()
-            package = jpype.JPackage("org.spdx.tools")
-            verifyclass = package.Verify
-            compareclass = package.CompareMultpleSpdxDocs
+            """ Get the tool classes, the calls run in the tool workers """
+            tools = toolpool.getTools()
+            verifyclass = tools.Verify
+            compareclass = tools.CompareMultpleSpdxDocs
             ajaxdict = dict()
             filelist = list()
             errorlist = list()
@@ -654,7 +615,6 @@ def compare(request):
                     warningoccurred = False
                     if (len(request.FILES.getlist("files"))<2):
                         context_dict["error"]= "Please select atleast 2 files"
-                        jpype.detachThreadFromJVM()
                         return render(request,
                             'app/compare.html',context_dict, status=404
                             )
@@ -678,11 +638,11 @@ def compare(request):
                             else :
                                 filelist.append(myfile.name)
                                 errorlist.append("No errors found")
-                        except jpype.JavaException as ex :
+                        except toolpool.ToolError as ex :
                             """ Error raised by verifyclass.verifyRDFFile without exiting the application"""
                             erroroccurred = True
                             filelist.append(myfile.name)
-                            errorlist.append(jpype.JavaException.message(ex))
+                            errorlist.append(ex.message)
                         except :
                             """ Other Exceptions"""
                             erroroccurred = True
@@ -701,11 +661,9 @@ def compare(request):
                                 ajaxdict["errors"] = errorlist
                                 ajaxdict["toolerror"] = format_exc()
                                 response = dumps(ajaxdict)
-                                jpype.detachThreadFromJVM()
                                 return HttpResponse(response,status=400)
                             context_dict["type"] = "warning2"
                             context_dict["error"]= errorlist
-                            jpype.detachThreadFromJVM()
                             return render(request,
                                 'app/compare.html',context_dict,status=400
                                 )
@@ -714,12 +672,10 @@ def compare(request):
                             if (request.is_ajax()):
                                 ajaxdict["medialink"] = settings.MEDIA_URL + folder + "/"+ rfilename
                                 response = dumps(ajaxdict)
-                                jpype.detachThreadFromJVM()
                                 return HttpResponse(response)
                             context_dict["Content-Type"] = "application/vnd.ms-excel"
                             context_dict['Content-Disposition'] = 'attachment; filename="{}"'.format(rfilename)
                             context_dict["medialink"] = settings.MEDIA_URL + folder + "/" + rfilename
-                            jpype.detachThreadFromJVM()
                             return render(request,
                                 'app/compare.html',context_dict,status=200
                                 )
@@ -731,13 +687,11 @@ def compare(request):
                                 ajaxdict["errors"] = errorlist
                                 ajaxdict["medialink"] = settings.MEDIA_URL + folder + "/" + rfilename
                                 response = dumps(ajaxdict)
-                                jpype.detachThreadFromJVM()
                                 return HttpResponse(response,status=406)
                             context_dict["Content-Type"] = "application/vnd.ms-excel"
                             context_dict['Content-Disposition'] = 'attachment; filename="{}"'.format(rfilename)
                             context_dict["type"] = "warning"
                             context_dict["medialink"] = settings.MEDIA_URL + folder + "/" + rfilename
-                            jpype.detachThreadFromJVM()
                             return render(request,
                                 'app/compare.html',context_dict,status=406
                                 )
@@ -747,18 +701,15 @@ def compare(request):
                             ajaxdict["type"] = "error"
                             ajaxdict["errors"] = errorlist
                             response = dumps(ajaxdict)
-                            jpype.detachThreadFromJVM()
                             return HttpResponse(response,status=400)
                         context_dict["type"] = "error"
                         context_dict["error"] = errorlist
-                        jpype.detachThreadFromJVM()
                         return render(request,
                             'app/compare.html',context_dict,status=400
                             )
                 else :
                     context_dict["error"]= "File Not Uploaded"
                     context_dict["type"] = "error"
-                    jpype.detachThreadFromJVM()
                     return render(request,
                         'app/compare.html',context_dict,status=404
                         )
@@ -772,11 +723,9 @@ def compare(request):
                     ajaxdict["type"] = "error"
                     ajaxdict["errors"] = errorlist
                     response = dumps(ajaxdict)
-                    jpype.detachThreadFromJVM()
                     return HttpResponse(response,status=404)
                 context_dict["error"] = "Select atleast two files"
                 context_dict["type"] = "error"
-                jpype.detachThreadFromJVM()
                 return render(request,
                     'app/compare.html',context_dict,status=404
                     )
@@ -807,13 +756,8 @@ def convert(request):
     if request.user.is_authenticated() or settings.ANONYMOUS_LOGIN_ENABLED:
         context_dict={}
         if request.method == 'POST':
-            if (jpype.isJVMStarted()==0):
-                """ If JVM not already started, start it, attach a Thread and start processing the request """
-                classpath =settings.JAR_ABSOLUTE_PATH
-                jpype.startJVM(jpype.getDefaultJVMPath(),"-ea","-Djava.class.path=%s"%classpath)
-            """ Attach a Thread and start processing the request """
-            jpype.attachThreadToJVM()
-            package = jpype.JPackage("org.spdx.tools")
+            """ Get the tool classes, the calls run in the tool workers """
+            tools = toolpool.getTools()
             ajaxdict=dict()
             try :
                 if request.FILES["file"]:
@@ -839,18 +783,17 @@ def convert(request):
                         if (option2=="RDF"):
                             option3 = request.POST["tagToRdfFormat"]
                             content_type = "application/rdf+xml"
-                            tagtordfclass = package.TagToRDF
+                            tagtordfclass = tools.TagToRDF
                             retval = tagtordfclass.onlineFunction([settings.APP_DIR+uploaded_file_url,settings.MEDIA_ROOT+"/"+folder+"/"+convertfile, option3])
                             if (len(retval) > 0):
                                 warningoccurred = True
                         elif (option2=="Spreadsheet"):
                             content_type = "application/vnd.ms-excel"
-                            tagtosprdclass = package.TagToSpreadsheet
+                            tagtosprdclass = tools.TagToSpreadsheet
                             retval = tagtosprdclass.onlineFunction([settings.APP_DIR+uploaded_file_url,settings.MEDIA_ROOT+"/"+folder+"/"+"/"+convertfile])
                             if (len(retval) > 0):
                                 warningoccurred = True
                         else :
-                            jpype.detachThreadFromJVM()
                             context_dict["error"] = "Select the available conversion types."
                             return render(request,
                                 'app/convert.html',context_dict,status=400
@@ -859,24 +802,23 @@ def convert(request):
                         print ("Verifing for RDF Document")
                         if (option2=="Tag"):
                             content_type = "text/tag-value"
-                            rdftotagclass = package.RdfToTag
+                            rdftotagclass = tools.RdfToTag
                             retval = rdftotagclass.onlineFunction([settings.APP_DIR+uploaded_file_url,settings.MEDIA_ROOT+"/"+folder+"/"+"/"+convertfile])
                             if (len(retval) > 0):
                                 warningoccurred = True
                         elif (option2=="Spreadsheet"):
                             content_type = "application/vnd.ms-excel"
-                            rdftosprdclass = package.RdfToSpreadsheet
+                            rdftosprdclass = tools.RdfToSpreadsheet
                             retval = rdftosprdclass.onlineFunction([settings.APP_DIR+uploaded_file_url,settings.MEDIA_ROOT+"/"+folder+"/"+"/"+convertfile])
                             if (len(retval) > 0):
                                 warningoccurred = True
                         elif (option2=="HTML"):
                             content_type = "text/html"
-                            rdftohtmlclass = package.RdfToHtml
+                            rdftohtmlclass = tools.RdfToHtml
                             retval = rdftohtmlclass.onlineFunction([settings.APP_DIR+uploaded_file_url,settings.MEDIA_ROOT+"/"+folder+"/"+"/"+convertfile])
                             if (len(retval) > 0):
                                 warningoccurred = True
                         else :
-                            jpype.detachThreadFromJVM()
                             context_dict["error"] = "Select the available conversion types."
                             return render(request,
                                 'app/convert.html',context_dict,status=400
@@ -885,18 +827,17 @@ def convert(request):
                         print ("Verifing for Spreadsheet Document")
                         if (option2=="Tag"):
                             content_type = "text/tag-value"
-                            sprdtotagclass = package.SpreadsheetToTag
+                            sprdtotagclass = tools.SpreadsheetToTag
                             retval = sprdtotagclass.onlineFunction([settings.APP_DIR+uploaded_file_url,settings.MEDIA_ROOT+"/"+folder+"/"+"/"+convertfile])
                             if (len(retval) > 0):
                                 warningoccurred = True
                         elif (option2=="RDF"):
                             content_type = "application/rdf+xml"
-                            sprdtordfclass = package.SpreadsheetToRDF
+                            sprdtordfclass = tools.SpreadsheetToRDF
                             retval = sprdtordfclass.onlineFunction([settings.APP_DIR+uploaded_file_url,settings.MEDIA_ROOT+"/"+folder+"/"+"/"+convertfile])
                             if (len(retval) > 0):
                                 warningoccurred = True
                         else :
-                            jpype.detachThreadFromJVM()
                             context_dict["error"] = "Select the available conversion types."
                             return render(request,
                                 'app/convert.html',context_dict,status=400
@@ -906,12 +847,10 @@ def convert(request):
                         if (request.is_ajax()):
                             ajaxdict["medialink"] = settings.MEDIA_URL + folder + "/"+ convertfile
                             response = dumps(ajaxdict)
-                            jpype.detachThreadFromJVM()
                             return HttpResponse(response)
                         context_dict['Content-Disposition'] = 'attachment; filename="{}"'.format(convertfile)
                         context_dict["medialink"] = settings.MEDIA_URL + folder + "/"+ convertfile
                         context_dict["Content-Type"] = content_type
-                        jpype.detachThreadFromJVM()
                         return render(request,
                             'app/convert.html',context_dict,status=200
                             )
@@ -922,35 +861,30 @@ def convert(request):
                             ajaxdict["data"] = "The following warning(s) were raised by "+ myfile.name + ": " + str(retval)
                             ajaxdict["medialink"] = settings.MEDIA_URL + folder + "/"+ convertfile
                             response = dumps(ajaxdict)
-                            jpype.detachThreadFromJVM()
                             return HttpResponse(response,status=406)
                         context_dict["error"] = str(retval)
                         context_dict["type"] = "warning"
                         context_dict['Content-Disposition'] = 'attachment; filename="{}"'.format(convertfile)
                         context_dict["Content-Type"] = content_type
                         context_dict["medialink"] = settings.MEDIA_URL + folder + "/"+ convertfile
-                        jpype.detachThreadFromJVM()
                         return render(request,
                             'app/convert.html',context_dict,status=406
                             )
                 else :
                     context_dict["error"] = "No file uploaded"
                     context_dict["type"] = "error"
-                    jpype.detachThreadFromJVM()
                     return render(request,
                         'app/convert.html',context_dict,status=404
                         )
-            except jpype.JavaException as ex :
+            except toolpool.ToolError as ex :
                 """ Java exception raised without exiting the application"""
                 if (request.is_ajax()):
                     ajaxdict["type"] = "error"
-                    ajaxdict["data"] = jpype.JavaException.message(ex)
+                    ajaxdict["data"] = ex.message
                     response = dumps(ajaxdict)
-                    jpype.detachThreadFromJVM()
                     return HttpResponse(response,status=400)
                 context_dict["type"] = "error"
-                context_dict["error"] = jpype.JavaException.message(ex)
-                jpype.detachThreadFromJVM()
+                context_dict["error"] = ex.message
                 return render(request,
                     'app/convert.html',context_dict,status=400
                     )
@@ -960,11 +894,9 @@ def convert(request):
                     ajaxdict["type"] = "error"
                     ajaxdict["data"] = "No files selected."
                     response = dumps(ajaxdict)
-                    jpype.detachThreadFromJVM()
                     return HttpResponse(response,status=404)
                 context_dict["type"] = "error"
                 context_dict["error"] = "No files selected."
-                jpype.detachThreadFromJVM()
                 return render(request,
                     'app/convert.html',context_dict,status=404
                     )
@@ -974,11 +906,9 @@ def convert(request):
                     ajaxdict["type"] = "error"
                     ajaxdict["data"] = format_exc()
                     response = dumps(ajaxdict)
-                    jpype.detachThreadFromJVM()
                     return HttpResponse(response,status=400)
                 context_dict["type"] = "error"
                 context_dict["error"] = format_exc()
-                jpype.detachThreadFromJVM()
                 return render(request,
                     'app/convert.html',context_dict,status=400
                     )
@@ -1023,14 +953,14 @@ def check_license(request):
                     return render(request,
                         'app/check_license.html',context_dict,status=200
                         )
-            except jpype.JavaException as ex :
+            except toolpool.ToolError as ex :
                 """ Java exception raised without exiting the application """
                 if (request.is_ajax()):
                     ajaxdict=dict()
-                    ajaxdict["data"] = jpype.JavaException.message(ex)
+                    ajaxdict["data"] = ex.message
                     response = dumps(ajaxdict)
                     return HttpResponse(response,status=404)
-                context_dict["error"] = jpype.JavaException.message(ex)
+                context_dict["error"] = ex.message
                 return render(request,
                     'app/check_license.html',context_dict,status=404
                     )
@@ -1110,11 +1040,10 @@ def xml_upload(request):
                         return render(request,
                             'app/xml_upload.html',context_dict,status=404
                             )
-                    url[0] += ".xml"
-                    response = requests.get(url[0])
-                    if(response.status_code == 200):
+                    xmlText = utils.get_license_xml(url[0], url[1])
+                    if xmlText is not None:
                         page_id = request.POST['page_id']
-                        request.session[page_id] = [response.text, url[1]]
+                        request.session[page_id] = [xmlText, url[1]]
                         if (request.is_ajax()):
                             ajaxdict["redirect_url"] = '/app/edit/'+page_id+'/'
                             response = dumps(ajaxdict)
@@ -1208,9 +1137,19 @@ def xml_upload(request):
         return HttpResponseRedirect(settings.LOGIN_URL)
 
 def autocompleteModel(request):
+    """ Names and ids of the licenses and exceptions matching term, the best
+    first, at most limit of them. The terms of a batch (terms=...&terms=...)
+    are answered at once, by term.
+    """
+    try:
+        limit = int(request.GET.get('limit', settings.LICENSE_NAMES_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit.'}, status=400)
+    if 'terms' in request.GET:
+        terms = request.GET.getlist('terms')[:settings.LICENSE_NAMES_MAX_BATCH]
+        return JsonResponse(dict((term, licensenames.search(term, limit)) for term in terms))
     if 'term' in request.GET:
-        result = LicenseNames.objects.filter(name__icontains=request.GET['term']).values_list('name',flat=True)
-        return HttpResponse( json.dumps( [ name for name in result ] ) )
+        return JsonResponse(licensenames.search(request.GET['term'], limit), safe=False)
     return HttpResponse()
 
 def license_xml_edit(request, page_id):
@@ -1286,6 +1225,42 @@ def edit_license_namespace_xml(request, license_id=None):
     else:
         return HttpResponseRedirect('/app/license_namespace_requests')
 
+def requestListContext(request, listName, rowsName):
+    """ Context of the first page of the request list listName, filtered
+    by the query parameters, its rows under rowsName
+    """
+    try:
+        page = requestlist.getPage(listName, request.GET)
+    except ValueError as ex:
+        return {rowsName: [], 'error': str(ex), 'filters': requestlist.getFilters(request.GET)}
+    query = urlencode(page.filters)
+    rowsUrl = reverse('request-rows', args=[listName])
+    return {
+        rowsName: page.rows,
+        'nextCursor': page.next,
+        'filters': page.filters,
+        'rowsUrl': rowsUrl + '?' + query if query else rowsUrl,
+    }
+
+
+def requestRows(request, listName):
+    """ View returning a page of a request list as JSON, for the infinite
+    scroll of the list pages: the rows, their html and the next cursor
+    """
+    if listName not in requestlist.LISTS:
+        raise Http404
+    requestList = requestlist.LISTS[listName]
+    try:
+        page = requestlist.getPage(listName, request.GET)
+    except ValueError as ex:
+        return JsonResponse({'error': str(ex)}, status=400)
+    return JsonResponse({
+        'rows': [requestlist.rowData(row, requestList) for row in page.rows],
+        'html': render_to_string(requestList.rowTemplate, {'rows': page.rows}, request=request),
+        'next': page.next,
+    })
+
+
 def archiveRequests(request, license_id=None):
     """ View for archive license requests
     returns archive_requests.html template
@@ -1295,8 +1270,7 @@ def archiveRequests(request, license_id=None):
         license_id = request.POST.get('license_id', False)
         if license_id:
             LicenseRequest.objects.filter(pk=license_id).update(archive=archive)
-    archiveRequests = LicenseRequest.objects.filter(archive='True').order_by('-submissionDatetime')
-    context_dict={'archiveRequests': archiveRequests}
+    context_dict = requestListContext(request, 'archive_requests', 'archiveRequests')
     return render(request,
         'app/archive_requests.html',context_dict
         )
@@ -1311,8 +1285,7 @@ def archiveNamespaceRequests(request, license_id=None):
         license_id = request.POST.get('license_id', False)
         if license_id:
             LicenseNamespace.objects.filter(pk=license_id).update(archive=archive)
-    archiveRequests = LicenseNamespace.objects.filter(archive='True').order_by('-submissionDatetime')
-    context_dict={'archiveRequests': archiveRequests}
+    context_dict = requestListContext(request, 'archive_namespace_requests', 'archiveRequests')
     return render(request,
         'app/archive_namespace_requests.html',context_dict
         )
@@ -1362,8 +1335,7 @@ def promoteNamespaceRequests(request, license_id=None):
             statusCode = return_tuple[0]
             if statusCode == 201:
                 LicenseNamespace.objects.filter(pk=license_id).update(promoted=promoted, license_request_id=return_tuple[1].id)
-    promotedRequests = LicenseNamespace.objects.filter(promoted='True').order_by('-submissionDatetime')
-    context_dict={'promotedRequests': promotedRequests}
+    context_dict = requestListContext(request, 'promoted_namespace_requests', 'promotedRequests')
     return render(request,
         'app/promoted_namespace_requests.html',context_dict
         )
@@ -1378,8 +1350,7 @@ def licenseRequests(request, license_id=None):
         license_id = request.POST.get('license_id', False)
         if license_id:
             LicenseRequest.objects.filter(pk=license_id).update(archive=archive)
-    licenseRequests = LicenseRequest.objects.filter(archive='False').order_by('-submissionDatetime')
-    context_dict={'licenseRequests': licenseRequests}
+    context_dict = requestListContext(request, 'license_requests', 'licenseRequests')
     return render(request,
         'app/license_requests.html',context_dict
         )
@@ -1397,8 +1368,8 @@ def licenseNamespaceRequests(request, license_id=None):
         license_id = request.POST.get('license_id', False)
         if license_id:
             LicenseRequest.objects.filter(pk=license_id).update(archive=archive)
-    licenseNamespaceRequests = LicenseNamespace.objects.filter(archive='False').order_by('-submissionDatetime')
-    context_dict={'licenseNamespaceRequests': licenseNamespaceRequests, 'github_login': github_login}
+    context_dict = requestListContext(request, 'license_namespace_requests', 'licenseNamespaceRequests')
+    context_dict['github_login'] = github_login
     return render(request,
         'app/license_namespace_requests.html',context_dict
         )
@@ -1422,6 +1393,28 @@ def update_session_variables(request):
     return HttpResponse("Bad Request", status=400)
 
 
+@csrf_exempt
+def githubWebhook(request):
+    """ View receiving the GitHub "issues" webhook of the license request
+    repositories, to keep the local index of their issues up to date
+    """
+    if request.method != "POST":
+        return HttpResponse("Method Not Allowed", status=405)
+    if not licenseissues.checkSignature(request.body, request.META.get("HTTP_X_HUB_SIGNATURE_256") or request.META.get("HTTP_X_HUB_SIGNATURE")):
+        return HttpResponse("Invalid signature", status=403)
+    event = request.META.get("HTTP_X_GITHUB_EVENT")
+    if event == "ping":
+        return HttpResponse("pong", status=200)
+    try:
+        payload = loads(request.body.decode("utf-8"))
+    except ValueError:
+        return HttpResponse("Invalid payload", status=400)
+    licenseissues.handleEvent(event, payload)
+    return HttpResponse(status=204)
+
+
+BEAUTIFY_CONFIG = formatxml.make_config(indent=3)
+
 def beautify(request):
     """ View that handles beautify xml requests """
     if request.method=="POST":
@@ -1431,20 +1424,20 @@ def beautify(request):
             """ Getting the license xml input by the user"""
             xmlString = request.POST.get("xml", None)
             if xmlString:
-                with open('test.xml','w') as f:
-                    f.write(xmlString)
-                    f.close()
-                commandRun = subprocess.call(["python", "app/formatxml.py","test.xml","-i", "3"])
-                if commandRun == 0:
-                    data = codecs.open("test.xml", 'r', encoding='string_escape').read()
-                    data = unicode(data, 'utf-8')
-                    os.remove('test.xml')
+                """ Formatted in process, with 3 spaces per level """
+                try:
+                    data = formatxml.format_xml(xmlString, BEAUTIFY_CONFIG)
+                except (formatxml.et.ParseError, KeyError):
+                    """ Not well formed, or attributes on a tag the formatter does not know """
+                    logger.error(str(format_exc()))
+                    data = None
+                if data is not None:
                     if (request.is_ajax()):
                         ajaxdict["type"] = "success"
                         ajaxdict["data"] = data
                         response = dumps(ajaxdict)
                         return HttpResponse(response,status=200)
-                    return HttpResponse(response["data"],status=200)
+                    return HttpResponse(data,status=200)
                 else:
                     ajaxdict["type"] = "error"
                     ajaxdict["data"] = "Invalid XML cannot be beautified."
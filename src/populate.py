@@ -3,33 +3,38 @@ import django
 import requests
 import json
 
-def populate(url, type):
-    data = requests.get(url).text
-    data = json.loads(data)
-    total_count = 0
-    new_count = 0
-    for i in data[type]:
-        total_count += 1
-        response = LicenseNames.objects.get_or_create(name=i["name"])[1]
-        if(response==True):
-            new_count += 1
-        if type=="licenses":
-            LicenseNames.objects.get_or_create(name=i["licenseId"])
-        else:
-            LicenseNames.objects.get_or_create(name=i["licenseExceptionId"])
-    return (total_count, new_count)
+def load(url, name):
+    """ Read the license list json from the local mirror if it was synced
+    (manage.py sync_license_list), else from url """
+    data = licenselist.readJson(name)
+    if data is None:
+        data = json.loads(requests.get(url).text)
+    return data
+
+def populate(data, type):
+    """ Store the names and ids of the licenses or exceptions of data which
+    are not in the database yet, in one transaction. Returns the number of
+    licenses or exceptions and of names added. `python manage.py
+    populate_license_names --rebuild` also removes the names no longer listed.
+    """
+    if type == "licenses":
+        names = licensenames.namesOf(data, None)
+    else:
+        names = licensenames.namesOf(None, data)
+    new_count = licensenames.store(names)[0]
+    return (len(data[type]), new_count)
 
 if __name__ == "__main__":
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'src.settings')
     django.setup()
-    from app.models import LicenseNames
+    from app import licenselist, licensenames
     license_url = "https://raw.githubusercontent.com/spdx/license-list-data/master/json/licenses.json"
     exception_url = "https://raw.githubusercontent.com/spdx/license-list-data/master/json/exceptions.json"
     
     print("Adding License names (this might take some time if running for first time)")
-    total_count, new_count = populate(license_url, "licenses")
+    total_count, new_count = populate(load(license_url, "licenses.json"), "licenses")
     print("Total Licenses Found: %d\nNew Licenses added to database: %d"%(total_count, new_count))
     
     print("Adding Exception names")
-    total_count, new_count = populate(exception_url, "exceptions")
+    total_count, new_count = populate(load(exception_url, "exceptions.json"), "exceptions")
     print("Total Exceptions Found: %d\nNew Exceptions added to database: %d"%(total_count, new_count))
@@ -192,6 +192,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'PAGE_SIZE': 10,
+    'DEFAULT_PAGINATION_CLASS': 'api.listing.ListPagination',
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
@@ -210,6 +211,105 @@ REST_FRAMEWORK = {
 # renamed (for now) as tool.jar in the main src directory of spdx-online tool
 
 JAR_ABSOLUTE_PATH =  os.path.join(os.path.abspath("."),"tool.jar")
+
+# Start the JVM and load the tool classes when the WSGI worker boots,
+# instead of on the first validate/convert/compare request
+JVM_PREWARM = True
+
+# Number of worker processes running the SPDX java tools, each with its own JVM.
+# A JVM crash then only takes down a worker and fails the call it was running.
+# 0 runs the tools in the web process. The pool is opt-in because every WSGI
+# worker process starts its own pool, so the number of JVMs (a few hundred MB
+# each) depends on the server setup, and because the pool cannot be forked from
+# a process which already runs a JVM (the tests, the shell). Production
+# deployments should set it to the number of concurrent tool calls per process.
+SPDX_TOOL_WORKERS = 0
+# Recycle a worker after this many tool calls (None keeps it for ever)
+SPDX_TOOL_MAX_TASKS_PER_WORKER = 500
+# Seconds to wait for a tool call before reporting an error
+SPDX_TOOL_TIMEOUT = 300
+# Threads running the api requests posted with ?async=1 (0 runs them before responding)
+API_JOB_THREADS = 4
+# Seconds after which a job still queued or running is reported failed (status 500),
+# its thread was lost with a restart of the web process
+API_JOB_MAX_AGE = 2 * SPDX_TOOL_TIMEOUT
+
+# Most rows of a page of the api lists (their page_size parameter), and rows read
+# at once by their streamed export (export=1), see api.listing
+API_LIST_MAX_PAGE_SIZE = 100
+API_EXPORT_BATCH_SIZE = 500
+
+# Results of the validate, convert and compare api are cached on disk by
+# document hash, tool options and tool.jar version. Size of the cache in bytes,
+# the least recently used results are evicted above it, 0 disables the cache.
+RESULT_CACHE_DIR = os.path.join(BASE_DIR, 'resultcache')
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# The license texts used by check license are kept in memory. Seconds between two
+# checks of the license list in redis, and maximum age of the in memory copy.
+LICENSE_CORPUS_CHECK_INTERVAL = 60
+LICENSE_CORPUS_MAX_AGE = 24 * 60 * 60
+
+# Processes matching the texts of the batch check license api (0 matches them
+# in the web process), and the limits of a batch.
+LICENSE_BATCH_WORKERS = 0
+LICENSE_BATCH_MAX_ITEMS = 5000
+LICENSE_BATCH_MAX_TEXT_SIZE = 1024 * 1024
+
+# Local mirror of the SPDX license list, updated by `manage.py sync_license_list`.
+# Until it is synced the license list files are fetched from GitHub.
+LICENSE_LIST_DIR = os.path.join(BASE_DIR, 'licenselist')
+LICENSE_LIST_DATA_ARCHIVE_URL = 'https://github.com/spdx/license-list-data/archive/{ref}.tar.gz'
+LICENSE_LIST_XML_ARCHIVE_URL = 'https://github.com/spdx/license-list-XML/archive/{ref}.tar.gz'
+LICENSE_LIST_KEEP_SNAPSHOTS = 3
+LICENSE_LIST_TIMEOUT = 60
+
+# Without the local mirror, seconds between two downloads of licenses.json used
+# to check if the license list index (app.licenseindex) is still up to date
+LICENSE_INDEX_REFRESH_INTERVAL = 60 * 60
+
+# Autocomplete of the license names (app.licensenames): names returned by default,
+# most terms of a batch request, and without the local mirror, seconds between
+# two checks of the LicenseNames table for changes
+LICENSE_NAMES_LIMIT = 20
+LICENSE_NAMES_MAX_BATCH = 20
+LICENSE_NAMES_REFRESH_INTERVAL = 60
+
+# License XML schema used by the editor validation (app.schemacache): seconds
+# before it is read again in the background, and timeout of its download
+XML_SCHEMA_REFRESH_INTERVAL = 60 * 60
+XML_SCHEMA_TIMEOUT = 5
+
+# Number of parsed license request XMLs kept in memory (app.licensexml)
+LICENSE_XML_CACHE_SIZE = 1000
+
+# Rows of a page of the license request lists (app.requestlist), and the most the
+# infinite scroll endpoint returns at once (its limit parameter)
+REQUEST_LIST_PAGE_SIZE = 50
+REQUEST_LIST_MAX_PAGE_SIZE = 200
+
+# Client of the GitHub API (app.githubclient): connections kept per host, retries
+# of the idempotent requests failing with a server error and their backoff factor,
+# default timeout, directory and size in bytes of the ETag cache of the GET
+# responses (0 disables it), and requests of the hourly rate limit left to the
+# users by the background jobs.
+GITHUB_POOL_SIZE = 10
+GITHUB_RETRIES = 3
+GITHUB_BACKOFF = 0.5
+GITHUB_TIMEOUT = 30
+GITHUB_CACHE_DIR = os.path.join(BASE_DIR, 'githubcache')
+GITHUB_CACHE_MAX_BYTES = 64 * 1024 * 1024
+GITHUB_RATE_LIMIT_RESERVE = 100
+
+# Local index of the license request issues (app.licenseissues), updated by
+# `manage.py sync_license_issues` and the GitHub "issues" webhook at
+# /app/github_webhook/, the sync is meant to run from cron. Token of the sync
+# (unauthenticated, GitHub allows 60 requests an hour), secret of the webhook
+# (the webhook is refused without it) and timeout of the GitHub requests.
+LICENSE_ISSUES_TOKEN = os.environ.get('LICENSE_ISSUES_TOKEN')
+GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET')
+LICENSE_ISSUES_TIMEOUT = 30
+
 # URL Path Variables
 
 LOGIN_REDIRECT_URL = "/app/"
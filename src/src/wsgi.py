@@ -7,10 +7,29 @@ For more information on this file, see
 https://docs.djangoproject.com/en/1.11/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.settings")
 
 application = get_wsgi_application()
+
+if settings.JVM_PREWARM:
+    """ Pay the JVM startup once per worker, before it serves any request """
+    from app import licensebatch, schemacache, toolpool
+    try:
+        """ The license workers are forked before the JVM is started """
+        licensebatch.prewarm()
+    except Exception:
+        logging.getLogger().exception("Could not start the license batch workers at worker startup")
+    try:
+        toolpool.prewarm()
+    except Exception:
+        logging.getLogger().exception("Could not start the SPDX tools at worker startup")
+    try:
+        schemacache.prewarm()
+    except Exception:
+        logging.getLogger().exception("Could not load the license XML schema at worker startup")